@@ -0,0 +1,93 @@
+"""
+Columnar input benchmark
+------------------------
+
+Compares creating and writing a GPTable from a mapping of column name to
+array, as passed from R by reticulate, with converting the mapping to a
+pandas DataFrame first. Character columns are NumPy Unicode arrays and
+numeric columns are float arrays, as reticulate converts R vectors.
+
+The time and peak traced memory of creating each GPTable are reported, along
+with the time of writing the workbook.
+"""
+
+import argparse
+import tracemalloc
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import gptables as gpt
+
+from utils import time_call
+
+
+def make_columns(rows, value_columns):
+    """
+    Create a mapping of column name to array, like a converted R data.frame.
+    """
+    rng = np.random.default_rng(0)
+    columns = {
+        "Area": np.array([f"Area {n % 500}" for n in range(rows)]),
+        "Category": np.array([f"Category {n % 7}" for n in range(rows)]),
+        }
+    for col in range(value_columns):
+        columns[f"Value {col}"] = (rng.random(rows) * 1000).round(2)
+
+    return columns
+
+
+def create_from_pandas(columns):
+    return gpt.GPTable(
+        table=pd.DataFrame(columns),
+        table_name="benchmark_table",
+        title="Benchmark table",
+        index_columns={1: 0, 2: 1},
+        )
+
+
+def create_from_columns(columns):
+    return gpt.GPTable(
+        table=columns,
+        table_name="benchmark_table",
+        title="Benchmark table",
+        index_columns={1: 0, 2: 1},
+        )
+
+
+def peak_memory(func):
+    """
+    Return the peak traced memory, in MB, of a call to `func`.
+    """
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    columns = make_columns(args.rows, args.columns)
+
+    print(f"{args.rows} rows, {args.columns + 2} columns")
+    for label, create in [("pandas", create_from_pandas), ("columnar", create_from_columns)]:
+        create_time = time_call(lambda: create(columns), args.repeats)
+        memory = peak_memory(lambda: create(columns))
+        gptable = create(columns)
+        write_time = time_call(
+            lambda: gpt.write_workbook(BytesIO(), {"Data": gptable}),
+            1
+            )
+        print(f"{label:>9}:  create {create_time * 1000:8.1f} ms  {memory:7.1f} MB"
+              f"   write {write_time:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
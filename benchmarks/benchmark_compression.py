@@ -0,0 +1,64 @@
+"""
+Compression benchmark
+---------------------
+
+Measures the time taken by ``GPWorkbook.close()`` for different
+``compression_level`` and ``compression_workers`` settings. Worksheet parts
+are only compressed in parallel when a workbook contains several large parts,
+so the workbook is built from a number of equally sized sheets.
+"""
+
+import argparse
+import os
+import time
+import warnings
+from io import BytesIO
+
+import gptables as gpt
+
+from utils import make_gptable
+
+
+def time_close(sheets, repeats, **compression):
+    timings = []
+    for _ in range(repeats):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            buffer = BytesIO()
+            wb = gpt.produce_workbook(buffer, sheets, **compression)
+            start = time.perf_counter()
+            wb.close()
+            timings.append(time.perf_counter() - start)
+
+    return min(timings), len(buffer.getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--sheets", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    sheets = {
+        f"Sheet {n}": make_gptable(args.rows, table_name=f"table_{n}")
+        for n in range(args.sheets)
+        }
+
+    settings = [
+        {},
+        {"compression_level": 0},
+        {"compression_level": 1},
+        {"compression_workers": 1},
+        {"compression_workers": os.cpu_count()},
+        {"compression_level": 1, "compression_workers": os.cpu_count()},
+        ]
+
+    for compression in settings:
+        seconds, size = time_close(sheets, args.repeats, **compression)
+        label = ", ".join(f"{k}={v}" for k, v in compression.items()) or "default"
+        print(f"{label:<45} close: {seconds:.3f} s  size: {size / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Direct worksheet XML benchmark
+------------------------------
+
+Compares writing table bodies through XlsxWriter's per-cell ``write()`` with
+the ``direct_xml`` option, which serialises plain number and string cells
+straight to worksheet XML.
+"""
+
+import argparse
+from io import BytesIO
+
+import gptables as gpt
+
+from utils import make_gptable, time_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    sheets = {"Data": make_gptable(args.rows)}
+
+    default_time = time_call(
+        lambda: gpt.write_workbook(BytesIO(), sheets),
+        args.repeats
+        )
+    direct_time = time_call(
+        lambda: gpt.write_workbook(BytesIO(), sheets, direct_xml=True),
+        args.repeats
+        )
+
+    print(f"XlsxWriter write():    {default_time:.2f} s")
+    print(f"direct_xml=True:       {direct_time:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+In-memory output benchmark
+--------------------------
+
+Compares the latency of writing a workbook to disk with writing it to an
+in-memory buffer (XlsxWriter's ``in_memory`` option). The default table size
+produces a workbook of roughly 5 MB.
+"""
+
+import argparse
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+import gptables as gpt
+
+from utils import make_gptable, time_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=65000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    sheets = {"Data": make_gptable(args.rows)}
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "benchmark.xlsx"
+
+        disk_time = time_call(
+            lambda: gpt.write_workbook(path, sheets, in_memory=False),
+            args.repeats
+            )
+        size_mb = path.stat().st_size / 1e6
+
+    memory_time = time_call(
+        lambda: gpt.write_workbook(BytesIO(), sheets),
+        args.repeats
+        )
+
+    print(f"Workbook size:         {size_mb:.1f} MB")
+    print(f"Disk (temp files):     {disk_time:.2f} s")
+    print(f"In memory (BytesIO):   {memory_time:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Many sheets benchmark
+---------------------
+
+Times writing a workbook of many small tables, one per sheet, to check that
+the time taken grows linearly with the number of sheets. Workbooks of a tenth
+of the sheets and of all the sheets are written, and the time per sheet of
+each is reported.
+
+The default workbook has 5,000 sheets of 10 x 10 tables, plus the contents
+sheet. Its time budget is 20 ms per sheet (100 s in total), which it should
+meet with room to spare on a typical laptop.
+"""
+
+import argparse
+from io import BytesIO
+
+import gptables as gpt
+
+from utils import make_table, time_call
+
+
+def make_sheets(sheets, rows, columns):
+    """
+    Create a GPTable of `rows` x `columns` for each sheet.
+    """
+    return {
+        f"Sheet {n}": gpt.GPTable(
+            table=make_table(rows, value_columns=columns - 1, seed=n),
+            table_name=f"table_{n}",
+            title=f"Table {n}",
+            index_columns={1: 0},
+            )
+        for n in range(sheets)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sheets", type=int, default=5000)
+    parser.add_argument("--rows", type=int, default=10)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=20.0,
+                        help="time budget per sheet, in milliseconds")
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+
+    results = []
+    for sheet_count in [max(args.sheets // 10, 1), args.sheets]:
+        sheets = make_sheets(sheet_count, args.rows, args.columns)
+        elapsed = time_call(
+            lambda: gpt.write_workbook(BytesIO(), sheets),
+            args.repeats
+            )
+        results.append((sheet_count, elapsed))
+
+    for sheet_count, elapsed in results:
+        print(f"{sheet_count:>6} sheets:  {elapsed:7.2f} s"
+              f"  ({elapsed / sheet_count * 1000:.1f} ms per sheet)")
+
+    (small_count, small_time), (count, total_time) = results
+    growth = (total_time / count) / (small_time / small_count)
+    budget = args.budget_ms * count / 1000
+    print(f"Time per sheet grows by {growth:.2f}x from {small_count} to {count} sheets")
+    print(f"Budget: {budget:.0f} s - {'met' if total_time <= budget else 'NOT met'}")
+
+
+if __name__ == "__main__":
+    main()
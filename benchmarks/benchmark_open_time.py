@@ -0,0 +1,94 @@
+"""
+Open time benchmark
+-------------------
+
+Compares the file features known to slow opening and scrolling a workbook in
+Excel - distinct cell styles, wrapped cells, written cells, links and worksheet
+tables - with and without a theme's ``open_time_profile``.
+"""
+
+import argparse
+import re
+import zipfile
+from copy import deepcopy
+from io import BytesIO
+
+import numpy as np
+
+import gptables as gpt
+
+from utils import make_table, time_call
+
+
+def make_sheets(rows):
+    """
+    Create a table with a wrapped notes column, some blank values and links.
+    """
+    table = make_table(rows, value_columns=4)
+    table.iloc[::7, 1] = np.nan
+    table["Notes"] = ["[x]" if n % 3 else "Provisional figure" for n in range(rows)]
+    table.loc[::1000, "Notes"] = "[Methodology](https://www.gov.uk)"
+
+    return {
+        "Data": gpt.GPTable(
+            table=table,
+            table_name="benchmark_table",
+            title="Benchmark table",
+            index_columns={1: 0},
+            )
+        }
+
+
+def count_features(xlsx_bytes):
+    """
+    Count the features of a written `.xlsx` file that affect open time.
+    """
+    with zipfile.ZipFile(BytesIO(xlsx_bytes)) as xlsx:
+        styles = xlsx.read("xl/styles.xml").decode("utf-8")
+        sheets = [
+            xlsx.read(name).decode("utf-8")
+            for name in xlsx.namelist()
+            if name.startswith("xl/worksheets/sheet")
+            ]
+        tables = [name for name in xlsx.namelist() if name.startswith("xl/tables/")]
+
+    cell_xfs = re.search(r"<cellXfs.*?</cellXfs>", styles, re.S).group(0)
+    xfs = re.findall(r"<xf [^>]*?(?:/>|>.*?</xf>)", cell_xfs, re.S)
+    wrapped_styles = {str(n) for n, xf in enumerate(xfs) if 'wrapText="1"' in xf}
+
+    cell_styles = [style for sheet in sheets for style in re.findall(r'<c r="[A-Z]+\d+" s="(\d+)"', sheet)]
+
+    return {
+        "styles": len(xfs),
+        "cells": sum(sheet.count("<c ") for sheet in sheets),
+        "wrapped_cells": sum(style in wrapped_styles for style in cell_styles),
+        "hyperlinks": sum(sheet.count("<hyperlink ") for sheet in sheets),
+        "tables": len(tables),
+        "bytes": len(xlsx_bytes),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    sheets = make_sheets(args.rows)
+    theme = deepcopy(gpt.gptheme)
+    theme.update_open_time_profile(True)
+
+    for label, kwargs in [("default theme", {}), ("open_time_profile", {"theme": theme})]:
+        output = {}
+        write_time = time_call(
+            lambda: output.update(xlsx=gpt.write_workbook(None, sheets, **kwargs)),
+            args.repeats
+            )
+        features = ", ".join(
+            f"{name}={count}" for name, count in count_features(output["xlsx"]).items()
+            )
+        print(f"{label:<18} {write_time:.2f} s  {features}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Partitioning benchmark
+----------------------
+
+Compares writing one sheet per area using ``GPTable.partition_by`` with
+building a separate GPTable for each group in a ``groupby`` loop.
+"""
+
+import argparse
+
+import gptables as gpt
+
+from utils import make_table, time_call
+
+
+def groupby_sheets(table):
+    return {
+        str(area): gpt.GPTable(
+            table=group.reset_index(drop=True),
+            table_name=f"benchmark_table_{n + 1}",
+            title="Benchmark table",
+            index_columns={1: 0},
+            )
+        for n, (area, group) in enumerate(table.groupby("Area"))
+        }
+
+
+def partition_sheets(table):
+    gptable = gpt.GPTable(
+        table=table,
+        table_name="benchmark_table",
+        title="Benchmark table",
+        index_columns={1: 0},
+        )
+    return gptable.partition_by("Area")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    # make_table() has 500 areas
+    table = make_table(args.rows)
+
+    for name, make_sheets in [
+            ("groupby loop", groupby_sheets),
+            ("partition_by", partition_sheets),
+            ]:
+        plan_time = time_call(
+            lambda: gpt.plan_workbook(make_sheets(table), auto_width=True),
+            args.repeats
+            )
+        print(f"{name + ':':<16}{plan_time:.2f} s to prepare 500 sheets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Planning benchmark
+------------------
+
+Compares the time taken by ``plan_workbook`` with a full ``write_workbook``
+for the same sheets, and reports the planned and actual file sizes.
+"""
+
+import argparse
+from io import BytesIO
+
+import gptables as gpt
+
+from utils import make_gptable, time_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    sheets = {"Data": make_gptable(args.rows)}
+
+    plans = []
+    plan_time = time_call(
+        lambda: plans.append(gpt.plan_workbook(sheets)),
+        args.repeats
+        )
+    outputs = []
+    write_time = time_call(
+        lambda: outputs.append(gpt.write_workbook(None, sheets)),
+        args.repeats
+        )
+
+    plan = plans[-1]
+    print(f"plan_workbook:    {plan_time:.2f} s")
+    print(f"write_workbook:   {write_time:.2f} s")
+    print(f"Planned size:     {plan.estimated_compressed_bytes / 1e6:.2f} MB")
+    print(f"Actual size:      {len(outputs[-1]) / 1e6:.2f} MB")
+    print(f"Planned memory:   {plan.estimated_peak_memory_bytes / 1e6:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+String memory benchmark
+-----------------------
+
+Compares the peak memory of writing a table of text columns held with object
+dtype, pandas' Python-backed ``string`` dtype and the Arrow-backed
+``string[pyarrow]`` dtype. String dtype columns are profiled and measured
+from their distinct values, keep their dtype when the column headings are
+added, and are converted to Python strings a block of rows at a time, so
+``string[pyarrow]`` text stays in Arrow memory.
+
+Each dtype is written in a separate process, and the peak resident set size
+of that process is reported, as Arrow memory is not seen by ``tracemalloc``.
+Requires pyarrow for ``string[pyarrow]``, and a Unix platform.
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import time
+import warnings
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import gptables as gpt
+
+
+def make_text_table(rows, text_columns, dtype):
+    """
+    Create a table of text columns with a few thousand distinct labels each,
+    and one value column.
+    """
+    rng = np.random.default_rng(0)
+    labels = np.array([f"Category label {n}" for n in range(5000)], dtype=object)
+    table = pd.DataFrame({
+        f"Text {col}": pd.Series(labels[rng.integers(0, len(labels), rows)], dtype=dtype)
+        for col in range(text_columns)
+        })
+    table["Value"] = rng.random(rows).round(2)
+
+    return table
+
+
+def run(args):
+    """
+    Write the table once with `args.dtype`, then print the time taken and
+    peak memory of this process.
+    """
+    table = make_text_table(args.rows, args.columns, args.dtype)
+    gptable = gpt.GPTable(
+        table=table,
+        table_name="text_table",
+        title="Text table",
+        index_columns={1: 0},
+        )
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        start = time.perf_counter()
+        gpt.write_workbook(BytesIO(), {"Data": gptable}, direct_xml=args.direct_xml)
+        elapsed = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{args.dtype:>16}:  {elapsed:7.2f} s  peak {peak_mb:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--columns", type=int, default=10,
+                        help="number of text columns")
+    parser.add_argument("--dtype", action="append",
+                        help="dtype of the text columns, repeated to compare"
+                        " several. Defaults to object, string and"
+                        " string[pyarrow].")
+    parser.add_argument("--direct-xml", action="store_true")
+    args = parser.parse_args()
+
+    dtypes = args.dtype or ["object", "string", "string[pyarrow]"]
+    if len(dtypes) == 1:
+        args.dtype = dtypes[0]
+        run(args)
+        return
+
+    print(f"{args.rows} rows, {args.columns} text columns")
+    for dtype in dtypes:
+        command = [
+            sys.executable, __file__,
+            "--rows", str(args.rows),
+            "--columns", str(args.columns),
+            "--dtype", dtype,
+            ]
+        if args.direct_xml:
+            command.append("--direct-xml")
+        subprocess.run(command, check=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Shared helpers for the gptables benchmark scripts.
+
+Benchmarks are run as scripts from the repository root, for example::
+
+    python benchmarks/benchmark_in_memory.py --rows 10000
+"""
+
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import gptables as gpt
+
+
+def make_table(rows, value_columns=9, seed=0):
+    """
+    Create a typical statistical table, with one string index column and a
+    number of numeric value columns.
+    """
+    rng = np.random.default_rng(seed)
+    table = pd.DataFrame({"Area": [f"Area {n % 500}" for n in range(rows)]})
+    for col in range(value_columns):
+        table[f"Value {col}"] = (rng.random(rows) * 1000).round(2)
+
+    return table
+
+
+def make_gptable(rows, value_columns=9, table_name="benchmark_table"):
+    """
+    Create a GPTable wrapping `make_table()`.
+    """
+    return gpt.GPTable(
+        table=make_table(rows, value_columns),
+        table_name=table_name,
+        title="Benchmark table",
+        index_columns={1: 0},
+        )
+
+
+def time_call(func, repeats=3):
+    """
+    Return the best wall clock time, in seconds, of `repeats` calls to `func`.
+    Warnings raised by gptables (e.g. missing notes sheet) are suppressed.
+    """
+    timings = []
+    for _ in range(repeats):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+    return min(timings)
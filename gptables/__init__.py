@@ -2,14 +2,17 @@ from gptables.core.theme import Theme
 from gptables.core.cover import Cover
 from gptables.core.gptable import GPTable
 from gptables.core.wrappers import GPWorkbook
-
-from gptables.utils.unpickle_themes import gptheme
+from gptables.core.theme import theme_registry
 
 
 from gptables.core.api import (
         # API functions
         produce_workbook,
 	    write_workbook,
+        produce_workbook_async,
+        write_workbook_async,
+        plan_workbook,
+        write_workbook_formats,
         )
 
 __doc__ = """
@@ -58,3 +61,10 @@ other formatting is required.
 
 5. You ``write_workbook`` to win.
 """
+
+
+def __getattr__(name):
+    # The default theme is built when first used, rather than on import
+    if name == "gptheme":
+        return theme_registry.gptheme
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,14 @@
+import asyncio
+import inspect
 import warnings
 import pandas as pd
+from io import BytesIO
 from pathlib import Path
 
 from gptables import GPWorkbook, GPTable
+from gptables.core.plan import PlanningWorkbook
+from gptables.core.prepare import PreparingWorkbook
+from gptables.core.emitters import EMITTERS
 
 
 def produce_workbook(
@@ -17,7 +23,12 @@ def produce_workbook(
         notesheet_options = {},
         auto_width = True,
         gridlines = "hide_all",
-        cover_gridlines = False
+        cover_gridlines = False,
+        in_memory = None,
+        compression_level = None,
+        compression_workers = None,
+        direct_xml = False,
+        auto_height = False
         ):
     """
     Produces a GPWorkbook, ready to be written to the specified `.xlsx` file
@@ -25,8 +36,9 @@ def produce_workbook(
 
     Parameters
     ----------
-    filename : str
-        path to write final workbook to (an `.xlsx` file)
+    filename : str, pathlib.Path or file-like
+        path to write final workbook to (an `.xlsx` file), or a writable
+        binary file-like object such as ``io.BytesIO``
     sheets : dict
         mapping worksheet labels to ``GPTable`` objects
     theme : gptables.Theme, optional
@@ -59,52 +71,55 @@ def produce_workbook(
     cover_gridlines : bool, optional
         indication if gridlines should apply to the cover worksheet. False 
         by default.
+    in_memory : bool, optional
+        use XlsxWriter's `in_memory` option, so that worksheet XML is held in
+        memory rather than in temporary files. If None, this is enabled when
+        `filename` is a file-like object.
+    compression_level : int, optional
+        zlib compression level used when the workbook is closed, from 0 (store
+        only, fastest) to 9 (smallest file). Defaults to zlib's default level.
+    compression_workers : int, optional
+        number of threads used to compress workbook parts in parallel when the
+        workbook is closed. By default, parts are compressed serially.
+    direct_xml : bool, optional
+        write the plain number and string cells of table bodies straight to
+        worksheet XML, bypassing XlsxWriter's per-cell ``write()``. This is
+        faster for large tables and writes the same workbook. False by
+        default.
+    auto_height : bool, optional
+        calculate the height of each table row from the lines of text in its
+        cells, and set it explicitly, so that applications do not fit rows
+        with wrapped text when the workbook is opened. False by default.
         
     Returns
     -------
     workbook : gptables.GPWorkbook
     """
-    if isinstance(filename, Path):
-        filename = filename.as_posix()
-
-    wb = GPWorkbook(filename)
-
-    if theme is not None:
-        wb.set_theme(theme)
-
-    if cover is not None:
-        if cover_gridlines:
-            ws = wb.add_worksheet(cover.cover_label, gridlines=gridlines)
-        else:
-            ws = wb.add_worksheet(cover.cover_label, gridlines="hide_all")
-        ws.write_cover(cover)
-
-    contentsheet = {}
-    if contentsheet_label is not None:
-        if contentsheet_options:
-            valid_keys = ["additional_elements", "column_names",
-                "table_name", "title", "subtitles", "instructions"]
-            if not all(key in valid_keys for key in contentsheet_options.keys()):
-                msg = ("Valid `contentsheet_options` keys are 'additional_elements',"
-                    "'column_names', 'table_name', 'title', 'subtitles', 'instructions'")
-                raise ValueError(msg)
-        contents_gptable = wb.make_table_of_contents(sheets, **contentsheet_options)
-        contentsheet = {contentsheet_label: contents_gptable}
+    wb = _create_workbook(
+        filename,
+        theme,
+        in_memory,
+        compression_level,
+        compression_workers,
+        direct_xml
+        )
 
-    wb._update_annotations(sheets)
+    for _ in _iter_write_sheets(
+            wb,
+            sheets,
+            cover,
+            contentsheet_label,
+            contentsheet_options,
+            notes_table,
+            notesheet_label,
+            notesheet_options,
+            auto_width,
+            gridlines,
+            cover_gridlines,
+            auto_height
+            ):
+        pass
 
-    notesheet = {}
-    if notes_table is None:
-        warnings.warn("No note text provided, notes sheet has not been generated")
-    else:
-        note_gptable = wb.make_notesheet(notes_table, **notesheet_options)
-        notesheet = {notesheet_label: note_gptable}
-
-    sheets = {**contentsheet, **notesheet, **sheets}
-    for label, gptable in sheets.items():
-        ws = wb.add_worksheet(label, gridlines=gridlines)
-        ws.write_gptable(gptable, auto_width, wb._annotations)
-    
     return wb
 
 
@@ -121,7 +136,12 @@ def write_workbook(
         notesheet_options = {},
         auto_width = True,
         gridlines = "hide_all",
-        cover_gridlines = False
+        cover_gridlines = False,
+        in_memory = None,
+        compression_level = None,
+        compression_workers = None,
+        direct_xml = False,
+        auto_height = False
         ):
 
     """
@@ -136,8 +156,10 @@ def write_workbook(
 
     Parameters
     ----------
-    filename : str
-        Path to write final workbook to (an `.xlsx` file)
+    filename : str, pathlib.Path, file-like or None
+        Path to write final workbook to (an `.xlsx` file), or a writable
+        binary file-like object. If None, the workbook is built in memory and
+        returned as bytes.
     sheets : dict
         mapping worksheet labels to ``GPTable`` objects
     theme : gptables.Theme, optional
@@ -170,18 +192,42 @@ def write_workbook(
     cover_gridlines : bool, optional
         indication if gridlines should apply to the cover worksheet. False 
         by default.
+    in_memory : bool, optional
+        use XlsxWriter's `in_memory` option, so that worksheet XML is held in
+        memory rather than in temporary files. If None, this is enabled when
+        `filename` is a file-like object or None.
+    compression_level : int, optional
+        zlib compression level used when the workbook is closed, from 0 (store
+        only, fastest) to 9 (smallest file). Defaults to zlib's default level.
+    compression_workers : int, optional
+        number of threads used to compress workbook parts in parallel when the
+        workbook is closed. By default, parts are compressed serially.
+    direct_xml : bool, optional
+        write the plain number and string cells of table bodies straight to
+        worksheet XML, bypassing XlsxWriter's per-cell ``write()``. This is
+        faster for large tables and writes the same workbook. False by
+        default.
+    auto_height : bool, optional
+        calculate the height of each table row from the lines of text in its
+        cells, and set it explicitly, so that applications do not fit rows
+        with wrapped text when the workbook is opened. False by default.
     contentsheet : str
         alias for contentsheet_label, deprecated in v1.1.0
 
     Returns
     -------
-    None
+    bytes or None
+        contents of the `.xlsx` file if `filename` is None, otherwise None
     """
     if contentsheet is not None:
         contentsheet_label = contentsheet
 
+    output = filename
+    if filename is None:
+        output = BytesIO()
+
     wb = produce_workbook(
-        filename,
+        output,
         sheets,
         theme,
         cover,
@@ -192,6 +238,456 @@ def write_workbook(
         notesheet_options,
         auto_width,
         gridlines,
-        cover_gridlines
+        cover_gridlines,
+        in_memory,
+        compression_level,
+        compression_workers,
+        direct_xml,
+        auto_height
         )
     wb.close()
+
+    if filename is None:
+        return output.getvalue()
+
+
+def plan_workbook(
+        sheets,
+        theme = None,
+        cover = None,
+        contentsheet_label = "Contents",
+        contentsheet_options = {},
+        notes_table = None,
+        notesheet_label = "Notes",
+        notesheet_options = {},
+        auto_width = True,
+        gridlines = "hide_all",
+        cover_gridlines = False,
+        auto_height = False
+        ):
+    """
+    Plans a workbook without writing it. Runs the same reference, link,
+    validation, format and column width logic as :func:`produce_workbook`,
+    but records the cells that would be written instead of writing them.
+
+    Use this to check that a workbook is within Excel's limits, and to
+    estimate its size and memory use, before producing it.
+
+    Parameters
+    ----------
+    sheets, theme, cover, contentsheet_label, contentsheet_options,
+    notes_table, notesheet_label, notesheet_options, auto_width, gridlines,
+    cover_gridlines, auto_height
+        as for :func:`produce_workbook`
+
+    Returns
+    -------
+    plan : gptables.core.plan.WorkbookPlan
+        layout of each sheet, counts of cells, strings, links and formats,
+        estimated sizes and any Excel limits exceeded
+    """
+    wb = PlanningWorkbook()
+
+    if theme is not None:
+        wb.set_theme(theme)
+
+    for _ in _iter_write_sheets(
+            wb,
+            sheets,
+            cover,
+            contentsheet_label,
+            contentsheet_options,
+            notes_table,
+            notesheet_label,
+            notesheet_options,
+            auto_width,
+            gridlines,
+            cover_gridlines,
+            auto_height
+            ):
+        pass
+
+    return wb.get_plan()
+
+
+def write_workbook_formats(
+        outputs,
+        sheets,
+        theme = None,
+        cover = None,
+        contentsheet_label = "Contents",
+        contentsheet_options = {},
+        notes_table = None,
+        notesheet_label = "Notes",
+        notesheet_options = {},
+        auto_width = True,
+        gridlines = "hide_all",
+        cover_gridlines = False,
+        compression_level = None,
+        compression_workers = None,
+        direct_xml = False,
+        auto_height = False
+        ):
+    """
+    Writes the same workbook to several formats, such as `.xlsx` and CSV.
+
+    Each sheet is prepared once - references, links, validation, formats and
+    column widths are applied as for :func:`write_workbook` - and is then
+    written by an emitter for each format. If a sheet cannot be written, no
+    `.xlsx` or `.ods` file is written, and CSV files already written are
+    removed.
+
+    Parameters
+    ----------
+    outputs : dict
+        mapping formats to outputs. Supported formats are:
+
+        - ``"xlsx"``: path or writable binary file-like object to write the
+          workbook to
+        - ``"csv"``: directory to write one CSV file per table to, named after
+          the sheet label. CSV files contain only the column headings and data.
+        - ``"ods"``: path or writable binary file-like object to write an
+          OpenDocument spreadsheet to
+    sheets, theme, cover, contentsheet_label, contentsheet_options,
+    notes_table, notesheet_label, notesheet_options, auto_width, gridlines,
+    cover_gridlines, compression_level, compression_workers, direct_xml,
+    auto_height
+        as for :func:`write_workbook`
+
+    Returns
+    -------
+    None
+    """
+    invalid_formats = [key for key in outputs if key not in EMITTERS]
+    if invalid_formats:
+        msg = (f"Unsupported output formats: {invalid_formats}. Valid"
+               f" formats are {list(EMITTERS)}")
+        raise ValueError(msg)
+
+    emitter_options = {
+        "xlsx": {
+            "compression_level": compression_level,
+            "compression_workers": compression_workers,
+            "direct_xml": direct_xml,
+            },
+        "ods": {"compression_level": compression_level},
+        }
+    # Emitters are discarded if any sheet fails, so that no partial output
+    # is written
+    emitters = []
+    try:
+        for output_format, output in outputs.items():
+            emitters.append(EMITTERS[output_format](
+                output,
+                **emitter_options.get(output_format, {})
+                ))
+
+        wb = PreparingWorkbook()
+
+        if theme is not None:
+            wb.set_theme(theme)
+
+        for label in _iter_write_sheets(
+                wb,
+                sheets,
+                cover,
+                contentsheet_label,
+                contentsheet_options,
+                notes_table,
+                notesheet_label,
+                notesheet_options,
+                auto_width,
+                gridlines,
+                cover_gridlines,
+                auto_height
+                ):
+            prepared = wb._pop_prepared_sheet(label)
+            for emitter in emitters:
+                emitter.emit_sheet(prepared)
+    except BaseException:
+        for emitter in emitters:
+            emitter.discard()
+        raise
+
+    for n, emitter in enumerate(emitters):
+        try:
+            emitter.close()
+        except BaseException:
+            for unclosed in emitters[n:]:
+                unclosed.discard()
+            raise
+
+
+async def produce_workbook_async(
+        filename,
+        sheets,
+        theme = None,
+        cover = None,
+        contentsheet_label = "Contents",
+        contentsheet_options = {},
+        notes_table = None,
+        notesheet_label = "Notes",
+        notesheet_options = {},
+        auto_width = True,
+        gridlines = "hide_all",
+        cover_gridlines = False,
+        in_memory = None,
+        compression_level = None,
+        compression_workers = None,
+        direct_xml = False,
+        auto_height = False,
+        executor = None
+        ):
+    """
+    Coroutine version of :func:`produce_workbook`, for use in asyncio
+    applications such as web services.
+
+    Each sheet is prepared and written on `executor`, so the event loop is not
+    blocked. Control returns to the event loop between sheets, where the
+    coroutine may be cancelled.
+
+    Parameters
+    ----------
+    filename, sheets, theme, cover, contentsheet_label, contentsheet_options,
+    notes_table, notesheet_label, notesheet_options, auto_width, gridlines,
+    cover_gridlines, in_memory, compression_level, compression_workers,
+    direct_xml, auto_height
+        as for :func:`produce_workbook`
+    executor : concurrent.futures.Executor, optional
+        thread-based executor to write sheets on. The event loop's default
+        executor is used if None.
+
+    Returns
+    -------
+    workbook : gptables.GPWorkbook
+    """
+    loop = asyncio.get_running_loop()
+
+    wb = _create_workbook(
+        filename,
+        theme,
+        in_memory,
+        compression_level,
+        compression_workers,
+        direct_xml
+        )
+
+    sheet_writer = _iter_write_sheets(
+        wb,
+        sheets,
+        cover,
+        contentsheet_label,
+        contentsheet_options,
+        notes_table,
+        notesheet_label,
+        notesheet_options,
+        auto_width,
+        gridlines,
+        cover_gridlines,
+        auto_height
+        )
+
+    try:
+        while await loop.run_in_executor(executor, next, sheet_writer, None) is not None:
+            pass
+    except BaseException:
+        # Prevent XlsxWriter from writing a partial workbook
+        wb.fileclosed = True
+        raise
+
+    return wb
+
+
+async def write_workbook_async(
+        filename,
+        sheets,
+        theme = None,
+        cover = None,
+        contentsheet_label = "Contents",
+        contentsheet_options = {},
+        notes_table = None,
+        notesheet_label = "Notes",
+        notesheet_options = {},
+        auto_width = True,
+        gridlines = "hide_all",
+        cover_gridlines = False,
+        in_memory = None,
+        compression_level = None,
+        compression_workers = None,
+        direct_xml = False,
+        auto_height = False,
+        executor = None,
+        chunk_size = 65536
+        ):
+    """
+    Coroutine version of :func:`write_workbook`, for use in asyncio
+    applications such as web services.
+
+    The workbook is produced with :func:`produce_workbook_async` and closed on
+    `executor`. If `filename` is an asynchronous sink, the finished workbook is
+    streamed to it in chunks.
+
+    Parameters
+    ----------
+    filename : str, pathlib.Path, file-like, asynchronous sink or None
+        path or writable binary file-like object to write the workbook to. An
+        asynchronous sink is an object with a coroutine ``write()`` method, or
+        a ``write()`` method and a coroutine ``drain()`` method (such as
+        ``asyncio.StreamWriter``). If None, the workbook is returned as bytes.
+    sheets, theme, cover, contentsheet_label, contentsheet_options,
+    notes_table, notesheet_label, notesheet_options, auto_width, gridlines,
+    cover_gridlines, in_memory, compression_level, compression_workers,
+    direct_xml, auto_height
+        as for :func:`write_workbook`
+    executor : concurrent.futures.Executor, optional
+        thread-based executor to write sheets and close the workbook on. The
+        event loop's default executor is used if None.
+    chunk_size : int, optional
+        number of bytes written to an asynchronous sink at a time
+
+    Returns
+    -------
+    bytes or None
+        contents of the `.xlsx` file if `filename` is None, otherwise None
+    """
+    loop = asyncio.get_running_loop()
+
+    output = filename
+    if filename is None or _is_async_sink(filename):
+        output = BytesIO()
+
+    wb = await produce_workbook_async(
+        output,
+        sheets,
+        theme,
+        cover,
+        contentsheet_label,
+        contentsheet_options,
+        notes_table,
+        notesheet_label,
+        notesheet_options,
+        auto_width,
+        gridlines,
+        cover_gridlines,
+        in_memory,
+        compression_level,
+        compression_workers,
+        direct_xml,
+        auto_height,
+        executor
+        )
+    await loop.run_in_executor(executor, wb.close)
+
+    if filename is None:
+        return output.getvalue()
+
+    if output is not filename:
+        await _stream_to_sink(output.getbuffer(), filename, chunk_size)
+
+
+def _is_async_sink(obj):
+    """
+    Check whether an object has a coroutine `write()` or `drain()` method.
+    """
+    return (
+        inspect.iscoroutinefunction(getattr(obj, "write", None))
+        or inspect.iscoroutinefunction(getattr(obj, "drain", None))
+        )
+
+
+async def _stream_to_sink(data, sink, chunk_size):
+    """
+    Write bytes to an asynchronous sink in chunks.
+    """
+    for start in range(0, len(data), chunk_size):
+        result = sink.write(bytes(data[start:start + chunk_size]))
+        if inspect.isawaitable(result):
+            await result
+        if hasattr(sink, "drain"):
+            await sink.drain()
+
+
+def _create_workbook(
+        filename,
+        theme,
+        in_memory,
+        compression_level,
+        compression_workers,
+        direct_xml
+        ):
+    """
+    Create an empty GPWorkbook with the given output and options.
+    """
+    if isinstance(filename, Path):
+        filename = filename.as_posix()
+
+    if in_memory is None:
+        in_memory = not isinstance(filename, str)
+
+    wb = GPWorkbook(filename, {
+        "in_memory": in_memory,
+        "compression_level": compression_level,
+        "compression_workers": compression_workers,
+        "direct_xml": direct_xml,
+        })
+
+    if theme is not None:
+        wb.set_theme(theme)
+
+    return wb
+
+
+def _iter_write_sheets(
+        wb,
+        sheets,
+        cover,
+        contentsheet_label,
+        contentsheet_options,
+        notes_table,
+        notesheet_label,
+        notesheet_options,
+        auto_width,
+        gridlines,
+        cover_gridlines,
+        auto_height
+        ):
+    """
+    Write the cover, contents, notes and table sheets to a GPWorkbook,
+    yielding each sheet label once that sheet has been written.
+    """
+    if cover is not None:
+        if cover_gridlines:
+            ws = wb.add_worksheet(cover.cover_label, gridlines=gridlines)
+        else:
+            ws = wb.add_worksheet(cover.cover_label, gridlines="hide_all")
+        ws.write_cover(cover)
+        yield cover.cover_label
+
+    sheets = wb._split_oversized_sheets(sheets)
+
+    contentsheet = {}
+    if contentsheet_label is not None:
+        if contentsheet_options:
+            valid_keys = ["additional_elements", "column_names",
+                "table_name", "title", "subtitles", "instructions"]
+            if not all(key in valid_keys for key in contentsheet_options.keys()):
+                msg = ("Valid `contentsheet_options` keys are 'additional_elements',"
+                    "'column_names', 'table_name', 'title', 'subtitles', 'instructions'")
+                raise ValueError(msg)
+        contents_gptable = wb.make_table_of_contents(sheets, **contentsheet_options)
+        contentsheet = {contentsheet_label: contents_gptable}
+
+    wb._update_annotations(sheets)
+
+    notesheet = {}
+    if notes_table is None:
+        warnings.warn("No note text provided, notes sheet has not been generated")
+    else:
+        note_gptable = wb.make_notesheet(notes_table, **notesheet_options)
+        notesheet = {notesheet_label: note_gptable}
+
+    sheets = {**contentsheet, **notesheet, **sheets}
+    for label, gptable in sheets.items():
+        ws = wb.add_worksheet(label, gridlines=gridlines)
+        ws.write_gptable(gptable, auto_width, wb._annotations, auto_height)
+        yield label
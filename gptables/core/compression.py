@@ -0,0 +1,289 @@
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED, LargeZipFile
+
+from xlsxwriter.packager import Packager
+
+
+# Largest size or offset that can be recorded without ZIP64 extensions
+_ZIP32_LIMIT = 0xFFFFFFFF - 1
+
+# MS-DOS date and time for Excel's timestamp of 1/1/1980
+_DOS_TIME = 0
+_DOS_DATE = (1 << 5) | 1
+
+# Bytes of a part read, compressed or copied at a time
+_CHUNK_SIZE = 1 << 20
+
+
+class PartPackager(Packager):
+    """
+    XlsxWriter Packager that keeps the workbook parts it creates, rather than
+    returning them to be added to XlsxWriter's own zip file.
+
+    Attributes
+    ----------
+    parts : list of tuple
+        ``(os_filename, xml_filename, is_binary)`` for each part, where
+        ``os_filename`` is a temporary file path, or a buffer for workbooks
+        written with the ``in_memory`` option
+    """
+    def __init__(self):
+        super(PartPackager, self).__init__()
+        self.parts = []
+
+
+    def _create_package(self):
+        self.parts = super(PartPackager, self)._create_package()
+        return []
+
+
+class PartZipFile:
+    """
+    Stand-in for ``zipfile.ZipFile`` used when assembling the `.xlsx`
+    container. Workbook parts are collected as they are added, then compressed
+    in parallel on a thread pool when the file is closed. zlib releases the
+    GIL while compressing, so large parts are deflated concurrently.
+
+    Parts added from files on disk are kept on disk, and are read, compressed
+    and copied to the container in chunks, so the size of a part does not
+    limit the memory used to write it.
+
+    Parameters
+    ----------
+    file : str or file-like
+        path or writable binary file-like object to write the container to
+    mode : str
+        must be "w"
+    compression : int, optional
+        ``zipfile.ZIP_DEFLATED`` or ``zipfile.ZIP_STORED``
+    allowZip64 : bool, optional
+        permit ZIP64 extensions, for containers larger than 4 GB
+    compresslevel : int, optional
+        zlib compression level, from 0 to 9. Level 0 stores parts without
+        compression. Defaults to zlib's default level.
+    max_workers : int, optional
+        number of threads used to compress parts. Defaults to the number of
+        CPUs.
+    """
+    def __init__(
+            self,
+            file,
+            mode="w",
+            compression=ZIP_DEFLATED,
+            allowZip64=False,
+            compresslevel=None,
+            max_workers=None,
+            ):
+        if mode != "w":
+            raise ValueError("PartZipFile only supports writing (mode='w')")
+
+        if compresslevel is None:
+            compresslevel = zlib.Z_DEFAULT_COMPRESSION
+        elif compresslevel not in range(10):
+            msg = ("`compression_level` must be an integer from 0 (store only)"
+                   f" to 9, not {compresslevel}")
+            raise ValueError(msg)
+
+        if compresslevel == 0:
+            compression = ZIP_STORED
+
+        self.file = file
+        self.compression = compression
+        self.compresslevel = compresslevel
+        self.allowZip64 = allowZip64
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._parts = []
+        self._part_dirs = []
+
+
+    def write(self, filename, arcname):
+        """
+        Add a part from a file on disk.
+
+        The caller may remove ``filename`` once this returns, as XlsxWriter
+        does with its temporary files. The part is hard linked, or copied
+        where links are not supported, to a private directory until the
+        container is written.
+        """
+        filename = os.fspath(filename)
+        part_dir = tempfile.mkdtemp(dir=os.path.dirname(filename) or None)
+        self._part_dirs.append(part_dir)
+
+        part_path = os.path.join(part_dir, "part")
+        try:
+            os.link(filename, part_path)
+        except OSError:
+            shutil.copyfile(filename, part_path)
+
+        self._parts.append((arcname, part_path))
+
+
+    def writestr(self, zinfo_or_arcname, data):
+        """
+        Add a part from a string or bytes.
+        """
+        if isinstance(zinfo_or_arcname, ZipInfo):
+            arcname = zinfo_or_arcname.filename
+        else:
+            arcname = zinfo_or_arcname
+
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        self._parts.append((arcname, data))
+
+
+    def close(self):
+        """
+        Compress all parts and write the zip container.
+        """
+        try:
+            total_size = sum(_part_size(source) for _, source in self._parts)
+            if total_size > _ZIP32_LIMIT or len(self._parts) >= 0xFFFF:
+                self._write_zip64()
+                return
+
+            if self.max_workers > 1 and len(self._parts) > 1:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    compressed = list(executor.map(self._compress, self._parts))
+            else:
+                compressed = [self._compress(part) for part in self._parts]
+
+            try:
+                if isinstance(self.file, (str, os.PathLike)):
+                    with open(self.file, "wb") as file:
+                        self._write_container(file, compressed)
+                else:
+                    self._write_container(self.file, compressed)
+            finally:
+                for *_, compressed_file in compressed:
+                    compressed_file.close()
+        finally:
+            self._parts = []
+            for part_dir in self._part_dirs:
+                shutil.rmtree(part_dir, ignore_errors=True)
+            self._part_dirs = []
+
+
+    def _compress(self, part):
+        """
+        Return the name, CRC-32, uncompressed size, compressed size and a file
+        holding the compressed data of a part.
+
+        Parts on disk are compressed to a temporary file, and parts in memory
+        to a buffer.
+        """
+        arcname, source = part
+        if isinstance(source, bytes):
+            part_file = BytesIO(source)
+            compressed_file = BytesIO()
+        else:
+            part_file = open(source, "rb")
+            compressed_file = tempfile.TemporaryFile()
+
+        if self.compression == ZIP_STORED:
+            compressor = None
+        else:
+            compressor = zlib.compressobj(
+                self.compresslevel,
+                zlib.DEFLATED,
+                -zlib.MAX_WBITS
+                )
+
+        crc = 0
+        size = 0
+        with part_file:
+            for chunk in iter(lambda: part_file.read(_CHUNK_SIZE), b""):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                compressed_file.write(chunk)
+
+        if compressor is not None:
+            compressed_file.write(compressor.flush())
+
+        compressed_size = compressed_file.tell()
+        compressed_file.seek(0)
+
+        return arcname, crc, size, compressed_size, compressed_file
+
+
+    def _write_container(self, file, compressed_parts):
+        """
+        Write local file headers, compressed data and the central directory.
+        """
+        version = 20 if self.compression == ZIP_DEFLATED else 10
+        offset = 0
+        central_directory = []
+
+        for arcname, crc, size, compressed_size, data in compressed_parts:
+            name = arcname.encode("utf-8")
+            if offset + compressed_size > _ZIP32_LIMIT:
+                raise LargeZipFile("Zipfile size would require ZIP64 extensions")
+
+            local_header = struct.pack(
+                "<IHHHHHIIIHH",
+                0x04034b50, version, 0, self.compression, _DOS_TIME, _DOS_DATE,
+                crc, compressed_size, size, len(name), 0
+                )
+            central_directory.append(struct.pack(
+                "<IHHHHHHIIIHHHHHII",
+                0x02014b50, version, version, 0, self.compression, _DOS_TIME,
+                _DOS_DATE, crc, compressed_size, size, len(name), 0, 0, 0, 0, 0,
+                offset
+                ) + name)
+
+            file.write(local_header)
+            file.write(name)
+            shutil.copyfileobj(data, file, _CHUNK_SIZE)
+            offset += len(local_header) + len(name) + compressed_size
+
+        directory = b"".join(central_directory)
+        file.write(directory)
+        file.write(struct.pack(
+            "<IHHHHIIH",
+            0x06054b50, 0, 0, len(compressed_parts), len(compressed_parts),
+            len(directory), offset, 0
+            ))
+
+
+    def _write_zip64(self):
+        """
+        Fall back to serial ``zipfile`` compression for containers requiring
+        ZIP64 extensions.
+        """
+        if not self.allowZip64:
+            raise LargeZipFile("Zipfile size would require ZIP64 extensions")
+
+        with ZipFile(
+                self.file,
+                "w",
+                compression=self.compression,
+                allowZip64=True,
+                compresslevel=self.compresslevel,
+                ) as zip_file:
+            for arcname, source in self._parts:
+                zinfo = ZipInfo(arcname, (1980, 1, 1, 0, 0, 0))
+                zinfo.compress_type = self.compression
+                if isinstance(source, bytes):
+                    zip_file.writestr(zinfo, source)
+                else:
+                    with open(source, "rb") as part_file, \
+                            zip_file.open(zinfo, "w", force_zip64=True) as dest:
+                        shutil.copyfileobj(part_file, dest, _CHUNK_SIZE)
+
+
+def _part_size(source):
+    """
+    Return the uncompressed size of a part held in memory or on disk.
+    """
+    if isinstance(source, bytes):
+        return len(source)
+    return os.path.getsize(source)
@@ -0,0 +1,170 @@
+import csv
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from .gptable import FormatList
+from .ods import OdsEmitter
+from .wrappers import GPWorkbook
+
+
+class XlsxEmitter:
+    """
+    Writes prepared sheets to an `.xlsx` file, using a GPWorkbook.
+
+    Parameters
+    ----------
+    filename : str, pathlib.Path or file-like
+        path or writable binary file-like object to write the workbook to
+    compression_level : int, optional
+        zlib compression level, as for :func:`~.core.api.produce_workbook`
+    compression_workers : int, optional
+        number of threads used to compress the workbook
+    direct_xml : bool, optional
+        write plain table body cells straight to worksheet XML
+    """
+    def __init__(
+            self,
+            filename,
+            compression_level=None,
+            compression_workers=None,
+            direct_xml=False,
+            ):
+        if isinstance(filename, Path):
+            filename = filename.as_posix()
+
+        self.workbook = GPWorkbook(filename, {
+            "in_memory": not isinstance(filename, str),
+            "compression_level": compression_level,
+            "compression_workers": compression_workers,
+            "direct_xml": direct_xml,
+            })
+
+
+    def emit_sheet(self, sheet):
+        """
+        Write a PreparedSheet to a new worksheet.
+        """
+        ws = self.workbook.add_worksheet(sheet.label, gridlines=sheet.gridlines)
+
+        for row, col, data, format_dict in sheet.cells:
+            ws._smart_write(row, col, data, format_dict)
+
+        for pos, data, formats in sheet.arrays:
+            ws._write_array(pos, data, formats)
+
+        for first_col, last_col, width in sheet.columns:
+            ws.set_column(first_col, last_col, width)
+
+        ws._set_column_formats(sheet.column_formats)
+
+        for row, height in sheet.rows:
+            ws.set_row(row, height)
+
+        for table in sheet.tables:
+            ws._add_worksheet_table(*table)
+
+        for conditional_format in sheet.conditional_formats:
+            ws._add_conditional_format(*conditional_format)
+
+
+    def close(self):
+        """
+        Close the workbook, writing the `.xlsx` file.
+        """
+        self.workbook.close()
+
+
+    def discard(self):
+        """
+        Discard the workbook without writing the `.xlsx` file.
+        """
+        # Prevent XlsxWriter from writing the workbook when it is deleted
+        self.workbook.fileclosed = True
+
+
+class CsvEmitter:
+    """
+    Writes the table of each prepared sheet to a CSV file, named after the
+    sheet label. Only the column headings and data are written, so sheets
+    without a table (such as a cover sheet) are skipped. Rows are written as
+    they are read from the prepared table.
+
+    Parameters
+    ----------
+    directory : str or pathlib.Path
+        directory to write the CSV files to. It is created if it does not
+        exist.
+    encoding : str, optional
+        text encoding of the CSV files
+    """
+    def __init__(self, directory, encoding="utf-8"):
+        self.directory = Path(directory)
+        self.encoding = encoding
+        os.makedirs(self.directory, exist_ok=True)
+        self.paths = []
+
+
+    def emit_sheet(self, sheet):
+        """
+        Write the table of a PreparedSheet to a CSV file.
+        """
+        if len(sheet.arrays) == 0:
+            return None
+
+        path = self.directory / f"{sheet.label}.csv"
+        with open(path, "w", newline="", encoding=self.encoding) as csv_file:
+            writer = csv.writer(csv_file)
+            for _, data, _ in sheet.arrays:
+                rows = data.itertuples(index=False, name=None)
+                headings = next(rows)
+                writer.writerow(
+                    [self._cell_text(heading).replace("\n", " ") for heading in headings]
+                    )
+                for row in rows:
+                    writer.writerow([self._cell_text(value) for value in row])
+
+        self.paths.append(path)
+
+
+    def close(self):
+        """
+        Nothing to close, as each CSV file is written by `emit_sheet`.
+        """
+        return None
+
+
+    def discard(self):
+        """
+        Remove the CSV files written so far, so that an incomplete set of
+        tables is not left in the directory.
+        """
+        for path in self.paths:
+            path.unlink(missing_ok=True)
+        self.paths = []
+
+
+    @classmethod
+    def _cell_text(cls, value):
+        """
+        Get the plain text of a prepared cell. Links are written as their
+        display text, and rich text without formatting.
+        """
+        if isinstance(value, list):
+            return "\n".join(str(cls._cell_text(element)) for element in value)
+        if isinstance(value, dict):
+            return list(value)[0]
+        if isinstance(value, FormatList):
+            return value.string
+        if not isinstance(value, str) and pd.isna(value):
+            return ""
+
+        return value
+
+
+EMITTERS = {
+    "xlsx": XlsxEmitter,
+    "csv": CsvEmitter,
+    "ods": OdsEmitter,
+    }
@@ -1,6 +1,61 @@
+import numpy as np
 import pandas as pd
 import re
+from collections.abc import Mapping
+from copy import copy, deepcopy
+from functools import lru_cache
 from xlsxwriter.format import Format
+from xlsxwriter.utility import xl_col_to_name
+
+from .sources import read_columns, read_cursor, read_feather, read_parquet
+
+
+# Columns with up to this many rows are profiled and measured cell by cell, as
+# array operations cost more than they save for short columns
+_SHORT_COLUMN_ROWS = 1000
+
+# Patterns used to profile text, shared by the array and cell by cell paths
+_WHITESPACE_PATTERN = r"\s*"  # matched against whole strings
+_SHORTHAND_PATTERN = r"\[[\w\s]+\]"
+_LINK_PATTERN = r"\[.+\]\(.+\)"
+_SPECIAL_PATTERN = "^[^a-zA-Z0-9]*$"
+_REFERENCE_MARKER = "$$"
+
+_is_str = np.frompyfunc(lambda value: isinstance(value, str), 1, 1)
+_is_list_or_dict = np.frompyfunc(lambda value: isinstance(value, (list, dict)), 1, 1)
+
+# Characters that Excel does not allow in worksheet names
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+def _validate_sheet_label(label, column):
+    """
+    Check that a partition label, made from a value of `column`, can be used
+    as an Excel worksheet name.
+    """
+    if not label or len(label) > 31:
+        msg = (f"`{column}` value '{label}' cannot be used as a worksheet"
+               " label, which must be from 1 to 31 characters")
+        raise ValueError(msg)
+    if _INVALID_SHEET_CHARS.search(label):
+        msg = (f"`{column}` value '{label}' cannot be used as a worksheet"
+               " label, which must not contain any of []:*?/\\")
+        raise ValueError(msg)
+
+
+@lru_cache(maxsize=None)
+def _get_valid_format_labels():
+    """
+    Get the valid XlsxWriter Format attributes, found once per process.
+    """
+    format = Format()
+    return tuple(
+        attr.replace("set_", "")
+        for attr in format.__dir__()
+        if attr.startswith('set_')
+        and callable(getattr(format, attr))
+        )
+
 
 class GPTable:
     """
@@ -14,7 +69,9 @@ class GPTable:
     Attributes
     ----------
     table : pandas.DataFrame
-        table to be written to an Excel workbook
+        table to be written to an Excel workbook. A mapping of column name to
+        a NumPy array or list of values can be given instead, and is stored
+        as a DataFrame without copying the arrays.
     table_name : str
         name for table. Should be unique with no spaces and always begin with a 
         letter, an underscore character, or a backslash. Use letters, numbers, 
@@ -37,11 +94,28 @@ class GPTable:
         descriptions of special notation used in table
     index_columns : dict, optional
         mapping an index level to a 0-indexed column as {level: column}.
-        Default is a level two index in the first column ({2: 0}).
+        Default is a level two index in the first column ({2: 0}). For a
+        table with a MultiIndex or named index, the default maps index levels
+        1-3 to the index levels, which become the first columns of `table`.
     additional_formatting : dict, optional
-        table-specific formatting for columns, rows or individual cells
+        table-specific formatting for columns, rows or individual cells, or
+        conditional formatting of table rows
     """
 
+    # Attributes that are scanned for note references by `_set_annotations`
+    _ANNOTATED_ATTRS = {
+        "title",
+        "subtitles",
+        "instructions",
+        "scope",
+        "source",
+        "legend",
+        "units",
+        "table_notes",
+        "table",
+        "index_columns",
+        }
+
     def __init__(self,
                  table,
                  table_name,
@@ -53,7 +127,7 @@ class GPTable:
                  subtitles=[],
                  instructions="",
                  legend=[],
-                 index_columns={2:0},
+                 index_columns=None,
                  additional_formatting=[],
                  ):
         
@@ -71,27 +145,32 @@ class GPTable:
         self.table = pd.DataFrame()
         self.table_name = None
         self.data_range = [0] * 4
+        self._rows = None  # positions of `table` rows written, if not all
+        self._column_analysis = None  # shared by parts, see `partition_by`
+        self._table_prepared = False  # set on copies of prepared parts
+        self._column_profile = None  # see `_get_column_profile`
         
         self.scope = None
         self.source = None
         self.legend = []
         self._annotations = []
+        self._annotations_key = None  # description_order of cached `_annotations`
         
         self.additional_formatting = []
+        self._compiled_formatting = None  # see `set_additional_formatting`
         
         # Valid format labels from XlsxWriter
-        self._valid_format_labels = [
-                attr.replace("set_", "")
-                for attr in Format().__dir__() 
-                if attr.startswith('set_')
-                and callable(getattr(Format(), attr))
-                ]
+        self._valid_format_labels = _get_valid_format_labels()
         
         # Call methods to set attributes        
         self.set_title(title)
         self.set_subtitles(subtitles)
         self.set_instructions(instructions)
         self.set_additional_formatting(additional_formatting)
+        if index_columns is None:
+            # Level two index in the first column, unless `set_table` finds
+            # index levels in the index of `table`
+            self.index_columns = {2: 0}
         self.set_table(table, index_columns, units, table_notes)
         self.set_table_name(table_name)
         self.set_scope(scope)
@@ -100,23 +179,197 @@ class GPTable:
         self._set_data_range()
         
 
+    def __setattr__(self, name, value):
+        """
+        Invalidate cached note references when an annotated attribute is set.
+        """
+        if name in self._ANNOTATED_ATTRS:
+            self.__dict__["_annotations_key"] = None
+        super().__setattr__(name, value)
+
+
+    @classmethod
+    def from_cursor(cls, cursor, table_name, title, batch_size=10000, **kwargs):
+        """
+        Create a GPTable from the result set of an executed DB-API cursor,
+        such as one from the standard library's `sqlite3`.
+
+        Rows are fetched in batches with `fetchmany`, and each batch is
+        converted to typed column arrays before the next is fetched. The
+        whole result set is read into memory, as the table of a GPTable.
+        Column dtypes are inferred from the first batch.
+
+        Parameters
+        ----------
+        cursor : DB-API cursor
+            cursor that a query has been executed on
+        table_name : str
+            name for the table, as for `GPTable`
+        title : str
+            title of the table
+        batch_size : int, optional
+            number of rows to fetch with each call to `fetchmany`
+        **kwargs
+            other `GPTable` arguments, such as `index_columns` and `units`
+
+        Returns
+        -------
+        gptables.GPTable
+        """
+        table = read_cursor(cursor, batch_size)
+        return cls(table=table, table_name=table_name, title=title, **kwargs)
+
+
+    @classmethod
+    def from_query(cls, query, connection, table_name, title, params=None,
+                   batch_size=10000, **kwargs):
+        """
+        Create a GPTable from the result of a SQL query, run on a DB-API
+        connection. The query is run on a new cursor, which is read as for
+        `from_cursor` and then closed.
+
+        Parameters
+        ----------
+        query : str
+            SQL query to run
+        connection : DB-API connection
+            connection to run the query on
+        table_name : str
+            name for the table, as for `GPTable`
+        title : str
+            title of the table
+        params : sequence or dict, optional
+            parameters of the query, in the connection's parameter style
+        batch_size : int, optional
+            number of rows to fetch with each call to `fetchmany`
+        **kwargs
+            other `GPTable` arguments, such as `index_columns` and `units`
+
+        Returns
+        -------
+        gptables.GPTable
+        """
+        cursor = connection.cursor()
+        try:
+            if params is None:
+                cursor.execute(query)
+            else:
+                cursor.execute(query, params)
+            table = read_cursor(cursor, batch_size)
+        finally:
+            cursor.close()
+
+        return cls(table=table, table_name=table_name, title=title, **kwargs)
+
+
+    @classmethod
+    def from_parquet(cls, path, table_name, title, columns=None, **kwargs):
+        """
+        Create a GPTable from a Parquet file. Requires pyarrow.
+
+        The file is memory-mapped and only the `columns` requested are read,
+        in full. String columns have the ``string[pyarrow]`` dtype, so are
+        not converted to Python objects.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            path to the Parquet file
+        table_name : str
+            name for the table, as for `GPTable`
+        title : str
+            title of the table
+        columns : list of str, optional
+            names of the columns to read, in order. Defaults to all columns.
+        **kwargs
+            other `GPTable` arguments, such as `index_columns` and `units`
+
+        Returns
+        -------
+        gptables.GPTable
+        """
+        table = read_parquet(path, columns)
+        return cls(table=table, table_name=table_name, title=title, **kwargs)
+
+
+    @classmethod
+    def from_feather(cls, path, table_name, title, columns=None, **kwargs):
+        """
+        Create a GPTable from a Feather (Arrow IPC) file. Requires pyarrow.
+
+        The file is memory-mapped and only the `columns` requested are read.
+        Columns of uncompressed files are read without copying. String
+        columns have the ``string[pyarrow]`` dtype, so are not converted to
+        Python objects.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            path to the Feather file
+        table_name : str
+            name for the table, as for `GPTable`
+        title : str
+            title of the table
+        columns : list of str, optional
+            names of the columns to read, in order. Defaults to all columns.
+        **kwargs
+            other `GPTable` arguments, such as `index_columns` and `units`
+
+        Returns
+        -------
+        gptables.GPTable
+        """
+        table = read_feather(path, columns)
+        return cls(table=table, table_name=table_name, title=title, **kwargs)
+
+
     def set_table(self, new_table, new_index_columns = None, new_units = None, new_table_notes = None):
         """
         Set the `table`, `index_columns`, `units` and `table_notes` attributes. Overwrites
         existing values for these attributes.
+        `new_table` can be a mapping of column name to column values, which is
+        stored as a DataFrame without copying NumPy arrays.
+        If `new_table` has a MultiIndex, named index or non-integer index, its
+        levels become the first columns of `table`. By default,
+        `index_columns` maps index levels 1-3 to them in order. If
+        `new_index_columns` is given, it must map index levels to exactly
+        these columns, by name or position.
         """
-        if not isinstance(new_table, pd.DataFrame):
-            raise TypeError("`table` must be a pandas DataFrame")
-        
-        default_index = pd.Index(range(new_table.shape[0]))
-        if not all(new_table.index == default_index) and not new_table.empty:
-            msg = ("`table` index must not contain index data. It can be reset"
-                   " before adding to a GPTable (see DataFrame.reset_index())."
-                   " Please ensure that index data is stored in the first 1-3"
-                   " columns of `table` and is indicated in `index_columns`.")
-            raise ValueError(msg)
+        if isinstance(new_table, Mapping):
+            # Columns are used as given, so no index check or copy is needed
+            self.table = read_columns(new_table)
+
+        elif isinstance(new_table, pd.DataFrame) and self._has_index_data(new_table.index):
+            # Index levels become the first columns, without copying the table
+            self.table = self._index_levels_to_columns(new_table)
+            index_level_columns = list(range(new_table.index.nlevels))
+            if new_index_columns is None:
+                new_index_columns = {
+                    column + 1: column for column in index_level_columns
+                    }
+            else:
+                self._validate_index_level_columns(new_index_columns, index_level_columns)
+
+        elif isinstance(new_table, pd.DataFrame):
+            default_index = pd.Index(range(new_table.shape[0]))
+            if not all(new_table.index == default_index) and not new_table.empty:
+                msg = ("`table` index must not contain row numbers. It can be reset"
+                       " before adding to a GPTable (see DataFrame.reset_index())."
+                       " Please ensure that index data is stored in the first 1-3"
+                       " columns of `table` and is indicated in `index_columns`,"
+                       " or in a named index.")
+                raise ValueError(msg)
+
+            self.table = new_table.reset_index(drop=True)
 
-        self.table = new_table.reset_index(drop=True)
+        else:
+            msg = ("`table` must be a pandas DataFrame, or a mapping of column"
+                   " name to an array or list of values")
+            raise TypeError(msg)
+
+        self._rows = None
+        self._column_analysis = None
+        self._column_profile = None
 
         self._validate_all_column_names_have_text()
         self._validate_no_duplicate_column_names()
@@ -134,6 +387,77 @@ class GPTable:
         self.set_table_notes(new_table_notes)
 
 
+    @staticmethod
+    def _has_index_data(index):
+        """
+        Check whether the index of a table contains data to be written as
+        index columns, rather than row numbers.
+        """
+        if len(index) == 0:
+            return False
+
+        return (
+            isinstance(index, pd.MultiIndex)
+            or index.name is not None
+            or not pd.api.types.is_integer_dtype(index.dtype)
+            )
+
+
+    def _validate_index_level_columns(self, index_columns, index_level_columns):
+        """
+        Check that `index_columns` given for a table with index levels maps
+        to exactly the columns made from the index levels.
+        """
+        names = self.table.columns
+        given_columns = sorted(
+            col if isinstance(col, int) else names.get_loc(col)
+            for col in index_columns.values()
+            if isinstance(col, int) or col in names
+            )
+        if given_columns != index_level_columns or len(index_columns) != len(given_columns):
+            level_names = names[index_level_columns].tolist()
+            msg = (f"`index_columns` {index_columns} does not match the index"
+                   f" levels of `table`, which become the columns {level_names}."
+                   " Please map index levels to these columns, or leave"
+                   " `index_columns` unset to map them in order.")
+            raise ValueError(msg)
+
+
+    @staticmethod
+    def _index_levels_to_columns(table):
+        """
+        Get a table with the levels of its index as its first columns, named
+        as by `DataFrame.reset_index`, and a default index. The columns of
+        `table` are not copied. MultiIndex levels are read as categoricals
+        from their codes and labels, so each label is profiled once.
+        """
+        index = table.index
+        if index.nlevels > 3:
+            msg = (f"`table` index has {index.nlevels} levels, but a GPTable"
+                   " can have at most 3 index columns")
+            raise ValueError(msg)
+
+        if isinstance(index, pd.MultiIndex):
+            names = [
+                f"level_{n}" if name is None else name
+                for n, name in enumerate(index.names)
+                ]
+            levels = [
+                pd.Categorical.from_codes(codes, categories=level)
+                for codes, level in zip(index.codes, index.levels)
+                ]
+        else:
+            names = ["index" if index.name is None else index.name]
+            levels = [index.array]
+
+        index_table = pd.DataFrame(dict(enumerate(levels)), copy=False)
+        index_table.columns = names
+        data_table = table.copy(deep=False)
+        data_table.index = index_table.index
+
+        return pd.concat([index_table, data_table], axis=1, copy=False)
+
+
     def set_index_columns(self, new_index_columns):
         """
         Set the `index_columns` attribute. Overwrites any existing values.
@@ -251,6 +575,7 @@ class GPTable:
             new_subtitle = FormatList(new_subtitle)
 
         self.subtitles.append(new_subtitle)
+        self._annotations_key = None
 
 
     def set_subtitles(self, new_subtitles, overwrite=True):
@@ -333,7 +658,7 @@ class GPTable:
             new_headers_values = [f"{key}\n({value})" for key, value in zip(new_headers_keys, new_units.values())]
             new_headers = dict(zip(new_headers_keys, new_headers_values))
 
-            self.table = self.table.rename(columns = new_headers)
+            self.table = self.table.rename(columns = new_headers, copy = False)
 
             if len(self.additional_formatting) > 0:
                 self._update_column_names_in_additional_formatting(new_headers)
@@ -364,7 +689,19 @@ class GPTable:
                 # new_name if name==old_name else name for name in col_names
                 format["columns"] = [col_names[name] if name in list(col_names.keys()) else name for name in format["columns"]]
 
-        self.additional_formatting = formatting_list
+            elif list(dictionary.keys()) == ["conditional"]:
+                format = dictionary["conditional"]
+                if "columns" in format:
+                    columns = format["columns"]
+                    columns = columns if isinstance(columns, list) else [columns]
+                    format["columns"] = [col_names.get(name, name) for name in columns]
+                if "equals" in format:
+                    format["equals"] = {
+                        col_names.get(name, name): value
+                        for name, value in format["equals"].items()
+                        }
+
+        self.set_additional_formatting(formatting_list)
 
     def set_table_notes(self, new_table_notes): # TODO: custom formatting in column headers?
         """
@@ -391,7 +728,7 @@ class GPTable:
             new_headers_values = [f"{key}\n{value}" for key, value in zip(new_headers_keys, new_table_notes.values())]
             new_headers = dict(zip(new_headers_keys, new_headers_values))
 
-            self.table = self.table.rename(columns = new_headers)
+            self.table = self.table.rename(columns = new_headers, copy = False)
 
             if len(self.additional_formatting) > 0:
                 self._update_column_names_in_additional_formatting(new_headers)
@@ -430,6 +767,7 @@ class GPTable:
             new_legend = FormatList(new_legend)
 
         self.legend.append(new_legend)
+        self._annotations_key = None
     
 
     def set_legend(self, new_legend, overwrite=True):
@@ -457,7 +795,15 @@ class GPTable:
     def _set_annotations(self, description_order):
         """
         Set a list of note references to the `_annotations` attribute.
+
+        References are cached, so elements are only rescanned if an annotated
+        attribute has been set or `description_order` has changed since the
+        last scan. Modifying attributes in place (e.g. editing `table`
+        directly) is not detected - use the `set_` methods instead.
         """
+        if self._annotations_key == tuple(description_order):
+            return
+
         elements = [
                 "title",
                 "subtitles",
@@ -479,6 +825,7 @@ class GPTable:
 
         # remove duplicates from ordered_refs and assign to self._annotations
         self._annotations = list(dict.fromkeys(ordered_refs))
+        self._annotations_key = tuple(description_order)
 
 
     def _get_references_from_attr(self, data):
@@ -524,15 +871,282 @@ class GPTable:
         column_references = self._get_references_from_attr(table.columns.to_list())
         ordered_refs.extend(column_references)
 
+        # Only scan rows that may contain references
+        reference_rows = self._get_reference_rows()
+        if self._rows is None:
+            rows = np.flatnonzero(reference_rows)
+        else:
+            rows = self._rows[reference_rows[self._rows]]
+
         index_columns = self.index_columns.values()
         for col in index_columns:
-            index_column = table.iloc[:, col]
+            index_column = table.iloc[rows, col]
             index_column_references = self._get_references_from_attr(index_column.to_list())
             ordered_refs.extend(index_column_references)
 
         return ordered_refs
 
 
+    def _get_reference_rows(self):
+        """
+        Get a boolean array marking the rows of `table` with index column
+        cells that may contain note references. The array is shared by parts
+        of this GPTable.
+        """
+        analysis = self._get_column_analysis()
+        if "reference_rows" not in analysis:
+            column_profile = self._get_column_profile()["columns"]
+            reference_rows = np.zeros(self.table.shape[0], dtype=bool)
+            for col in self.index_columns.values():
+                reference_rows[column_profile[col]["references"]] = True
+            analysis["reference_rows"] = reference_rows
+
+        return analysis["reference_rows"]
+
+
+    def _get_column_profile(self):
+        """
+        Get a profile of each column of `table`, shared by the stages that
+        prepare the table for writing, so that each column is scanned once.
+
+        The profile is cached, keyed by a fingerprint of `table`, so it is
+        made again if the table is modified.
+
+        Returns
+        -------
+        dict
+            ``fingerprint`` of the table, and ``columns``, a list with a
+            dictionary for each column. This has the column's ``dtype``, and
+            the positions of its ``nulls``, ``whitespace`` only strings,
+            strings containing ``shorthand`` (such as ``[x]``), cells
+            containing only ``special`` characters, cells that may contain
+            markdown ``links`` and cells that may contain note
+            ``references``.
+        """
+        fingerprint = self._get_table_fingerprint()
+        profile = self._column_profile
+        if profile is None or profile["fingerprint"] != fingerprint:
+            profile = {
+                "fingerprint": fingerprint,
+                "columns": [
+                    self._profile_column(column)
+                    for _, column in self.table.items()
+                    ],
+                }
+            self._column_profile = profile
+
+        return profile
+
+
+    def _get_table_fingerprint(self):
+        """
+        Get a fingerprint of the column names, dtypes and values of `table`.
+        Columns of unhashable values, such as lists, are hashed as strings.
+        """
+        try:
+            # Hash all columns at once where possible
+            table_hash = pd.util.hash_pandas_object(self.table, index=False)
+            column_hashes = [table_hash.to_numpy().tobytes()]
+        except TypeError:
+            column_hashes = []
+            for _, column in self.table.items():
+                try:
+                    column_hash = pd.util.hash_pandas_object(column, index=False)
+                except TypeError:
+                    column_hash = pd.util.hash_pandas_object(column.astype(str), index=False)
+                column_hashes.append(column_hash.to_numpy().tobytes())
+
+        return (
+            tuple(self.table.columns),
+            tuple(str(dtype) for dtype in self.table.dtypes),
+            hash(b"".join(column_hashes)),
+            )
+
+
+    @staticmethod
+    def _profile_column(column):
+        """
+        Profile a single column of `table`, as for `_get_column_profile`.
+        """
+        if isinstance(column.dtype, pd.SparseDtype):
+            return GPTable._profile_sparse_column(column)
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            return GPTable._profile_categorical_column(column)
+        if isinstance(column.dtype, pd.StringDtype):
+            return GPTable._profile_string_column(column)
+
+        no_rows = np.array([], dtype=np.intp)
+        profile = {
+            "dtype": column.dtype,
+            "nulls": np.flatnonzero(column.isna().to_numpy()),
+            }
+
+        dtype = column.dtype
+        if (pd.api.types.is_bool_dtype(dtype)
+                or pd.api.types.is_numeric_dtype(dtype)
+                or pd.api.types.is_datetime64_any_dtype(dtype)
+                or pd.api.types.is_timedelta64_dtype(dtype)):
+            # Numbers, booleans and dates contain no text
+            for key in ["whitespace", "shorthand", "special", "links", "references"]:
+                profile[key] = no_rows
+            return profile
+
+        values = column.to_numpy(dtype=object)
+        if len(values) <= _SHORT_COLUMN_ROWS and pd.api.types.is_object_dtype(dtype):
+            profile.update(GPTable._profile_short_column(values))
+            return profile
+
+        string_rows = np.flatnonzero(_is_str(values).astype(bool))
+        strings = pd.Series(values[string_rows], dtype=object)
+
+        profile["whitespace"] = string_rows[strings.str.fullmatch(_WHITESPACE_PATTERN).to_numpy(dtype=bool)]
+        profile["shorthand"] = string_rows[
+            strings.str.contains(_SHORTHAND_PATTERN).to_numpy(dtype=bool)
+            ]
+
+        # Links are only parsed in object and string columns, and may also
+        # be in lists and dicts
+        profile["links"] = no_rows
+        if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            profile["links"] = np.union1d(
+                string_rows[strings.str.contains(_LINK_PATTERN).to_numpy(dtype=bool)],
+                np.flatnonzero(_is_list_or_dict(values).astype(bool))
+                )
+
+        special = (column
+            .astype("string")
+            .str.contains(_SPECIAL_PATTERN)
+            .fillna(False)
+            .to_numpy(dtype=bool)
+            )
+        profile["special"] = np.setdiff1d(np.flatnonzero(special), profile["whitespace"])
+        profile["references"] = np.flatnonzero(
+            column.astype(str).str.contains(_REFERENCE_MARKER, regex=False).to_numpy(dtype=bool)
+            )
+
+        return profile
+
+
+    @staticmethod
+    def _profile_sparse_column(column):
+        """
+        Profile a sparse column from its stored values, and its fill value
+        once, rather than from every cell.
+        """
+        array = column.array
+        stored_rows = array.sp_index.indices
+        stored = GPTable._profile_column(pd.Series(array.sp_values, dtype=array.sp_values.dtype))
+
+        fill_rows = np.array([], dtype=np.intp)
+        fill = None
+        if array.sp_index.ngaps > 0:
+            is_fill = np.ones(len(array), dtype=bool)
+            is_fill[stored_rows] = False
+            fill_rows = np.flatnonzero(is_fill)
+            fill = GPTable._profile_column(pd.Series([array.fill_value], dtype=object))
+
+        profile = {"dtype": column.dtype}
+        for key, rows in stored.items():
+            if key == "dtype":
+                continue
+            rows = stored_rows[rows]
+            if fill is not None and len(fill[key]) > 0:
+                rows = np.union1d(rows, fill_rows)
+            profile[key] = rows
+
+        return profile
+
+
+    @staticmethod
+    def _profile_categorical_column(column):
+        """
+        Profile a categorical column from its categories, so that each
+        category is profiled once however many cells contain it.
+        """
+        categories = column.cat.categories
+        category_profile = GPTable._profile_column(pd.Series(categories, dtype=categories.dtype))
+
+        return GPTable._map_value_profile(
+            category_profile,
+            len(categories),
+            column.cat.codes.to_numpy(),
+            column.dtype
+            )
+
+
+    @staticmethod
+    def _profile_string_column(column):
+        """
+        Profile a column of pandas string dtype from its distinct values.
+        Strings are factorized without converting the column to objects,
+        which for ``string[pyarrow]`` columns keeps them in Arrow memory.
+        """
+        codes, strings = pd.factorize(column)
+        string_profile = GPTable._profile_column(
+            pd.Series(strings.to_numpy(dtype=object), dtype=object)
+            )
+
+        return GPTable._map_value_profile(string_profile, len(strings), codes, column.dtype)
+
+
+    @staticmethod
+    def _map_value_profile(value_profile, value_count, codes, dtype):
+        """
+        Map the profile of the distinct values of a column to its rows, given
+        the position of each row's value. Missing values have code -1.
+        """
+        profile = {"dtype": dtype}
+        for key, rows in value_profile.items():
+            if key == "dtype":
+                continue
+            # Code -1 selects the last flag
+            flags = np.zeros(value_count + 1, dtype=bool)
+            flags[rows] = True
+            if key == "nulls":
+                flags[-1] = True
+            profile[key] = np.flatnonzero(flags[codes])
+
+        return profile
+
+
+    @staticmethod
+    def _profile_short_column(values):
+        """
+        Profile the text of a short object column cell by cell, finding the
+        same positions as `_profile_column` with the same patterns.
+        """
+        rows = {
+            key: []
+            for key in ["whitespace", "shorthand", "special", "links", "references"]
+            }
+        for row, value in enumerate(values):
+            if isinstance(value, str):
+                text = value
+                if re.fullmatch(_WHITESPACE_PATTERN, value):
+                    rows["whitespace"].append(row)
+                if re.search(_SHORTHAND_PATTERN, value):
+                    rows["shorthand"].append(row)
+                if re.search(_LINK_PATTERN, value):
+                    rows["links"].append(row)
+            elif isinstance(value, (list, dict)):
+                text = str(value)
+                rows["links"].append(row)
+            elif value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+                text = None
+            else:
+                text = str(value)
+
+            if text is None:
+                continue
+            if (re.search(_SPECIAL_PATTERN, text)
+                    and not (rows["whitespace"] and rows["whitespace"][-1] == row)):
+                rows["special"].append(row)
+            if _REFERENCE_MARKER in text:
+                rows["references"].append(row)
+
+        return {key: np.array(positions, dtype=np.intp) for key, positions in rows.items()}
+
+
     @staticmethod
     def _get_references(string):
         """
@@ -560,22 +1174,49 @@ class GPTable:
     def set_additional_formatting(self, new_formatting):
         """
         Set a dictionary of additional formatting to be applied to this table.
+
+        The formatting is compiled to row and column positions and distinct
+        format dictionaries, which are applied when the table is written.
         """
         if not isinstance(new_formatting, list):
             msg = ("`additional_formatting` must be a list of dictionaries")
             raise TypeError(msg)
         keys = [key for item in new_formatting for key in item.keys()]
         for key in keys:
-            if key not in ["column", "row", "cell"]:
+            if key not in ["column", "row", "cell", "conditional"]:
                 msg = (f"`{key}` is not a supported format type. Please use"
-                       " `column`, `row` or `cell`")
+                       " `column`, `row`, `cell` or `conditional`")
                 raise ValueError(msg)
         
         self._validate_format_labels(new_formatting)
+        self._validate_conditional_formatting(new_formatting)
             
         self.additional_formatting = new_formatting
+        self._compiled_formatting = CompiledFormatting(new_formatting)
     
 
+    @staticmethod
+    def _validate_conditional_formatting(format_list):
+        """
+        Validate that conditional formatting has exactly one condition.
+        """
+        conditions = ["banded", "equals", "formula"]
+        for item in format_list:
+            if "conditional" not in item:
+                continue
+            format_desc = item["conditional"]
+            given = [condition for condition in conditions if condition in format_desc]
+            if len(given) != 1:
+                msg = ("`conditional` formatting must include one of"
+                       f" {conditions}, not {given}")
+                raise ValueError(msg)
+            equals = format_desc.get("equals", {0: None})
+            if not isinstance(equals, dict) or len(equals) != 1:
+                msg = ("`equals` must be a dictionary of one column and value"
+                       " ({column: value})")
+                raise ValueError(msg)
+
+
     def _validate_format_labels(self, format_list):
         """
         Validate that format labels are valid property of XlsxWriter Format.
@@ -607,13 +1248,284 @@ class GPTable:
         if self.legend is not None:
             row_offset += len(self.legend)
         
+        rows = self.table.shape[0]
+        if self._rows is not None:
+            rows = len(self._rows)
+
         self.data_range = [
             row_offset,
             0,
-            self.table.shape[0] + row_offset,
+            rows + row_offset,
             self.table.shape[1] - 1
         ]
 
+    def partition_by(self, column):
+        """
+        Partition this GPTable into one GPTable per distinct value of
+        `column`, for writing to separate worksheets.
+
+        Groups are found in a single pass over the table. Partitions share
+        this GPTable's `table`; only the rows of a partition are copied when
+        it is written. Links, note references and validation are applied to
+        the whole table once, when the first partition is written, and column
+        alignments and widths are calculated from the whole table, so they
+        are consistent across the partitions.
+
+        A subtitle naming the value of `column` is added to each partition,
+        and `table_name` is numbered. Row and cell `additional_formatting` is
+        moved to the partition containing those rows.
+
+        Parameters
+        ----------
+        column : str or int
+            name or 0-indexed number of the column to partition by
+
+        Returns
+        -------
+        dict
+            mapping each value of `column`, as a string, to a
+            gptables.GPTable. Values are sorted, so the dictionary can be
+            passed as `sheets` to the API functions to write one sheet per
+            value.
+
+        Raises
+        ------
+        ValueError
+            if `column` contains missing values, or if the string of a value
+            is not a valid worksheet label: an Excel sheet name is at most 31
+            characters, must not contain any of ``[]:*?/\\`` and must be
+            unique, ignoring case. For example, the values ``1`` and ``"1"``
+            cannot be used to partition the same table.
+        """
+        column = self._get_column_name(column)
+        positions = self._row_positions()
+
+        table = self.table
+        if self._rows is not None:
+            table = table.iloc[self._rows]
+
+        if table[column].isna().any():
+            msg = (f"`{column}` contains missing values, which cannot be used"
+                   " to label partitions. Please replace missing values before"
+                   " partitioning the table.")
+            raise ValueError(msg)
+
+        groups = table.groupby(column, sort=True, observed=True).indices
+
+        values = {}
+        for value in groups:
+            label = str(value)
+            _validate_sheet_label(label, column)
+            if label.lower() in values:
+                other = values[label.lower()]
+                msg = (f"`{column}` values {other!r} and {value!r} give the"
+                       f" worksheet labels '{other}' and '{label}', which"
+                       " Excel treats as the same sheet name")
+                raise ValueError(msg)
+            values[label.lower()] = value
+
+        heading = column.split("\n")[0]
+        analysis = self._get_column_analysis()
+        partitions = {}
+        for n, (value, rows) in enumerate(groups.items()):
+            part = copy(self)
+            part._rows = positions[rows]
+            part._column_analysis = analysis
+            part.table_name = f"{self.table_name}_{n + 1}"
+            part.subtitles = [*self.subtitles, f"{heading}: {value}"]
+            part.set_additional_formatting(self._slice_additional_formatting(rows))
+            part._set_data_range()
+            partitions[str(value)] = part
+
+        return partitions
+
+
+    def _get_column_name(self, column):
+        """
+        Get the name of a column of `table` from its name, its name without
+        units or notes, or its 0-indexed number.
+        """
+        headers = self.table.columns.tolist()
+        if isinstance(column, int) and self._valid_column_index(column):
+            return headers[column]
+        if column in headers:
+            return column
+
+        unmodified_headers = [header.split("\n")[0] for header in headers]
+        if column in unmodified_headers:
+            return headers[unmodified_headers.index(column)]
+
+        raise ValueError(f"`{column}` is not a column of {self.table_name}")
+
+
+    def _get_column_analysis(self):
+        """
+        Get the column analysis shared by parts of this GPTable. For a
+        GPTable that is not a part, a new, empty analysis is returned on each
+        call, as its table may be modified between writes; it is only kept
+        when shared with the parts made by `partition_by` or `_split_rows`.
+        """
+        if self._column_analysis is None:
+            return {}
+        return self._column_analysis
+
+
+    def _row_positions(self):
+        """
+        Get the positions of the `table` rows written for this GPTable.
+        """
+        if self._rows is None:
+            return np.arange(self.table.shape[0])
+        return self._rows
+
+
+    def _split_rows(self, max_rows):
+        """
+        Split this GPTable into parts that each fit within `max_rows`
+        worksheet rows, including the title block and column headings.
+
+        Parts share this GPTable's `table`; only the rows of a part are
+        copied when it is written. A subtitle describing the rows in each part
+        is added, and `table_name` is numbered for all but the first part.
+        Row and cell `additional_formatting` is moved to the part containing
+        those rows.
+
+        Parameters
+        ----------
+        max_rows : int
+            maximum number of worksheet rows
+
+        Returns
+        -------
+        List[gptables.GPTable]
+            this GPTable if it fits, otherwise a list of parts
+        """
+        self._set_data_range()
+        # Each part has an additional subtitle and one header row
+        rows_per_part = max_rows - (self.data_range[0] + 1) - 1
+        positions = self._row_positions()
+        total_rows = len(positions)
+
+        if total_rows + self.data_range[0] + 1 <= max_rows:
+            return [self]
+
+        if rows_per_part < 1:
+            msg = (f"The title block of {self.table_name} leaves no rows for"
+                   " table data within the Excel row limit")
+            raise ValueError(msg)
+
+        starts = range(0, total_rows, rows_per_part)
+        analysis = self._get_column_analysis()
+        parts = []
+        for n, start in enumerate(starts):
+            stop = min(start + rows_per_part, total_rows)
+
+            part = copy(self)
+            part._rows = positions[start:stop]
+            part._column_analysis = analysis
+            if n > 0:
+                part.table_name = f"{self.table_name}_{n + 1}"
+            part.subtitles = [
+                *self.subtitles,
+                f"Part {n + 1} of {len(starts)}: rows {start + 1} to {stop}"
+                f" of {total_rows}"
+                ]
+            part.set_additional_formatting(
+                self._slice_additional_formatting(np.arange(start, stop))
+                )
+            part._set_data_range()
+            parts.append(part)
+
+        return parts
+
+
+    def _slice_additional_formatting(self, rows):
+        """
+        Get `additional_formatting` for a subset of table rows, with row
+        numbers relative to those rows. Row 0 is the column headings row, so
+        is kept in every part.
+
+        Parameters
+        ----------
+        rows : numpy.ndarray
+            sorted, 0-indexed positions of the table rows written for this
+            GPTable that are in the part
+        """
+        total_rows = len(self._row_positions()) + 1  # Including column headings
+
+        def part_row(row):
+            if row < 0:
+                row += total_rows
+            if row == 0:
+                return 0
+            n = np.searchsorted(rows, row - 1)
+            if n < len(rows) and rows[n] == row - 1:
+                return int(n) + 1
+            return None
+
+        formatting = []
+        for item in deepcopy(self.additional_formatting):
+            fmt_type = list(item.keys())[0]
+            format_desc = item[fmt_type]
+
+            if fmt_type == "row":
+                rows_iloc = format_desc["rows"]
+                rows_iloc = [rows_iloc] if isinstance(rows_iloc, int) else rows_iloc
+                rows_iloc = [
+                    part_row(row) for row in rows_iloc
+                    if part_row(row) is not None
+                    ]
+                if len(rows_iloc) == 0:
+                    continue
+                format_desc["rows"] = rows_iloc
+
+            elif fmt_type == "cell":
+                cells = format_desc["cells"]
+                cells = [cells] if isinstance(cells, tuple) else cells
+                cells = [
+                    (part_row(row), col) for row, col in cells
+                    if part_row(row) is not None
+                    ]
+                if len(cells) == 0:
+                    continue
+                format_desc["cells"] = cells
+
+            formatting.append(item)
+
+        return formatting
+
+
+    def _copy_for_writing(self):
+        """
+        Get a deep copy of this GPTable to modify while writing. For parts
+        created by `_split_rows` or `partition_by`, only the rows of the part
+        are copied, from the prepared table in the shared column analysis if
+        it has been prepared.
+        """
+        analysis = self._column_analysis
+        memo = {} if analysis is None else {id(analysis): analysis}
+        if self._column_profile is not None:
+            # The column profile describes the table before it is modified
+            memo[id(self._column_profile)] = self._column_profile
+
+        if self._rows is None:
+            return deepcopy(self, memo)
+
+        prepared = analysis is not None and "table" in analysis
+        source = analysis["table"] if prepared else self.table
+
+        part_table = source.iloc[self._rows].reset_index(drop=True)
+        part = copy(self)
+        # Set directly, so that cached annotations are kept
+        part.__dict__["table"] = part_table
+        part.__dict__["_rows"] = None
+        part.__dict__["_table_prepared"] = prepared
+
+        # part_table is already a copy, so is not copied again
+        memo[id(part_table)] = part_table
+        return deepcopy(part, memo)
+
+
     @staticmethod
     def _validate_text(obj, attr):
         """
@@ -637,6 +1549,208 @@ class GPTable:
                    " not valid text elements.")
             raise TypeError(msg)
 
+class CompiledFormatting:
+    """
+    `additional_formatting` compiled to row and column positions, with each
+    distinct format dictionary stored once. Column names are resolved when the
+    formatting is applied, as columns may be renamed to add units or notes.
+
+    Parameters
+    ----------
+    additional_formatting : list
+        list of row, column and cell formatting dictionaries, as for
+        `GPTable.additional_formatting`
+    """
+    def __init__(self, additional_formatting):
+        self.additional_formatting = additional_formatting
+        self.formats = []  # distinct format dictionaries
+        self.rules = []  # (format type, rows, columns, include_names, format ID)
+        self.conditional = []  # conditional formatting descriptions
+
+        format_ids = {}
+        for item in additional_formatting:
+            fmt_type, format_desc = list(item.items())[0]
+
+            if fmt_type == "conditional":
+                self.conditional.append(format_desc)
+                continue
+
+            format_key = tuple(sorted(format_desc["format"].items()))
+            if format_key not in format_ids:
+                format_ids[format_key] = len(self.formats)
+                self.formats.append(dict(format_desc["format"]))
+            format_id = format_ids[format_key]
+
+            include_names = bool(format_desc.get("include_names", True))
+            rows = None
+            columns = None
+
+            # Missing selections raise an error when applied
+            if fmt_type == "column" and "columns" in format_desc:
+                columns = format_desc["columns"]
+                columns = columns if isinstance(columns, list) else [columns]
+            elif fmt_type == "row" and "rows" in format_desc:
+                rows = np.atleast_1d(np.asarray(format_desc["rows"], dtype=np.intp))
+            elif fmt_type == "cell" and "cells" in format_desc:
+                cells = format_desc["cells"]
+                cells = [cells] if isinstance(cells, tuple) else cells
+                cells = np.asarray(cells, dtype=np.intp).reshape(-1, 2)
+                rows, columns = cells[:, 0], cells[:, 1]
+
+            self.rules.append((fmt_type, rows, columns, include_names, format_id))
+
+
+    def __len__(self):
+        return len(self.rules)
+
+
+    def __eq__(self, other):
+        if not isinstance(other, CompiledFormatting):
+            return NotImplemented
+        return self.additional_formatting == other.additional_formatting
+
+
+    def get_format_ids(self, column_names, n_rows, index_levels):
+        """
+        Get the combined format of each cell of a table, as applied by the
+        rules in order.
+
+        Parameters
+        ----------
+        column_names : pandas.Index
+            column headings of the table
+        n_rows : int
+            number of rows in the table, including column headings
+        index_levels : int
+            number of index columns
+
+        Returns
+        -------
+        format_ids : numpy.ndarray
+            matrix of the combined format ID of each cell. 0 is no formatting.
+        combined_formats : list
+            format dictionary of each combined format ID
+        """
+        n_cols = len(column_names)
+        format_ids = np.zeros((n_rows, n_cols), dtype=np.intp)
+        combined_formats = [{}]
+        combined_rules = [()]
+        combined_ids = {(): 0}
+
+        for fmt_type, rows, columns, include_names, format_id in self.rules:
+            if rows is None and columns is None:
+                selection = {"column": "columns", "row": "rows", "cell": "cells"}[fmt_type]
+                raise KeyError(f"`{fmt_type}` formatting must include `{selection}`")
+
+            if fmt_type == "column":
+                first_row = 0 if include_names else 1
+                cells = np.ix_(
+                    np.arange(first_row, n_rows),
+                    self._get_column_positions(columns, column_names)
+                    )
+            elif fmt_type == "row":
+                first_col = 0 if include_names else index_levels
+                cells = np.ix_(rows, np.arange(first_col, n_cols))
+            else:
+                cells = (rows, columns)
+
+            current = format_ids[cells]
+            previous_ids, inverse = np.unique(current, return_inverse=True)
+            new_ids = []
+            for previous_id in previous_ids.tolist():
+                rule_key = combined_rules[previous_id] + (format_id,)
+                if rule_key not in combined_ids:
+                    combined_ids[rule_key] = len(combined_rules)
+                    combined_rules.append(rule_key)
+                    combined_formats.append(
+                        {**combined_formats[previous_id], **self.formats[format_id]}
+                        )
+                new_ids.append(combined_ids[rule_key])
+            format_ids[cells] = np.array(new_ids, dtype=np.intp)[inverse].reshape(current.shape)
+
+        return format_ids, combined_formats
+
+
+    def get_conditional_formats(self, column_names, first_row):
+        """
+        Get an Excel formula and the columns to format for each conditional
+        formatting item. Formulas are relative to the first row of the table
+        body, in the first formatted column.
+
+        Parameters
+        ----------
+        column_names : pandas.Index
+            column headings of the table
+        first_row : int
+            0-indexed worksheet row of the first row of the table body
+
+        Returns
+        -------
+        list
+            (formula, column positions, format dictionary) for each item
+        """
+        conditional_formats = []
+        for format_desc in self.conditional:
+            columns = format_desc.get("columns", list(range(len(column_names))))
+            columns = columns if isinstance(columns, list) else [columns]
+            positions = self._get_column_positions(columns, column_names)
+            positions = np.unique(positions % len(column_names))
+
+            if "banded" in format_desc:
+                formula = f"=MOD(ROW()-{first_row + 1},2)=0"
+            elif "equals" in format_desc:
+                column, value = list(format_desc["equals"].items())[0]
+                position = self._get_column_positions([column], column_names)[0]
+                formula = (f"=${xl_col_to_name(position % len(column_names))}"
+                           f"{first_row + 1}={self._excel_literal(value)}")
+            else:
+                formula = format_desc["formula"]
+                formula = formula if formula.startswith("=") else f"={formula}"
+
+            conditional_formats.append((formula, positions, format_desc["format"]))
+
+        return conditional_formats
+
+
+    @staticmethod
+    def _excel_literal(value):
+        """
+        Get an Excel formula literal for a string, number or boolean.
+        """
+        if isinstance(value, (bool, np.bool_)):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, str):
+            return '"' + value.replace('"', '""') + '"'
+        return str(value)
+
+
+    @staticmethod
+    def _get_column_positions(columns, column_names):
+        """
+        Get the positions of columns given by name or 0-indexed number.
+        Python and numpy integers are numbers; booleans are looked up as
+        names.
+        """
+        is_position = [
+            isinstance(col, (int, np.integer)) and not isinstance(col, (bool, np.bool_))
+            for col in columns
+            ]
+        positions = np.array(
+            [col if position else -1 for col, position in zip(columns, is_position)],
+            dtype=np.intp
+            )
+        named = [n for n, position in enumerate(is_position) if not position]
+        if named:
+            names = [columns[n] for n in named]
+            named_positions = column_names.get_indexer(names)
+            missing = [name for name, pos in zip(names, named_positions) if pos == -1]
+            if missing:
+                raise KeyError(missing)
+            positions[named] = named_positions
+
+        return positions
+
+
 class FormatList:
     """
     Class for storing list of alternating string and dictionary objects.
@@ -0,0 +1,649 @@
+import datetime
+import heapq
+import itertools
+import shutil
+import tempfile
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+
+import numpy as np
+import pandas as pd
+from xlsxwriter.utility import xl_rowcol_to_cell
+
+from .gptable import FormatList
+
+
+_MIMETYPE = "application/vnd.oasis.opendocument.spreadsheet"
+
+_NAMESPACES = (
+    'xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"'
+    ' xmlns:style="urn:oasis:names:tc:opendocument:xmlns:style:1.0"'
+    ' xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"'
+    ' xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"'
+    ' xmlns:fo="urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0"'
+    ' xmlns:xlink="http://www.w3.org/1999/xlink"'
+    ' xmlns:config="urn:oasis:names:tc:opendocument:xmlns:config:1.0"'
+    ' office:version="1.2"'
+    )
+
+_MANIFEST = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<manifest:manifest'
+    ' xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0"'
+    ' manifest:version="1.2">'
+    f'<manifest:file-entry manifest:full-path="/" manifest:version="1.2"'
+    f' manifest:media-type="{_MIMETYPE}"/>'
+    '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+    '<manifest:file-entry manifest:full-path="styles.xml" manifest:media-type="text/xml"/>'
+    '<manifest:file-entry manifest:full-path="settings.xml" manifest:media-type="text/xml"/>'
+    '</manifest:manifest>'
+    )
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    f'<office:document-styles {_NAMESPACES}>'
+    '<office:styles>'
+    '<style:default-style style:family="table-cell">'
+    '<style:text-properties fo:font-family="Arial" fo:font-size="10pt"/>'
+    '</style:default-style>'
+    '</office:styles>'
+    '</office:document-styles>'
+    )
+
+# XlsxWriter border styles that have a close ODF equivalent
+_BORDERS = {
+    1: "0.75pt solid",
+    2: "1.5pt solid",
+    3: "0.75pt dashed",
+    4: "0.75pt dotted",
+    5: "2.5pt solid",
+    6: "2.5pt double",
+    7: "0.5pt dotted",
+    }
+
+_TEXT_ALIGN = {
+    "left": "start",
+    "center": "center",
+    "centre": "center",
+    "right": "end",
+    "justify": "justify",
+    }
+
+_VERTICAL_ALIGN = {
+    "top": "top",
+    "vcenter": "middle",
+    "vcentre": "middle",
+    "bottom": "bottom",
+    }
+
+# RGB values of the colour names accepted by XlsxWriter formats
+_NAMED_COLORS = {
+    "black": "#000000",
+    "blue": "#0000FF",
+    "brown": "#800000",
+    "cyan": "#00FFFF",
+    "gray": "#808080",
+    "green": "#008000",
+    "lime": "#00FF00",
+    "magenta": "#FF00FF",
+    "navy": "#000080",
+    "orange": "#FF6600",
+    "pink": "#FF00FF",
+    "purple": "#800080",
+    "red": "#FF0000",
+    "silver": "#C0C0C0",
+    "white": "#FFFFFF",
+    "yellow": "#FFFF00",
+    }
+
+# Width, in inches, of one Excel character unit
+_INCHES_PER_CHARACTER = 7 / 96
+
+# Size of the blocks copied from the spooled body into content.xml
+_COPY_BUFFER_BYTES = 1024 * 1024
+
+
+def _ods_color(color, default=None):
+    """
+    Convert an XlsxWriter colour, a name or "#RRGGBB" string, to an ODF
+    colour. Other colours, such as "automatic", give `default`.
+    """
+    color = _NAMED_COLORS.get(color, color)
+    if isinstance(color, str) and color.startswith("#"):
+        return color
+    return default
+
+
+class OdsEmitter:
+    """
+    Writes prepared sheets to an OpenDocument spreadsheet (`.ods`) file.
+
+    Each sheet is converted to XML row by row as it is emitted, and spooled
+    to a temporary file once it exceeds `spool_bytes`. Formats are converted
+    to automatic styles, which are shared by all cells with the same format.
+    When the emitter is closed, the styles and spooled sheets are streamed
+    into `content.xml` in the zip container. Worksheet tables are written as
+    database ranges, and links to other sheets are preserved.
+
+    Number formats are not converted, so numbers are written with the
+    spreadsheet application's default format.
+
+    Parameters
+    ----------
+    filename : str, pathlib.Path or file-like
+        path or writable binary file-like object to write the spreadsheet to
+    compression_level : int, optional
+        zlib compression level, from 0 (store only) to 9
+    spool_bytes : int, optional
+        size, in bytes, of sheet XML held in memory before it is spooled to a
+        temporary file
+    """
+    def __init__(self, filename, compression_level=None, spool_bytes=16 * 1024 * 1024):
+        if isinstance(filename, Path):
+            filename = filename.as_posix()
+
+        if compression_level is None:
+            compression_level = zlib.Z_DEFAULT_COMPRESSION
+        elif compression_level not in range(10):
+            msg = ("`compression_level` must be an integer from 0 (store only)"
+                   f" to 9, not {compression_level}")
+            raise ValueError(msg)
+
+        self.filename = filename
+        self.compression_level = compression_level
+        self._body = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+        self._cell_styles = {}
+        self._text_styles = {}
+        self._column_styles = {}
+        self._row_styles = {}
+        self._database_ranges = []
+        self._gridlines = {}
+
+
+    def emit_sheet(self, sheet):
+        """
+        Convert a PreparedSheet to XML, and add it to the spooled body.
+        """
+        write = self._body.write
+
+        write(f'<table:table table:name={quoteattr(sheet.label)}>'.encode("utf-8"))
+
+        widths = {}
+        for first_col, last_col, width in sheet.columns:
+            for col in range(first_col, last_col + 1):
+                widths[col] = width
+        if widths or sheet.column_formats:
+            columns = []
+            for col in range(max(max(widths, default=-1), len(sheet.column_formats) - 1) + 1):
+                attrs = ""
+                style = self._get_column_style(widths.get(col))
+                if style is not None:
+                    attrs += f' table:style-name="{style}"'
+                if col < len(sheet.column_formats) and sheet.column_formats[col]:
+                    cell_style = self._get_cell_style(sheet.column_formats[col])
+                    attrs += f' table:default-cell-style-name="{cell_style}"'
+                columns.append(f'<table:table-column{attrs}/>')
+            write("".join(columns).encode("utf-8"))
+
+        heights = dict(sheet.rows)
+        next_row = 0
+        for row, cells in self._iter_rows(sheet):
+            if row > next_row:
+                write(self._empty_rows(row - next_row).encode("utf-8"))
+            style = self._get_row_style(heights.get(row))
+            write(self._row_xml(cells, style).encode("utf-8"))
+            next_row = row + 1
+
+        if next_row == 0:
+            write(self._empty_rows(1).encode("utf-8"))
+
+        write(b'</table:table>')
+
+        for data_range, _, _, table_name in sheet.tables:
+            self._database_ranges.append((sheet.label, data_range, table_name))
+        self._gridlines[sheet.label] = sheet.gridlines
+
+
+    def close(self):
+        """
+        Write the zip container, streaming the spooled sheets into
+        `content.xml`.
+        """
+        compression = ZIP_STORED if self.compression_level == 0 else ZIP_DEFLATED
+
+        with ZipFile(self.filename, "w", compression=compression,
+                     compresslevel=self.compression_level) as ods:
+            # The mimetype must be the first entry, and uncompressed
+            ods.writestr("mimetype", _MIMETYPE, compress_type=ZIP_STORED)
+            ods.writestr("META-INF/manifest.xml", _MANIFEST)
+            ods.writestr("styles.xml", _STYLES)
+            ods.writestr("settings.xml", self._settings_xml())
+
+            with ods.open("content.xml", "w", force_zip64=True) as content:
+                content.write(
+                    ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                     f'<office:document-content {_NAMESPACES}>'
+                     '<office:automatic-styles>').encode("utf-8")
+                    )
+                content.write(self._automatic_styles_xml().encode("utf-8"))
+                content.write(
+                    b'</office:automatic-styles><office:body><office:spreadsheet>'
+                    )
+
+                self._body.seek(0)
+                shutil.copyfileobj(self._body, content, _COPY_BUFFER_BYTES)
+
+                content.write(self._database_ranges_xml().encode("utf-8"))
+                content.write(
+                    b'</office:spreadsheet></office:body></office:document-content>'
+                    )
+
+        self._body.close()
+
+
+    def discard(self):
+        """
+        Discard the spooled sheets without writing the spreadsheet.
+        """
+        self._body.close()
+
+
+    @staticmethod
+    def _iter_rows(sheet):
+        """
+        Iterate over the rows of a PreparedSheet in order, yielding the row
+        number and a list of (col, data, format_dict) tuples for each row.
+        Single cells and rows of arrays are merged.
+        """
+        single_cells = defaultdict(list)
+        for row, col, data, format_dict in sheet.cells:
+            single_cells[row].append((col, data, format_dict))
+
+        def iter_array(pos, data, formats):
+            rows = zip(
+                data.itertuples(index=False, name=None),
+                formats.itertuples(index=False, name=None)
+                )
+            for n, (values, format_dicts) in enumerate(rows):
+                yield pos[0] + n, [
+                    (pos[1] + col, value, format_dict)
+                    for col, (value, format_dict)
+                    in enumerate(zip(values, format_dicts))
+                    ]
+
+        sources = [sorted(single_cells.items())]
+        sources.extend(iter_array(*array) for array in sheet.arrays)
+
+        merged = heapq.merge(*sources, key=lambda row_cells: row_cells[0])
+        for row, group in itertools.groupby(merged, key=lambda row_cells: row_cells[0]):
+            cells = [cell for _, row_cells in group for cell in row_cells]
+            yield row, sorted(cells, key=lambda cell: cell[0])
+
+
+    @staticmethod
+    def _empty_rows(count):
+        """
+        XML for a number of empty rows.
+        """
+        repeated = "" if count == 1 else f' table:number-rows-repeated="{count}"'
+        return f'<table:table-row{repeated}><table:table-cell/></table:table-row>'
+
+
+    def _row_xml(self, cells, style=None):
+        """
+        XML for a row of (col, data, format_dict) tuples, sorted by column,
+        with an optional automatic row style.
+        """
+        if style is None:
+            parts = ['<table:table-row>']
+        else:
+            parts = [f'<table:table-row table:style-name="{style}">']
+        next_col = 0
+        for col, data, format_dict in cells:
+            if col > next_col:
+                repeated = col - next_col
+                if repeated == 1:
+                    parts.append('<table:table-cell/>')
+                else:
+                    parts.append(
+                        f'<table:table-cell table:number-columns-repeated="{repeated}"/>'
+                        )
+            parts.append(self._cell_xml(data, format_dict))
+            next_col = col + 1
+        parts.append('</table:table-row>')
+
+        return "".join(parts)
+
+
+    def _cell_xml(self, data, format_dict):
+        """
+        XML for a single cell, mirroring `GPWorksheet._smart_write`.
+        """
+        if isinstance(data, list) and len(data) == 1:
+            data = data[0]
+
+        if isinstance(data, FormatList) and len(data.list) == 2:
+            format_dict = {**format_dict, **data.list[0]}
+            data = data.list[1]
+
+        if isinstance(data, dict):
+            format_dict = {**format_dict, "underline": True, "font_color": "blue"}
+
+        style = self._get_cell_style(format_dict)
+        attrs = f' table:style-name="{style}"' if style else ""
+
+        if isinstance(data, (list, FormatList, dict, str)):
+            paragraphs = self._paragraphs_xml(data, format_dict)
+            return (f'<table:table-cell{attrs} office:value-type="string">'
+                    f'{paragraphs}</table:table-cell>')
+
+        if isinstance(data, (bool, np.bool_)):
+            value = "true" if data else "false"
+            return (f'<table:table-cell{attrs} office:value-type="boolean"'
+                    f' office:boolean-value="{value}"><text:p>{str(bool(data)).upper()}'
+                    '</text:p></table:table-cell>')
+
+        if isinstance(data, (int, float, np.number)):
+            if np.isnan(data):
+                return f'<table:table-cell{attrs}/>'
+            if np.isinf(data):
+                # Division by zero errors, as written by XlsxWriter's
+                # `nan_inf_to_errors` option
+                formula = "of:=1/0" if data > 0 else "of:=-1/0"
+                return (f'<table:table-cell{attrs} table:formula="{formula}">'
+                        '<text:p>#DIV/0!</text:p></table:table-cell>')
+            return (f'<table:table-cell{attrs} office:value-type="float"'
+                    f' office:value="{data}"><text:p>{data}</text:p></table:table-cell>')
+
+        if isinstance(data, (datetime.date, np.datetime64)):
+            if pd.isna(data):
+                return f'<table:table-cell{attrs}/>'
+            value = pd.Timestamp(data).isoformat()
+            return (f'<table:table-cell{attrs} office:value-type="date"'
+                    f' office:date-value="{value}"><text:p>{value}</text:p>'
+                    '</table:table-cell>')
+
+        if pd.isna(data):
+            return f'<table:table-cell{attrs}/>'
+
+        return (f'<table:table-cell{attrs} office:value-type="string">'
+                f'<text:p>{escape(str(data))}</text:p></table:table-cell>')
+
+
+    def _paragraphs_xml(self, data, format_dict):
+        """
+        XML paragraphs for text, a link, rich text, or a list of these
+        written on separate lines.
+        """
+        if isinstance(data, list):
+            return "".join(self._paragraphs_xml(element, format_dict) for element in data)
+
+        if isinstance(data, dict):
+            display_text = list(data.keys())[0]
+            href = self._ods_href(list(data.values())[0])
+            return (f'<text:p><text:a xlink:type="simple" xlink:href={quoteattr(href)}>'
+                    f'{self._text_xml(display_text)}</text:a></text:p>')
+
+        if isinstance(data, FormatList):
+            spans = []
+            span_format = None
+            for item in data.list:
+                if isinstance(item, dict):
+                    span_format = item
+                    continue
+                text = self._text_xml(item)
+                if span_format is None:
+                    spans.append(text)
+                else:
+                    style = self._get_text_style({**format_dict, **span_format})
+                    spans.append(f'<text:span text:style-name="{style}">{text}</text:span>')
+                span_format = None
+            return f'<text:p>{"".join(spans)}</text:p>'
+
+        return f'<text:p>{self._text_xml(data)}</text:p>'
+
+
+    @staticmethod
+    def _text_xml(text):
+        """
+        Escape text, preserving repeated spaces and line breaks.
+        """
+        text = escape(str(text)).replace("  ", " <text:s/>")
+        return text.replace("\r\n", "\n").replace("\n", "<text:line-break/>")
+
+
+    @staticmethod
+    def _ods_href(url):
+        """
+        Convert an XlsxWriter URL to an ODF link. Internal links to a sheet
+        cell ("internal:'Sheet'!A1") become "#'Sheet'.A1".
+        """
+        if url.startswith("internal:"):
+            return "#" + url[len("internal:"):].replace("!", ".")
+        return url
+
+
+    def _get_cell_style(self, format_dict):
+        """
+        Get the name of the automatic cell style for a format, creating it if
+        it does not exist.
+        """
+        if not format_dict:
+            return None
+
+        key = tuple(sorted(format_dict.items()))
+        if key not in self._cell_styles:
+            self._cell_styles[key] = f"ce{len(self._cell_styles) + 1}"
+
+        return self._cell_styles[key]
+
+
+    def _get_text_style(self, format_dict):
+        """
+        Get the name of the automatic text style for a rich text format.
+        """
+        key = tuple(sorted(format_dict.items()))
+        if key not in self._text_styles:
+            self._text_styles[key] = f"T{len(self._text_styles) + 1}"
+
+        return self._text_styles[key]
+
+
+    def _get_column_style(self, width):
+        """
+        Get the name of the automatic column style for a width in Excel
+        character units.
+        """
+        if width is None:
+            return None
+
+        inches = round(width * _INCHES_PER_CHARACTER + 5 / 96, 3)
+        if inches not in self._column_styles:
+            self._column_styles[inches] = f"co{len(self._column_styles) + 1}"
+
+        return self._column_styles[inches]
+
+
+    def _get_row_style(self, height):
+        """
+        Get the name of the automatic row style for a height in points.
+        """
+        if height is None:
+            return None
+
+        if height not in self._row_styles:
+            self._row_styles[height] = f"ro{len(self._row_styles) + 1}"
+
+        return self._row_styles[height]
+
+
+    def _automatic_styles_xml(self):
+        """
+        XML for the column, row, cell and text styles used in the spreadsheet.
+        """
+        styles = []
+        for inches, name in self._column_styles.items():
+            styles.append(
+                f'<style:style style:name="{name}" style:family="table-column">'
+                f'<style:table-column-properties style:column-width="{inches}in"/>'
+                '</style:style>'
+                )
+
+        for height, name in self._row_styles.items():
+            styles.append(
+                f'<style:style style:name="{name}" style:family="table-row">'
+                f'<style:table-row-properties style:row-height="{height:g}pt"'
+                ' style:use-optimal-row-height="false"/>'
+                '</style:style>'
+                )
+
+        for key, name in self._cell_styles.items():
+            format_dict = dict(key)
+            cell_props, paragraph_props = self._cell_properties(format_dict)
+            styles.append(
+                f'<style:style style:name="{name}" style:family="table-cell">'
+                f'<style:table-cell-properties{cell_props}/>'
+                f'<style:paragraph-properties{paragraph_props}/>'
+                f'<style:text-properties{self._text_properties(format_dict)}/>'
+                '</style:style>'
+                )
+
+        for key, name in self._text_styles.items():
+            styles.append(
+                f'<style:style style:name="{name}" style:family="text">'
+                f'<style:text-properties{self._text_properties(dict(key))}/>'
+                '</style:style>'
+                )
+
+        return "".join(styles)
+
+
+    @staticmethod
+    def _text_properties(format_dict):
+        """
+        ODF text properties for an XlsxWriter format dictionary.
+        """
+        props = []
+        if format_dict.get("bold"):
+            props.append(' fo:font-weight="bold"')
+        if format_dict.get("italic"):
+            props.append(' fo:font-style="italic"')
+        if format_dict.get("underline"):
+            props.append(' style:text-underline-style="solid"'
+                         ' style:text-underline-width="auto"'
+                         ' style:text-underline-color="font-color"')
+        if format_dict.get("font_strikeout"):
+            props.append(' style:text-line-through-style="solid"')
+        if format_dict.get("font_size"):
+            props.append(f' fo:font-size="{format_dict["font_size"]}pt"')
+        if format_dict.get("font_name"):
+            props.append(f' fo:font-family={quoteattr(str(format_dict["font_name"]))}')
+
+        font_color = format_dict.get("font_color") or format_dict.get("color")
+        if font_color:
+            color = _ods_color(font_color)
+            if color:
+                props.append(f' fo:color="{color}"')
+
+        return "".join(props)
+
+
+    @staticmethod
+    def _cell_properties(format_dict):
+        """
+        ODF table cell and paragraph properties for an XlsxWriter format
+        dictionary.
+        """
+        cell_props = []
+        paragraph_props = []
+
+        if format_dict.get("text_wrap"):
+            cell_props.append(' fo:wrap-option="wrap"')
+
+        valign = _VERTICAL_ALIGN.get(format_dict.get("valign"))
+        if valign:
+            cell_props.append(f' style:vertical-align="{valign}"')
+
+        bg_color = format_dict.get("bg_color") or format_dict.get("fg_color")
+        if bg_color:
+            color = _ods_color(bg_color)
+            if color:
+                cell_props.append(f' fo:background-color="{color}"')
+
+        border = format_dict.get("border")
+        for side in ["top", "bottom", "left", "right"]:
+            style = _BORDERS.get(format_dict.get(side, border))
+            if style:
+                color = format_dict.get(f"{side}_color") or format_dict.get("border_color")
+                color = _ods_color(color, default="#000000")
+                cell_props.append(f' fo:border-{side}="{style} {color}"')
+
+        align = _TEXT_ALIGN.get(format_dict.get("align"))
+        if align:
+            paragraph_props.append(f' fo:text-align="{align}"')
+            cell_props.append(' style:text-align-source="fix"')
+
+        if format_dict.get("indent"):
+            paragraph_props.append(f' fo:margin-left="{format_dict["indent"] * 0.125}in"')
+
+        return "".join(cell_props), "".join(paragraph_props)
+
+
+    def _database_ranges_xml(self):
+        """
+        XML for database ranges marking the worksheet tables.
+        """
+        if not self._database_ranges:
+            return ""
+
+        ranges = ['<table:database-ranges>']
+        for label, data_range, table_name in self._database_ranges:
+            first_row, first_col, last_row, last_col = data_range
+            sheet = "'" + label.replace("'", "''") + "'"
+            address = (f"{sheet}.{xl_rowcol_to_cell(first_row, first_col)}"
+                       f":{sheet}.{xl_rowcol_to_cell(last_row, last_col)}")
+            ranges.append(
+                f'<table:database-range table:name={quoteattr(table_name)}'
+                f' table:target-range-address={quoteattr(address)}'
+                ' table:contains-header="true"/>'
+                )
+        ranges.append('</table:database-ranges>')
+
+        return "".join(ranges)
+
+
+    def _settings_xml(self):
+        """
+        XML for view settings, hiding gridlines on sheets where they are
+        hidden.
+        """
+        tables = []
+        for label, gridlines in self._gridlines.items():
+            show_grid = "false" if gridlines == "hide_all" else "true"
+            tables.append(
+                f'<config:config-item-map-entry config:name={quoteattr(label)}>'
+                f'<config:config-item config:name="ShowGrid" config:type="boolean">'
+                f'{show_grid}</config:config-item>'
+                '</config:config-item-map-entry>'
+                )
+
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<office:document-settings {_NAMESPACES}>'
+            '<office:settings>'
+            '<config:config-item-set config:name="ooo:view-settings">'
+            '<config:config-item-map-indexed config:name="Views">'
+            '<config:config-item-map-entry>'
+            '<config:config-item-map-named config:name="Tables">'
+            f'{"".join(tables)}'
+            '</config:config-item-map-named>'
+            '</config:config-item-map-entry>'
+            '</config:config-item-map-indexed>'
+            '</config:config-item-set>'
+            '</office:settings>'
+            '</office:document-settings>'
+            )
+
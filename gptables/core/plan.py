@@ -0,0 +1,374 @@
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from .gptable import FormatList
+from .wrappers import (
+    GPWorkbook,
+    GPWorksheet,
+    EXCEL_MAX_ROWS,
+    EXCEL_MAX_COLUMNS,
+    EXCEL_MAX_FORMATS,
+    EXCEL_MAX_HYPERLINKS,
+    )
+
+
+# Rough sizes, in bytes, of worksheet XML elements written by XlsxWriter
+_ROW_XML_BYTES = 30  # <row r="" spans="1:n"></row>
+_CELL_XML_BYTES = 20  # <c r="" s=""></c>
+_VALUE_XML_BYTES = 7  # <v></v>
+_STRING_CELL_XML_BYTES = 11  # t="s" and shared string index
+_SHARED_STRING_XML_BYTES = 13  # <si><t></t></si>
+_HYPERLINK_XML_BYTES = 150  # <hyperlink> element and relationship
+
+# Typical deflate ratios for worksheet and shared string XML
+_SHEET_COMPRESSION_RATIO = 0.15
+_STRINGS_COMPRESSION_RATIO = 0.35
+
+# Rough memory, in bytes, held per cell by XlsxWriter until the workbook is
+# closed, and used per cell while a GPTable is prepared (data and format
+# dictionaries)
+_WRITER_BYTES_PER_CELL = 150
+_PREPARATION_BYTES_PER_CELL = 350
+
+
+@dataclass
+class SheetPlan:
+    """
+    Planned layout of a single worksheet.
+
+    Attributes
+    ----------
+    label : str
+        worksheet label
+    rows : int
+        number of rows written, including the title block
+    columns : int
+        number of columns written
+    data_range : list
+        top-left and bottom-right cell of the worksheet table, as
+        [first_row, first_col, last_row, last_col]. None if the sheet has no
+        table.
+    column_widths : list
+        column widths that will be set, if `auto_width` is used
+    cells : int
+        number of cells written
+    string_cells : int
+        number of cells containing plain strings
+    rich_string_cells : int
+        number of cells containing rich text or multiple lines
+    hyperlinks : int
+        number of cells containing links
+    wrapped_cells : int
+        number of cells with wrapped text
+    formats : int
+        number of distinct cell formats used in the sheet
+    estimated_xml_bytes : int
+        estimated size of the worksheet XML, excluding shared strings
+    warnings : List[str]
+        Excel limits that this sheet exceeds
+    """
+    label: str
+    rows: int = 0
+    columns: int = 0
+    data_range: list = None
+    column_widths: list = field(default_factory=list)
+    cells: int = 0
+    string_cells: int = 0
+    rich_string_cells: int = 0
+    hyperlinks: int = 0
+    wrapped_cells: int = 0
+    formats: int = 0
+    estimated_xml_bytes: int = 0
+    warnings: List[str] = field(default_factory=list)
+
+
+@dataclass
+class WorkbookPlan:
+    """
+    Planned layout and estimated cost of a workbook, as returned by
+    :func:`~.core.api.plan_workbook`.
+
+    Attributes
+    ----------
+    sheets : List[SheetPlan]
+        plan for each worksheet, in workbook order
+    cells : int
+        number of cells written across all sheets
+    unique_strings : int
+        number of entries in the shared strings table
+    hyperlinks : int
+        number of cells containing links
+    wrapped_cells : int
+        number of cells with wrapped text
+    tables : int
+        number of worksheet tables
+    formats : int
+        number of distinct cell formats in the workbook
+    estimated_uncompressed_bytes : int
+        estimated total size of the workbook XML
+    estimated_compressed_bytes : int
+        estimated size of the `.xlsx` file
+    estimated_peak_memory_bytes : int
+        estimated peak memory used to produce and close the workbook
+    warnings : List[str]
+        Excel limits that the workbook exceeds
+    """
+    sheets: List[SheetPlan] = field(default_factory=list)
+    cells: int = 0
+    unique_strings: int = 0
+    hyperlinks: int = 0
+    wrapped_cells: int = 0
+    tables: int = 0
+    formats: int = 0
+    estimated_uncompressed_bytes: int = 0
+    estimated_compressed_bytes: int = 0
+    estimated_peak_memory_bytes: int = 0
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def within_limits(self):
+        """
+        True if the workbook does not exceed any Excel limits.
+        """
+        return len(self.warnings) == 0
+
+
+    @property
+    def open_time_report(self):
+        """
+        Features of the workbook that slow opening and scrolling it in
+        spreadsheet applications, as a dictionary of counts. These can be
+        reduced with a theme's `open_time_profile`.
+        """
+        return {
+            "formats": self.formats,
+            "wrapped_cells": self.wrapped_cells,
+            "hyperlinks": self.hyperlinks,
+            "rich_string_cells": sum(sheet.rich_string_cells for sheet in self.sheets),
+            "tables": self.tables,
+            "cells": self.cells,
+            }
+
+
+def _format_key(format_dict):
+    """
+    Hashable representation of a format dictionary.
+    """
+    return tuple(sorted(format_dict.items()))
+
+
+_types = np.frompyfunc(type, 1, 1)
+_lengths = np.frompyfunc(len, 1, 1)
+_str_lengths = np.frompyfunc(lambda value: len(str(value)), 1, 1)
+_format_keys = np.frompyfunc(_format_key, 1, 1)
+_is_wrapped = np.frompyfunc(lambda format_dict: bool(format_dict.get("text_wrap")), 1, 1)
+
+
+class PlanningWorksheet(GPWorksheet):
+    """
+    GPWorksheet that records the cells, formats and layout that would be
+    written, without storing cells or emitting XML. All GPTable preparation
+    (references, links, validation, formats and widths) runs as it would
+    for a real write.
+    """
+    def _initialize(self, init_data):
+        super(PlanningWorksheet, self)._initialize(init_data)
+        self.plan = SheetPlan(label=init_data["name"])
+        self._format_keys = set()
+
+
+    def _smart_write(self, row, col, data, format_dict, *args):
+        """
+        Record a single cell.
+        """
+        values = np.empty(1, dtype=object)
+        values[0] = data
+        format_dicts = np.empty(1, dtype=object)
+        format_dicts[0] = format_dict
+
+        self._record_cells(np.array([row]), np.array([col]), values, format_dicts)
+
+
+    def _write_array(self, pos, data, formats):
+        """
+        Record a two-dimensional array of cells, using array operations.
+        """
+        if data.shape != formats.shape:
+            raise ValueError("data and formats arrays must be of equal shape")
+
+        rows, cols = data.shape
+        row_numbers, col_numbers = np.meshgrid(
+            np.arange(rows) + pos[0],
+            np.arange(cols) + pos[1],
+            indexing="ij"
+            )
+        self._record_cells(
+            row_numbers.ravel(),
+            col_numbers.ravel(),
+            data.to_numpy(dtype=object).ravel(),
+            formats.to_numpy(dtype=object).ravel(),
+            )
+
+        return [pos[0] + rows, 0]
+
+
+    def _record_cells(self, row_numbers, col_numbers, values, format_dicts):
+        """
+        Update the sheet plan with a flat array of cells.
+        """
+        if len(values) == 0:
+            return
+
+        plan = self.plan
+        value_types = _types(values)
+
+        # Single element lists are written as their only element
+        is_single = value_types == list
+        is_single[is_single] = _lengths(values[is_single]) == 1
+        if is_single.any():
+            values = values.copy()
+            values[is_single] = [value[0] for value in values[is_single]]
+            value_types = _types(values)
+
+        is_rich = (value_types == list) | (value_types == FormatList)
+        is_link = value_types == dict
+        is_string = value_types == str
+        is_blank = ~(is_rich | is_link | is_string) & pd.isna(values).astype(bool)
+        is_number = ~(is_rich | is_link | is_string | is_blank)
+
+        self._workbook._unique_strings.update(values[is_string])
+        self._workbook._unique_strings.update(
+            self._cell_text(value) for value in values[is_rich | is_link]
+            )
+
+        keys = set(_format_keys(format_dicts))
+        self._format_keys.update(keys)
+        self._workbook._format_keys.update(keys)
+
+        # Worksheet XML size, from cell references and values
+        ref_bytes = (
+            np.floor(np.log10(row_numbers + 1)).astype(int) + 1
+            + np.where(col_numbers < 26, 1, np.where(col_numbers < 702, 2, 3))
+            )
+        value_bytes = np.zeros(len(values), dtype=int)
+        if is_number.any():
+            value_bytes[is_number] = _str_lengths(values[is_number]).astype(int) + _VALUE_XML_BYTES
+        value_bytes[is_string | is_rich | is_link] = _VALUE_XML_BYTES + _STRING_CELL_XML_BYTES
+        value_bytes[is_link] += _HYPERLINK_XML_BYTES
+
+        new_rows = len(set(row_numbers.tolist()))
+        plan.estimated_xml_bytes += int(
+            (_CELL_XML_BYTES + ref_bytes + value_bytes).sum()
+            + new_rows * _ROW_XML_BYTES
+            )
+
+        plan.cells += len(values)
+        plan.string_cells += int(is_string.sum())
+        plan.rich_string_cells += int(is_rich.sum())
+        plan.hyperlinks += int(is_link.sum())
+        plan.wrapped_cells += int(_is_wrapped(format_dicts).astype(bool).sum())
+        plan.formats = len(self._format_keys)
+        plan.rows = max(plan.rows, int(row_numbers.max()) + 1)
+        plan.columns = max(plan.columns, int(col_numbers.max()) + 1)
+
+
+    @staticmethod
+    def _cell_text(value):
+        """
+        Text stored in the shared strings table for a rich text or link cell.
+        """
+        if isinstance(value, dict):
+            return list(value)[0]
+        if isinstance(value, FormatList):
+            return value.string
+        return "\n".join(
+            element.string if isinstance(element, FormatList) else str(element)
+            for element in value
+            )
+
+
+    def _set_column_widths(self, widths):
+        """
+        Record column widths.
+        """
+        self.plan.column_widths = list(widths)
+
+
+    def add_table(self, first_row, first_col, last_row, last_col, options=None):
+        """
+        Record the worksheet table range.
+        """
+        self.plan.data_range = [first_row, first_col, last_row, last_col]
+
+
+class PlanningWorkbook(GPWorkbook):
+    """
+    GPWorkbook that plans worksheets instead of writing them. It cannot be
+    closed.
+    """
+    worksheet_class = PlanningWorksheet
+
+    def __init__(self, options={}):
+        super(PlanningWorkbook, self).__init__(None, {**options, "in_memory": True})
+        self._unique_strings = set()
+        self._format_keys = set()
+        # Nothing to write, so prevent XlsxWriter storing the workbook
+        self.fileclosed = True
+
+
+    def get_plan(self):
+        """
+        Summarise the planned worksheets as a WorkbookPlan.
+        """
+        plan = WorkbookPlan(sheets=[ws.plan for ws in self.worksheets()])
+
+        for sheet in plan.sheets:
+            if sheet.rows > EXCEL_MAX_ROWS:
+                sheet.warnings.append(
+                    f"{sheet.rows} rows exceeds the Excel limit of {EXCEL_MAX_ROWS}"
+                    )
+            if sheet.columns > EXCEL_MAX_COLUMNS:
+                sheet.warnings.append(
+                    f"{sheet.columns} columns exceeds the Excel limit of {EXCEL_MAX_COLUMNS}"
+                    )
+            if sheet.hyperlinks > EXCEL_MAX_HYPERLINKS:
+                sheet.warnings.append(
+                    f"{sheet.hyperlinks} links exceeds the Excel limit of {EXCEL_MAX_HYPERLINKS}"
+                    )
+            plan.warnings.extend(f"{sheet.label}: {msg}" for msg in sheet.warnings)
+
+        plan.cells = sum(sheet.cells for sheet in plan.sheets)
+        plan.hyperlinks = sum(sheet.hyperlinks for sheet in plan.sheets)
+        plan.wrapped_cells = sum(sheet.wrapped_cells for sheet in plan.sheets)
+        plan.tables = sum(sheet.data_range is not None for sheet in plan.sheets)
+        plan.unique_strings = len(self._unique_strings)
+        plan.formats = len(self._format_keys)
+
+        if plan.formats > EXCEL_MAX_FORMATS:
+            plan.warnings.append(
+                f"{plan.formats} distinct formats exceeds the Excel limit of {EXCEL_MAX_FORMATS}"
+                )
+
+        sheet_bytes = sum(sheet.estimated_xml_bytes for sheet in plan.sheets)
+        string_bytes = (
+            sum(len(string) for string in self._unique_strings)
+            + plan.unique_strings * _SHARED_STRING_XML_BYTES
+            )
+
+        plan.estimated_uncompressed_bytes = sheet_bytes + string_bytes
+        plan.estimated_compressed_bytes = int(
+            sheet_bytes * _SHEET_COMPRESSION_RATIO
+            + string_bytes * _STRINGS_COMPRESSION_RATIO
+            )
+
+        largest_sheet = max([sheet.cells for sheet in plan.sheets], default=0)
+        plan.estimated_peak_memory_bytes = (
+            plan.cells * _WRITER_BYTES_PER_CELL
+            + largest_sheet * _PREPARATION_BYTES_PER_CELL
+            + plan.estimated_uncompressed_bytes
+            )
+
+        return plan
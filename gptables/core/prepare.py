@@ -0,0 +1,147 @@
+from dataclasses import dataclass, field
+
+from .wrappers import GPWorkbook, GPWorksheet
+
+
+@dataclass
+class PreparedSheet:
+    """
+    A worksheet with references, links, validation and formats applied,
+    ready to be written by one or more emitters.
+
+    Attributes
+    ----------
+    label : str
+        worksheet label
+    gridlines : str
+        gridlines option of the worksheet, as for
+        :meth:`~.core.wrappers.GPWorkbook.add_worksheet`
+    cells : list
+        single cells, as (row, col, data, format_dict) tuples. These are the
+        title block of a table sheet, or the text of a cover sheet.
+    arrays : list
+        tables of cells, as (pos, data, formats) tuples, where `data` and
+        `formats` are DataFrames of values and format dictionaries. The first
+        row of `data` contains the column headings.
+    columns : list
+        column widths, as (first_col, last_col, width) tuples
+    column_formats : list
+        format dictionary of each column, as set by a theme's
+        `open_time_profile`. Empty dictionaries leave a column unformatted.
+    rows : list
+        row heights, as (row, height) tuples
+    tables : list
+        worksheet tables, as (data_range, column_list, header_formats,
+        table_name) tuples
+    conditional_formats : list
+        formula conditional formats, as (ranges, formula, format_dict) tuples
+    """
+    label: str
+    gridlines: str = "hide_all"
+    cells: list = field(default_factory=list)
+    arrays: list = field(default_factory=list)
+    columns: list = field(default_factory=list)
+    column_formats: list = field(default_factory=list)
+    rows: list = field(default_factory=list)
+    tables: list = field(default_factory=list)
+    conditional_formats: list = field(default_factory=list)
+
+
+class PreparingWorksheet(GPWorksheet):
+    """
+    GPWorksheet that records the prepared cells, formats and layout of a
+    sheet as a PreparedSheet, instead of writing them.
+    """
+    def _initialize(self, init_data):
+        super(PreparingWorksheet, self)._initialize(init_data)
+        self.prepared = PreparedSheet(label=init_data["name"])
+
+
+    def _smart_write(self, row, col, data, format_dict, *args):
+        """
+        Record a single cell.
+        """
+        self.prepared.cells.append((row, col, data, format_dict))
+
+
+    def _write_array(self, pos, data, formats):
+        """
+        Record a two-dimensional array of cells.
+        """
+        if data.shape != formats.shape:
+            raise ValueError("data and formats arrays must be of equal shape")
+
+        self.prepared.arrays.append((list(pos), data, formats))
+
+        return [pos[0] + data.shape[0], 0]
+
+
+    def set_column(self, first_col, last_col, width=None, cell_format=None, options=None):
+        """
+        Record a column width.
+        """
+        self.prepared.columns.append((first_col, last_col, width))
+
+
+    def _set_column_formats(self, column_formats):
+        """
+        Record column formats.
+        """
+        self.prepared.column_formats = list(column_formats)
+
+
+    def set_row(self, row, height=None, cell_format=None, options=None):
+        """
+        Record a row height.
+        """
+        self.prepared.rows.append((row, height))
+
+
+    def _add_worksheet_table(self, data_range, column_list, header_formats, table_name):
+        """
+        Record a worksheet table.
+        """
+        self.prepared.tables.append(
+            (list(data_range), column_list, header_formats, table_name)
+            )
+
+
+    def _add_conditional_format(self, ranges, formula, format_dict):
+        """
+        Record a conditional format.
+        """
+        self.prepared.conditional_formats.append((ranges, formula, format_dict))
+
+
+class PreparingWorkbook(GPWorkbook):
+    """
+    GPWorkbook that prepares worksheets for emitters, instead of writing
+    them. It cannot be closed.
+    """
+    worksheet_class = PreparingWorksheet
+
+    def __init__(self, options={}):
+        super(PreparingWorkbook, self).__init__(None, {**options, "in_memory": True})
+        # Nothing to write, so prevent XlsxWriter storing the workbook
+        self.fileclosed = True
+
+
+    def add_worksheet(self, name=None, gridlines="hide_all"):
+        """
+        Add a PreparingWorksheet, recording its gridlines option.
+        """
+        worksheet = super(PreparingWorkbook, self).add_worksheet(name, gridlines)
+        worksheet.prepared.gridlines = gridlines
+
+        return worksheet
+
+
+    def _pop_prepared_sheet(self, name):
+        """
+        Get the PreparedSheet of a worksheet, releasing it from the workbook
+        so that its data can be freed once it has been emitted.
+        """
+        worksheet = self.get_worksheet_by_name(name)
+        prepared, worksheet.prepared = worksheet.prepared, None
+
+        return prepared
@@ -0,0 +1,307 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# Column dtypes inferred from fetched values, in order of promotion. Values
+# that don't fit a column's dtype promote the column to a later dtype.
+_BOOL, _INT, _FLOAT, _OBJECT = range(4)
+
+_INT_RANGE = (np.iinfo(np.int64).min, np.iinfo(np.int64).max)
+
+_DTYPES = {
+    _BOOL: np.bool_,
+    _INT: np.int64,
+    _FLOAT: np.float64,
+    _OBJECT: object,
+    }
+
+
+def read_cursor(cursor, batch_size=10000):
+    """
+    Read the result set of an executed DB-API cursor into a DataFrame.
+
+    Rows are fetched with `fetchmany`, `batch_size` rows at a time, and each
+    batch is converted to typed column arrays before the next is fetched.
+    The whole result set is read into memory: the arrays of all batches are
+    kept, and joined into the columns of the DataFrame at the end, when both
+    are held at once. Column dtypes are inferred from the first batch, and
+    promoted if later batches contain values that don't fit - integers with
+    missing values become floats, and mixed types become objects.
+
+    Parameters
+    ----------
+    cursor : DB-API cursor
+        cursor that a query has been executed on
+    batch_size : int, optional
+        number of rows to fetch with each call to `fetchmany`
+
+    Returns
+    -------
+    pandas.DataFrame
+        result set, with a column for each column of the cursor's
+        `description`
+    """
+    if not isinstance(batch_size, int) or batch_size < 1:
+        raise ValueError("`batch_size` must be a positive integer")
+    if cursor.description is None:
+        raise ValueError("`cursor` has no result set - execute a query first")
+
+    names = [column[0] for column in cursor.description]
+    kinds = [None] * len(names)
+    chunks = [[] for _ in names]
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+
+        for col, values in enumerate(zip(*rows)):
+            kind = _promote(kinds[col], _infer_kind(values))
+            if kind != kinds[col] and chunks[col]:
+                chunks[col] = [chunk.astype(_DTYPES[kind]) for chunk in chunks[col]]
+            kinds[col] = kind
+            chunks[col].append(_to_array(values, kind))
+
+        # Release the batch before fetching the next one
+        del rows
+
+    columns = {
+        col: np.concatenate(chunks[col]) if chunks[col] else np.array([], dtype=object)
+        for col in range(len(names))
+        }
+    table = pd.DataFrame(columns, copy=False)
+    table.columns = names
+
+    return table
+
+
+def read_columns(columns):
+    """
+    Read a mapping of column name to column values into a DataFrame, without
+    copying NumPy arrays.
+
+    This is cheaper than building a DataFrame from the mapping with pandas,
+    which consolidates columns of the same dtype into a single copied block.
+    Lists and other sequences have their dtype inferred as for
+    :func:`read_cursor`, and NumPy Unicode string arrays are stored as objects.
+
+    Parameters
+    ----------
+    columns : mapping
+        mapping of column name to a one-dimensional NumPy array, pandas array
+        or Series, or list of values. All columns must have the same length.
+
+    Returns
+    -------
+    pandas.DataFrame
+        table with a column for each item of `columns`, in order
+    """
+    names = list(columns.keys())
+    arrays = [_to_column_array(name, values) for name, values in columns.items()]
+
+    lengths = {len(array) for array in arrays}
+    if len(lengths) > 1:
+        raise ValueError("All columns in `table` must have the same length")
+
+    table = pd.DataFrame(dict(enumerate(arrays)), copy=False)
+    table.columns = names
+
+    return table
+
+
+def _to_column_array(name, values):
+    """
+    Get a one-dimensional array of the values of a column.
+    """
+    if isinstance(values, pd.Series):
+        values = values.array
+
+    if isinstance(values, np.ndarray):
+        if values.ndim != 1:
+            raise ValueError(f"Column {name!r} of `table` must be one-dimensional")
+        if values.dtype.kind == "U":
+            return values.astype(object)
+        return values
+
+    if isinstance(values, pd.api.extensions.ExtensionArray):
+        return values
+
+    if isinstance(values, (str, bytes, dict)) or not hasattr(values, "__len__"):
+        msg = (f"Column {name!r} of `table` must be an array or list of values,"
+               f" not {type(values).__name__}")
+        raise TypeError(msg)
+
+    values = list(values)
+    return _to_array(values, _infer_kind(values) if values else _FLOAT)
+
+
+def _infer_kind(values):
+    """
+    Get the narrowest column dtype that holds a batch of fetched values.
+    """
+    types = {type(value) for value in values}
+    has_null = type(None) in types
+    types.discard(type(None))
+
+    if not types:
+        return _FLOAT
+    if types == {bool}:
+        return _OBJECT if has_null else _BOOL
+    if types == {int}:
+        integers = [value for value in values if value is not None]
+        if min(integers) < _INT_RANGE[0] or max(integers) > _INT_RANGE[1]:
+            return _OBJECT
+        return _FLOAT if has_null else _INT
+    if types <= {int, float}:
+        return _FLOAT
+    return _OBJECT
+
+
+def _promote(kind, other):
+    """
+    Get the dtype of a column holding values of both dtypes.
+    """
+    if kind is None or kind == other:
+        return other
+    if {kind, other} <= {_INT, _FLOAT}:
+        return _FLOAT
+    return _OBJECT
+
+
+def _to_array(values, kind):
+    """
+    Convert a batch of fetched values to an array of the column's dtype.
+    Missing values in float columns become NaN.
+    """
+    if kind == _OBJECT:
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+
+    if kind == _FLOAT:
+        values = [np.nan if value is None else value for value in values]
+
+    return np.array(values, dtype=_DTYPES[kind])
+
+
+def read_parquet(path, columns=None):
+    """
+    Read a Parquet file into a DataFrame, using pyarrow.
+
+    The file is memory-mapped and only the `columns` requested are read.
+    They are decoded into an Arrow table in full, which is then converted to
+    a DataFrame. String columns are kept in Arrow memory, with the
+    ``string[pyarrow]`` dtype, rather than converted to Python objects.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        path to the Parquet file
+    columns : list of str, optional
+        names of the columns to read, in order. Defaults to all columns,
+        except any index stored by pandas.
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    pa = _import_pyarrow()
+    import pyarrow.parquet
+
+    parquet_file = pyarrow.parquet.ParquetFile(str(path), memory_map=True)
+    schema = _project_schema(pa, parquet_file.schema_arrow, columns)
+    table = parquet_file.read(columns=schema.names)
+
+    return _arrow_table_to_frame(pa, table, schema)
+
+
+def read_feather(path, columns=None):
+    """
+    Read a Feather (Arrow IPC) file into a DataFrame, using pyarrow.
+
+    The file is memory-mapped and only the `columns` requested are read into
+    an Arrow table, which is then converted to a DataFrame. Columns of
+    uncompressed files are read without copying, and those of compressed
+    files are decompressed in memory. String columns are kept in Arrow
+    memory, with the ``string[pyarrow]`` dtype, rather than converted to
+    Python objects.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        path to the Feather file. Only Feather version 2 files, which are
+        Arrow IPC files, are supported.
+    columns : list of str, optional
+        names of the columns to read, in order. Defaults to all columns,
+        except any index stored by pandas.
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    pa = _import_pyarrow()
+    import pyarrow.feather
+
+    with pa.memory_map(str(path), "r") as source:
+        schema = _project_schema(pa, pa.ipc.open_file(source).schema, columns)
+    table = pyarrow.feather.read_table(str(path), columns=schema.names, memory_map=True)
+
+    return _arrow_table_to_frame(pa, table, schema)
+
+
+def _import_pyarrow():
+    """
+    Import pyarrow, which is an optional dependency.
+    """
+    try:
+        import pyarrow
+    except ImportError as error:
+        msg = ("Reading Parquet and Feather files requires pyarrow, which can"
+               " be installed with `pip install gptables[arrow]`")
+        raise ImportError(msg) from error
+
+    return pyarrow
+
+
+def _project_schema(pa, schema, columns):
+    """
+    Get the schema of the columns to read from a file. Index columns stored
+    by pandas are not read by default, as GPTables have a default index.
+    """
+    if columns is None:
+        columns = [
+            name for name in schema.names
+            if not re.fullmatch(r"__index_level_\d+__", name)
+            ]
+
+    missing = [name for name in columns if name not in schema.names]
+    if missing:
+        raise ValueError(f"Columns {missing} are not in the file")
+
+    # Schema metadata is dropped, so a stored pandas index isn't restored
+    return pa.schema([schema.field(name) for name in columns])
+
+
+def _arrow_table_to_frame(pa, table, schema):
+    """
+    Convert the columns of an Arrow table in `schema` to a DataFrame, keeping
+    strings in Arrow memory. Other columns are copied, and the Arrow buffers
+    of each are released once it is converted.
+    """
+    table = pa.Table.from_arrays(
+        [table.column(name) for name in schema.names],
+        schema=schema,
+        )
+    string_dtype = pd.StringDtype("pyarrow")
+    types_mapper = {
+        pa.string(): string_dtype,
+        pa.large_string(): string_dtype,
+        }.get
+
+    return table.to_pandas(
+        types_mapper=types_mapper,
+        split_blocks=True,
+        self_destruct=True,
+        )
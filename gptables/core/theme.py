@@ -1,7 +1,13 @@
-from xlsxwriter.format import Format
-from gptables.core.gptable import GPTable
+from gptables.core.gptable import GPTable, _get_valid_format_labels
+import hashlib
+import json
+import os
+import threading
 import yaml
+from copy import copy, deepcopy
 from functools import wraps
+from pathlib import Path
+from pkg_resources import resource_filename
 
 def validate_single_format(f):
     @wraps(f)
@@ -20,6 +26,36 @@ def validate_single_format(f):
         return f(cls, format_dict)
     return wrapper
 
+
+def updates_theme(f):
+    @wraps(f)
+    def wrapper(cls, *args, **kwargs):
+        """
+        Decorator to prevent updates to frozen Themes.
+        """
+        if cls._frozen:
+            msg = ("Frozen Themes cannot be updated, use `thaw()` to get an"
+                   " editable copy")
+            raise TypeError(msg)
+        return f(cls, *args, **kwargs)
+    return wrapper
+
+
+class _FrozenDict(dict):
+    """
+    A dictionary that cannot be changed, used for the format attributes of
+    frozen Themes.
+    """
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Formats of frozen Themes cannot be changed")
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return (_FrozenDict, (dict(self),))
+
+
 class Theme:
     """
     A class that defines a set of format attributes for use in xlsxwriter.
@@ -61,7 +97,17 @@ class Theme:
     legend_format : dict
 
     description_order : list
+
+    open_time_profile : dict
+
+    fingerprint : str
+        digest of the formats, description order and open time profile
+
+    frozen : bool
+        whether the Theme is a frozen snapshot, from :meth:`freeze`
     """
+    _frozen = False
+    _fingerprint = None
 
     def __init__(
             self,
@@ -98,6 +144,7 @@ class Theme:
         
         ## Other attributes
         self.description_order = []
+        self.open_time_profile = {}
         
         # Valid Them format attributes
         self._valid_attrs = [
@@ -106,12 +153,7 @@ class Theme:
             ] + ["global"]
 
         # Valid XlsxWriter Format attributes
-        self._valid_format_labels = [
-                attr.replace("set_", "")
-                for attr in Format().__dir__() 
-                if attr.startswith('set_')
-                and callable(getattr(Format(), attr))
-                ]
+        self._valid_format_labels = _get_valid_format_labels()
             
         if config:
             self.apply_config(config)
@@ -125,9 +167,8 @@ class Theme:
         if isinstance(config, str):
             if not config.endswith((".yml", ".yaml")):
                 raise ValueError("Theme configuration files must be YAML")
-            with open(config, "r") as file:
-                cfg = yaml.safe_load(file)
-                
+            cfg = theme_registry.load_config(config)
+
         elif isinstance(config, dict):
             cfg = config
             
@@ -172,7 +213,7 @@ class Theme:
         
         # Update with individual methods
         for key, value in cfg.items():
-            if key == "description_order":
+            if key in ["description_order", "open_time_profile"]:
                 getattr(self, "update_" + key)(value)
             elif key in self._valid_attrs:
                 if value is not None:
@@ -190,6 +231,7 @@ class Theme:
                 getattr(self, "update_" + attr)(global_dict)
 
 
+    @updates_theme
     @validate_single_format
     def update_column_heading_format(self, format_dict):
         """
@@ -199,6 +241,7 @@ class Theme:
         self.column_heading_format.update(format_dict)
     
 
+    @updates_theme
     @validate_single_format
     def update_index_1_format(self, format_dict):
         """
@@ -208,7 +251,8 @@ class Theme:
         self.index_1_format.update(format_dict)
 
 
-    @validate_single_format    
+    @updates_theme
+    @validate_single_format
     def update_index_2_format(self, format_dict):
         """
         Update the `index_2_format` attribute. Where keys already exist, existing
@@ -217,6 +261,7 @@ class Theme:
         self.index_2_format.update(format_dict)
 
 
+    @updates_theme
     @validate_single_format
     def update_index_3_format(self, format_dict):
         """
@@ -226,6 +271,7 @@ class Theme:
         self.index_3_format.update(format_dict)
 
 
+    @updates_theme
     @validate_single_format
     def update_data_format(self, format_dict):
         """
@@ -235,6 +281,7 @@ class Theme:
         self.data_format.update(format_dict)
 
 
+    @updates_theme
     @validate_single_format
     def update_cover_title_format(self, format_dict):
         """
@@ -244,6 +291,7 @@ class Theme:
         self.cover_title_format.update(format_dict)
     
     
+    @updates_theme
     @validate_single_format
     def update_cover_subtitle_format(self, format_dict):
         """
@@ -253,6 +301,7 @@ class Theme:
         self.cover_subtitle_format.update(format_dict)
 
 
+    @updates_theme
     @validate_single_format
     def update_cover_text_format(self, format_dict):
         """
@@ -262,6 +311,7 @@ class Theme:
         self.cover_text_format.update(format_dict)
 
 
+    @updates_theme
     @validate_single_format
     def update_title_format(self, format_dict):
         """
@@ -271,6 +321,7 @@ class Theme:
         self.title_format.update(format_dict)
 
 
+    @updates_theme
     @validate_single_format
     def update_subtitle_format(self, format_dict):
         """
@@ -280,6 +331,7 @@ class Theme:
         self.subtitle_format.update(format_dict)
 
 
+    @updates_theme
     @validate_single_format
     def update_instructions_format(self, format_dict):
         """
@@ -289,7 +341,8 @@ class Theme:
         self.instructions_format.update(format_dict)
 
 
-    @validate_single_format    
+    @updates_theme
+    @validate_single_format
     def update_scope_format(self, format_dict):
         """
         Update the `scope_format` attribute. Where keys already exist, existing
@@ -298,6 +351,7 @@ class Theme:
         self.scope_format.update(format_dict)
 
 
+    @updates_theme
     @validate_single_format
     def update_location_format(self, format_dict):
         """
@@ -307,6 +361,7 @@ class Theme:
         self.location_format.update(format_dict)
 
 
+    @updates_theme
     @validate_single_format
     def update_source_format(self, format_dict):
         """
@@ -316,6 +371,7 @@ class Theme:
         self.source_format.update(format_dict)
 
 
+    @updates_theme
     @validate_single_format
     def update_legend_format(self, format_dict):
         """
@@ -325,6 +381,7 @@ class Theme:
         self.legend_format.update(format_dict)
 
 
+    @updates_theme
     def update_description_order(self, order_list):
         """
         Update the `description_order` attribute. Overrides existing order.
@@ -340,6 +397,136 @@ class Theme:
         self.description_order = order_list
 
 
+    @updates_theme
+    def update_open_time_profile(self, profile):
+        """
+        Update the `open_time_profile` attribute, which reduces the cost of
+        opening and scrolling workbooks in spreadsheet applications. Overrides
+        existing profile.
+
+        Parameters
+        ----------
+        profile : bool or dict
+            True to use all optimisations with their defaults, False or None
+            to use none, or a dictionary with any of the keys:
+
+            - ``column_formats``: if True, set the most common format of each
+              table column as a column format, so that blank cells with that
+              format need not be written. Columns whose format has a fill or
+              border are not collapsed, as column formats also apply outside
+              the table.
+            - ``wrap_overflow_only``: if True, only wrap text in cells with
+              line breaks or whose text is wider than the column
+            - ``max_formats``: maximum number of distinct formats in the body
+              of each table. Cells with the least common formats take the most
+              common remaining format of their column. Defaults to 256.
+        """
+        defaults = {
+            "column_formats": True,
+            "wrap_overflow_only": True,
+            "max_formats": 256,
+            }
+
+        if profile is None or profile is False:
+            self.open_time_profile = {}
+        elif profile is True:
+            self.open_time_profile = defaults
+        elif isinstance(profile, dict):
+            invalid_keys = [key for key in profile if key not in defaults]
+            if invalid_keys:
+                msg = (f"`open_time_profile` keys must be in {list(defaults)},"
+                       f" not {invalid_keys}")
+                raise ValueError(msg)
+            max_formats = profile.get("max_formats")
+            if max_formats is not None and (
+                    not isinstance(max_formats, int) or max_formats < 1):
+                msg = "`max_formats` must be a positive integer or None"
+                raise ValueError(msg)
+            self.open_time_profile = {**defaults, **profile}
+        else:
+            msg = "`open_time_profile` must be a bool or dictionary"
+            raise TypeError(msg)
+
+
+    @property
+    def fingerprint(self):
+        """
+        Digest of the format attributes, `description_order` and
+        `open_time_profile`. Themes with the same settings have the same
+        fingerprint, in any process.
+
+        The fingerprint of a frozen Theme is calculated once, when it is
+        frozen. Editable Themes can be changed directly, through their format
+        dictionaries, so their fingerprint is calculated each time it is used.
+        """
+        if self._frozen:
+            return self._fingerprint
+        return hashlib.sha256(repr(self._get_content()).encode()).hexdigest()
+
+
+    def _get_content(self):
+        """
+        Get the format attributes, `description_order` and
+        `open_time_profile` of the Theme, in a comparable form.
+        """
+        content = [
+            (attr, sorted(getattr(self, attr).items()))
+            for attr in self._format_attributes
+            ]
+        content.append(("description_order", list(self.description_order)))
+        content.append(
+            ("open_time_profile", sorted(self.open_time_profile.items()))
+            )
+        return content
+
+
+    @property
+    def frozen(self):
+        return self._frozen
+
+
+    def freeze(self):
+        """
+        Get a frozen snapshot of the Theme, which can't be updated. Frozen
+        Themes are hashable, so can be used as dictionary keys, and are safe
+        to share between threads and processes.
+
+        Returns
+        -------
+        gptables.Theme
+            frozen copy of the Theme, or the Theme itself if already frozen
+        """
+        if self._frozen:
+            return self
+
+        theme = copy(self)
+        for attr in [*self._format_attributes, "open_time_profile"]:
+            theme.__dict__[attr] = _FrozenDict(getattr(self, attr))
+        theme.__dict__["description_order"] = tuple(self.description_order)
+        theme.__dict__["_format_attributes"] = tuple(self._format_attributes)
+        theme.__dict__["_fingerprint"] = self.fingerprint
+        theme.__dict__["_frozen"] = True
+        return theme
+
+
+    def thaw(self):
+        """
+        Get an editable copy of the Theme.
+
+        Returns
+        -------
+        gptables.Theme
+            copy of the Theme that can be updated
+        """
+        theme = copy(self)
+        for attr in [*self._format_attributes, "open_time_profile"]:
+            theme.__dict__[attr] = dict(getattr(self, attr))
+        theme.__dict__["description_order"] = list(self.description_order)
+        theme.__dict__["_format_attributes"] = list(self._format_attributes)
+        theme.__dict__["_frozen"] = False
+        return theme
+
+
     def print_attributes(self):
         """
         Print all current format attributes and values to the console.
@@ -348,26 +535,204 @@ class Theme:
                 attr for attr in self.__dir__()
                 if not attr.startswith('_')
                 and not callable(getattr(self, attr))
+                and not isinstance(getattr(type(self), attr, None), property)
                 ]
         for attr in obj_attr:
             print(attr, ":", getattr(self, attr))
-            
+
+
+    def __setattr__(self, name, value):
+        """
+        Prevent changes to frozen Themes.
+        """
+        if self._frozen:
+            raise TypeError("Frozen Themes cannot be changed")
+        object.__setattr__(self, name, value)
+
 
     def __eq__(self, other):
         """
-        Comparison operator, for testing.
+        Comparison operator. Themes are equal if their formats, description
+        order and open time profile are equal. Frozen Themes are compared by
+        their fingerprints; editable Themes are compared attribute by
+        attribute, so that changes made directly to format dictionaries are
+        included.
         """
         # don't attempt to compare against unrelated types
         if not isinstance(other, Theme):
             return False
-        
-        obj_attr = [
-                attr for attr in self.__dir__()
-                if not attr.startswith('_')
-                and not callable(getattr(self, attr))
-                ]
-        return all([
-                getattr(self, attr) == getattr(other, attr)
-                for attr in obj_attr
-                ])
-        
\ No newline at end of file
+
+        if self._frozen and other._frozen:
+            return self.fingerprint == other.fingerprint
+        return self._get_content() == other._get_content()
+
+
+    def __hash__(self):
+        """
+        Hash of frozen Themes, from their fingerprint. Editable Themes can't
+        be hashed, as their fingerprint changes when they are updated.
+        """
+        if not self._frozen:
+            raise TypeError("unhashable Theme, use `freeze()` to get a hashable copy")
+        return hash(self.fingerprint)
+
+
+class ThemeRegistry:
+    """
+    Loads YAML theme configuration files once per process.
+
+    Parsed configurations are cached by path, and parsed again only if the
+    modification time or size of the file changes. ``Theme(path)`` uses the
+    configurations cached by ``theme_registry``, so loading the same theme for
+    many workbooks parses its file once.
+
+    Parameters
+    ----------
+    cache_dir : str or pathlib.Path, optional
+        directory to also store parsed configurations in, as JSON, so that
+        they are shared between processes. Not used by default.
+    """
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._configs = {}
+        self._themes = {}
+        self._gptheme = None
+        self._lock = threading.RLock()
+
+
+    @property
+    def gptheme(self):
+        """
+        The default theme, built from `gptheme.yaml` when first used.
+        """
+        with self._lock:
+            if self._gptheme is None:
+                self._gptheme = self.get_theme("gptheme").thaw()
+        return self._gptheme
+
+
+    def load_config(self, path):
+        """
+        Get the parsed configuration of a YAML theme file.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            path to the YAML file
+
+        Returns
+        -------
+        dict
+            copy of the parsed configuration, which can be changed freely
+        """
+        path, key = self._get_file_key(path)
+        with self._lock:
+            cached = self._configs.get(path)
+            if cached is None or cached[0] != key:
+                config = self._read_cache(path, key)
+                if config is None:
+                    with open(path, "r") as file:
+                        config = yaml.safe_load(file)
+                    self._write_cache(path, key, config)
+                cached = self._configs[path] = (key, config)
+        return deepcopy(cached[1])
+
+
+    def get_theme(self, config):
+        """
+        Get a frozen Theme from a YAML file, built once for each version of
+        the file.
+
+        Parameters
+        ----------
+        config : str or pathlib.Path
+            path to a YAML theme file, or the name of a built-in theme, such
+            as ``"gptheme"``
+
+        Returns
+        -------
+        gptables.Theme
+            frozen Theme, which can be shared. Use ``thaw()`` to get a copy
+            that can be updated.
+        """
+        config = str(config)
+        if not config.endswith((".yml", ".yaml")):
+            config = resource_filename("gptables", f"themes/{config}.yaml")
+
+        path, key = self._get_file_key(config)
+        with self._lock:
+            cached = self._themes.get(path)
+            if cached is None or cached[0] != key:
+                cached = self._themes[path] = (key, Theme(path).freeze())
+        return cached[1]
+
+
+    def clear(self):
+        """
+        Clear the configurations and Themes cached in this process.
+        """
+        with self._lock:
+            self._configs.clear()
+            self._themes.clear()
+
+
+    @staticmethod
+    def _get_file_key(path):
+        """
+        Get the absolute path of a file, and the modification time and size
+        that its cached configuration is valid for.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        return path, [stat.st_mtime_ns, stat.st_size]
+
+
+    def _get_cache_path(self, path):
+        """
+        Get the path that the configuration of a file is stored at in
+        `cache_dir`.
+        """
+        name = hashlib.sha256(path.encode()).hexdigest()[:32]
+        return Path(self.cache_dir) / f"{name}.json"
+
+
+    def _read_cache(self, path, key):
+        """
+        Read a configuration from `cache_dir`, if it was stored for the
+        current version of the file.
+        """
+        if self.cache_dir is None:
+            return None
+
+        try:
+            with open(self._get_cache_path(path), "r", encoding="utf-8") as file:
+                cached = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if cached.get("path") != path or cached.get("key") != key:
+            return None
+        return cached.get("config")
+
+
+    def _write_cache(self, path, key, config):
+        """
+        Store a configuration in `cache_dir`. The file is replaced atomically,
+        so that processes sharing the directory never read part of a file.
+        """
+        if self.cache_dir is None:
+            return None
+
+        cache_path = self._get_cache_path(path)
+        os.makedirs(cache_path.parent, exist_ok=True)
+        temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"path": path, "key": key, "config": config},
+                file,
+                separators=(",", ":"),
+                )
+        os.replace(temp_path, cache_path)
+
+
+theme_registry = ThemeRegistry()
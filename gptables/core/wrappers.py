@@ -3,23 +3,116 @@ import re
 import warnings
 import pandas as pd
 import numpy as np
-from copy import deepcopy
+from copy import copy, deepcopy
+from io import BytesIO
 
 from xlsxwriter.workbook import Workbook
+from xlsxwriter.utility import xl_col_to_name, xl_range
 from xlsxwriter.worksheet import Worksheet
+from xlsxwriter.exceptions import DuplicateWorksheetName
 
 from gptables.core.cover import Cover
 
-from .theme import Theme
-from .gptable import GPTable, FormatList
-from gptables.utils.unpickle_themes import gptheme
+from .theme import Theme, theme_registry
+from .gptable import GPTable, FormatList, _SHORT_COLUMN_ROWS
+from .compression import PartPackager, PartZipFile
 
 
+# Excel worksheet and workbook limits
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_COLUMNS = 16384
+EXCEL_MAX_FORMATS = 64000
+EXCEL_MAX_HYPERLINKS = 65530
+
+# Strings that XlsxWriter's `write()` converts to links
+_URL_PREFIX = re.compile("(ftp|http)s?://|mailto:|(in|ex)ternal:")
+
+# Rows of a table written by `GPWorksheet._write_array` at a time
+_WRITE_BLOCK_ROWS = 10000
+
+# Types of table body cells written directly to worksheet XML. Other cells are
+# written with `GPWorksheet._smart_write`.
+_BLANK, _NUMBER, _STRING, _OTHER = range(4)
+
+
+# Format properties that are visible in empty cells, so cannot be applied to
+# whole columns
+_VISIBLE_BLANK_PROPERTIES = [
+    "pattern", "bg_color", "fg_color", "border", "bottom", "top", "left",
+    "right", "diag_type", "diag_border",
+    ]
+
+_is_string = np.frompyfunc(lambda value: isinstance(value, str), 1, 1)
+
+def _get_format_keys(format_dicts):
+    """
+    Get a hashable key for each dictionary in an array of format
+    dictionaries. The key of a dictionary shared by several cells is made
+    once.
+    """
+    keys_by_id = {}
+
+    def get_key(format_dict):
+        key = keys_by_id.get(id(format_dict))
+        if key is None:
+            key = keys_by_id[id(format_dict)] = tuple(sorted(format_dict.items()))
+        return key
+
+    return np.frompyfunc(get_key, 1, 1)(format_dicts)
+
+
+_has_text_wrap = np.frompyfunc(lambda x: bool(x.get("text_wrap")), 1, 1)
+
+
+def _distinct_dicts(format_dicts):
+    """
+    Get the distinct dictionary objects in an array of format dictionaries,
+    which may be shared by several cells.
+    """
+    return list({id(format_dict): format_dict for format_dict in format_dicts}.values())
+
+
+def _replace_column(table, col, values):
+    """
+    Replace the column at position `col` of a table with an array of values,
+    which may be of a different dtype. The column is set by position, as
+    tables may have duplicate column headings.
+    """
+    # `DataFrame.isetitem` does this from pandas 1.5
+    columns = table.columns
+    table.columns = pd.RangeIndex(len(columns))
+    table[col] = values
+    table.columns = columns
+
+
+def _direct_cell_type(value):
+    """
+    Get the direct cell type of a value, before checking its content.
+    """
+    if value is None:
+        return _BLANK
+    if type(value) is str:
+        return _STRING
+    if isinstance(value, (bool, np.bool_)):
+        return _OTHER
+    if isinstance(value, (float, int, np.floating, np.integer)):
+        return _NUMBER
+    return _OTHER
+
+
+_direct_cell_types = np.frompyfunc(_direct_cell_type, 1, 1)
+
 class GPWorksheet(Worksheet):
     """
     Wrapper for an XlsxWriter Worksheet object. Provides a method for writing
     a good practice table (GPTable) to a Worksheet.
     """
+    def _initialize(self, init_data):
+        super(GPWorksheet, self)._initialize(init_data)
+        self._direct_xml = False
+        # Cells of table body rows, serialised by _write_rows
+        self._direct_rows = {}
+
     def write_cover(self, cover):
         """
         Write a cover page to the Worksheet. Uses text from a Cover object and
@@ -51,7 +144,7 @@ class GPWorksheet(Worksheet):
                   
         self.set_column(0, 0, cover.width)
 
-    def write_gptable(self, gptable, auto_width, reference_order=[]):
+    def write_gptable(self, gptable, auto_width, reference_order=[], auto_height=False):
         """
         Write data from a GPTable object to the worksheet using the workbook
         Theme object for formatting.
@@ -61,9 +154,15 @@ class GPWorksheet(Worksheet):
         gptable : gptables.GPTable
             object containing elements of the gptable to be written to the
             Worksheet
+        auto_width : bool
+            select if column widths should be determined automatically
         reference_order : list, optional
             order of annotations in workbook
             must be provided if gptable uses annotations
+        auto_height : bool, optional
+            select if table row heights should be calculated and set, so
+            that applications do not need to fit wrapped rows when the
+            workbook is opened
         Returns
         -------
         None
@@ -80,11 +179,20 @@ class GPWorksheet(Worksheet):
         # Write each GPTable element using appropriate Theme attr
         pos = [0, 0]
 
+        # Prepare the table once for all parts of a partitioned GPTable
+        if gptable._column_analysis is not None:
+            self._analyse_columns(gptable, reference_order)
+        else:
+            # Profile the table before it is copied, so the profile is kept
+            # for later writes
+            gptable._get_column_profile()
+
+        # Copy before modifying, so that the GPTable can be reused
+        gptable = gptable._copy_for_writing()
+
         self._reference_annotations(gptable, reference_order)
         self._parse_urls(gptable)
 
-        gptable = deepcopy(gptable)
-
         pos = self._write_element(
                 pos,
                 gptable.title,
@@ -109,9 +217,50 @@ class GPWorksheet(Worksheet):
                 pos,
                 gptable,
                 auto_width,
+                auto_height,
                 )
 
 
+    def _analyse_columns(self, gptable, reference_order):
+        """
+        Prepare the whole table of a GPTable part created by
+        `GPTable.partition_by` or `GPTable._split_rows`, and calculate column
+        alignments from it. The results are stored in the column analysis
+        shared by the parts, so are only calculated once for a workbook.
+
+        Parameters
+        ----------
+        gptable : gptables.GPTable
+            part of a GPTable
+        reference_order : list
+            order of annotations in workbook
+        """
+        analysis = gptable._column_analysis
+        if analysis.get("reference_order") == tuple(reference_order):
+            return None
+
+        whole = copy(gptable)
+        whole.__dict__["_rows"] = None
+        whole.__dict__["_column_analysis"] = None
+        column_profile = whole._get_column_profile()["columns"]
+        whole = whole._copy_for_writing()
+
+        self._reference_table_annotations(whole, reference_order)
+        self._parse_table_urls(whole)
+        self._validate_table(whole)
+
+        data = self._add_column_headings_row(whole.table)
+        index_columns = list(whole.index_columns.values())
+
+        analysis.pop("line_lengths", None)
+        analysis.update({
+            "reference_order": tuple(reference_order),
+            "table": whole.table,
+            "profile": column_profile,
+            "alignments": self._get_column_alignments(data, index_columns, column_profile),
+            })
+
+
     def _reference_annotations(self, gptable, reference_order):
         """
         Replace note references with numbered references and move to end of element.
@@ -148,7 +297,8 @@ class GPWorksheet(Worksheet):
                             reference_order
                             )
                     )
-        self._reference_table_annotations(gptable, reference_order)
+        if not gptable._table_prepared:
+            self._reference_table_annotations(gptable, reference_order)
 
 
     def _reference_table_annotations(self, gptable, reference_order):
@@ -163,15 +313,35 @@ class GPWorksheet(Worksheet):
                 )
         
         index_columns = gptable.index_columns.values()
+        column_profile = self._get_table_profile(gptable)
 
+        # Only cells that may contain references are replaced
         for col in index_columns:
-            table.iloc[:, col] = table.iloc[:, col].apply(
-                    lambda x: self._replace_reference_in_attr(x, reference_order)
+            rows = column_profile[col]["references"]
+            if len(rows) > 0 and isinstance(table.dtypes.iloc[col], pd.CategoricalDtype):
+                # Replaced labels may not be categories
+                _replace_column(table, col, table.iloc[:, col].to_numpy(dtype=object))
+            for row in rows:
+                table.iat[row, col] = self._replace_reference_in_attr(
+                    table.iat[row, col],
+                    reference_order
                     )
 
         setattr(gptable, "table", table)
 
 
+    @staticmethod
+    def _get_table_profile(gptable):
+        """
+        Get the profile of each column of the table of a GPTable. When a
+        GPTable is written, this is made before its table is copied and
+        modified, so it describes the table as it was provided.
+        """
+        if gptable._column_profile is None:
+            return gptable._get_column_profile()["columns"]
+        return gptable._column_profile["columns"]
+
+
     def _replace_reference_in_attr(self, data, reference_order):
         """
         Replaces references in a string or list/dict of strings. Works
@@ -282,7 +452,7 @@ class GPWorksheet(Worksheet):
                             attr_current,
                             )
                     )
-        if isinstance(sheet, GPTable):
+        if isinstance(sheet, GPTable) and not sheet._table_prepared:
             self._parse_table_urls(sheet)
     
     def _parse_table_urls(self, gptable):
@@ -290,15 +460,18 @@ class GPWorksheet(Worksheet):
         Parse URLs in table.
         """
         table = getattr(gptable, "table")
-        rows, columns = table.shape
+        column_profile = self._get_table_profile(gptable)
 
-        for c in range(columns):
-            for r in range(rows):
-                cell = self._replace_url_in_attr(table.iloc[r, c])
-                if isinstance(cell, dict):
-                    table.iloc[r, c] = [cell]
-                else:
-                    table.iloc[r, c] = cell
+        # Only cells that may contain links are parsed
+        for column, profile in zip(table.columns, column_profile):
+            if len(profile["links"]) == 0:
+                continue
+
+            cells = table[column].to_numpy(dtype=object, copy=True)
+            for row in profile["links"]:
+                cell = self._replace_url_in_attr(cells[row])
+                cells[row] = [cell] if isinstance(cell, dict) else cell
+            table[column] = cells
 
         setattr(gptable, "table", table)
     
@@ -454,7 +627,7 @@ class GPWorksheet(Worksheet):
         return self._write_element_list(pos, element_list, format_dict)
 
 
-    def _write_table_elements(self, pos, gptable, auto_width):
+    def _write_table_elements(self, pos, gptable, auto_width, auto_height=False):
         """
         Writes the table and units elements of a GPTable. Uses the
         Workbook Theme, plus any additional formatting associated with the
@@ -469,49 +642,18 @@ class GPWorksheet(Worksheet):
         auto_width : bool
             select if column widths should be determined automatically using
             length of text in index and columns
+        auto_height : bool, optional
+            select if row heights should be calculated from the number of
+            lines of text in each row
 
         Returns
         -------
         pos : list
             new position to write next element from
         """
-        # Convert whitespace only cells to None
-        gptable.table.replace({r'^\s*$': None}, inplace=True, regex=True)
-
-        if gptable.table.isna().values.all():
-            msg = (f"""
-            {gptable.table_name} contains only null or whitespace cells.
-            Please provide alternative table containing data.
-            """)
-            raise ValueError(msg)
-
-        if gptable.table.isna().all(axis=1).any():
-            msg = (f"""
-            Empty or null row found in {gptable.table_name}.
-            Please remove blank rows before passing data to GPTable.
-            """)
-            raise ValueError(msg)
-
-        if gptable.table.isna().values.any():
-            msg = (f"""
-            Empty or null cell found in {gptable.table_name}. The reason for
-            missingness should be included in the `GPTable.instructions` attribute.
-            There should only be one reason otherwise a shorthand should be
-            provided in the `instructions` or `legend` attribute.
-            Guidance on shorthand can be found at:
-            https://analysisfunction.civilservice.gov.uk/policy-store/symbols-in-tables-definitions-and-help/
-            """)
-            warnings.warn(msg)
-
-        # Raise error if any table element is only special characters
-        if gptable.table.astype("string").stack().str.contains('^[^a-zA-Z0-9]*$').any():
-            msg = (f"""
-            Cell found in {gptable.table_name} containing only special characters,
-            replace with alphanumeric characters before inputting to GPTable.
-            Guidance on symbols in tables can be found at:
-            https://analysisfunction.civilservice.gov.uk/policy-store/symbols-in-tables-definitions-and-help/
-            """)
-            raise ValueError(msg)
+        # Parts of a partitioned GPTable are validated as a whole
+        if not gptable._table_prepared:
+            self._validate_table(gptable)
 
         # Get theme
         theme = self.theme
@@ -522,20 +664,10 @@ class GPWorksheet(Worksheet):
         ## Create data array
         index_levels = gptable.index_levels
         index_columns = [col for col in gptable.index_columns.values()]
-        data = pd.DataFrame(gptable.table, copy=True)
-            
-        # Create row containing column headings
-        data.loc[-1] = data.columns
-        data.index = data.index + 1
-        data.sort_index(inplace=True)
+        data = self._add_column_headings_row(gptable.table)
         
         ## Create formats array
-        # pandas.DataFrame did NOT want to hold dictionaries, so be wary
-        formats = pd.DataFrame().reindex_like(data)
-        dict_row = [{} for n in range(formats.shape[1])]
-        for row in range(formats.shape[0]):
-            dict_row = [{} for n in range(formats.shape[1])]
-            formats.iloc[row] = dict_row
+        formats = self._new_format_table(data)
         
         ## Add Theme formatting to formats dataframe
         format_headings_from = 0
@@ -560,29 +692,378 @@ class GPWorksheet(Worksheet):
                 index_level_formats[level - 1]  # Account for 0-indexing
                 )
 
-        self._apply_column_alignments(data, formats, index_columns)
+        analysis = gptable._column_analysis
+        alignments = None
+        column_profile = None
+        if gptable._table_prepared:
+            alignments = analysis["alignments"]
+        else:
+            column_profile = self._get_table_profile(gptable)
+        self._apply_column_alignments(
+            data,
+            formats,
+            index_columns,
+            alignments,
+            column_profile
+            )
 
         ## Add additional table-specific formatting from GPTable
         self._apply_additional_formatting(
                 formats,
-                gptable.additional_formatting,
+                gptable._compiled_formatting,
                 gptable.index_levels
                 )
         
+        ## Calculate columns widths
+        widths = None
+        if auto_width:
+            if gptable._table_prepared:
+                if "line_lengths" not in analysis:
+                    analysis["line_lengths"] = self._get_profiled_line_lengths(
+                        analysis["table"],
+                        analysis["profile"]
+                        )
+                line_lengths = analysis["line_lengths"]
+            else:
+                line_lengths = self._get_profiled_line_lengths(
+                    gptable.table,
+                    column_profile
+                    )
+            widths = self._calculate_column_widths(data, formats, line_lengths)
+
+        ## Reduce the cost of opening the workbook
+        column_formats = None
+        if theme.open_time_profile:
+            column_formats = self._apply_open_time_profile(
+                data,
+                formats,
+                widths,
+                theme.open_time_profile
+                )
+
+        ## Leave the null fill cells of sparse columns to the column format
+        sparse_columns = self._get_null_fill_sparse_columns(gptable.table)
+        if column_formats is None and sparse_columns:
+            column_formats = self._collapse_column_formats(
+                data,
+                formats,
+                sparse_columns,
+                first_row=1
+                )
+
         ## Write table
         pos = self._write_array(pos, data, formats)
 
-        ## Set columns widths
-        if auto_width:
-            widths = self._calculate_column_widths(data, formats)
+        ## Set columns widths and formats
+        if widths is not None:
             self._set_column_widths(widths)
+        if column_formats is not None:
+            self._set_column_formats(column_formats)
+
+        ## Set row heights
+        if auto_height:
+            heights = self._calculate_row_heights(data, formats, widths)
+            self._set_row_heights(pos[0] - data.shape[0], heights)
 
         self._mark_data_as_worksheet_table(gptable, formats)
+        self._write_conditional_table_formats(gptable)
         
         return pos
 
 
-    def _apply_column_alignments(self, data_table, formats_table, index_columns):
+    def _apply_open_time_profile(self, data, formats, col_widths, profile):
+        """
+        Simplify the formats of a table to reduce the cost of opening the
+        workbook, as selected by a Theme's `open_time_profile`. Formats are
+        updated in place.
+
+        Parameters
+        ----------
+        data : pandas.DataFrame
+            table data, with column headings in the first row
+        formats : pandas.DataFrame
+            format dictionary of each cell of `data`
+        col_widths : list
+            width of each column, or None to use the widths set on the
+            worksheet
+        profile : dict
+            optimisations to apply, as for
+            :meth:`~.core.theme.Theme.update_open_time_profile`
+
+        Returns
+        -------
+        column_formats : list
+            format dictionary of each column, or None if column formats are
+            not used
+        """
+        if col_widths is None:
+            col_widths = self._get_column_widths(data.shape[1])
+
+        if profile.get("wrap_overflow_only"):
+            self._unwrap_fitting_cells(data, formats, col_widths)
+
+        if profile.get("max_formats"):
+            self._limit_formats(formats.iloc[1:, :], profile["max_formats"])
+
+        if profile.get("column_formats"):
+            return self._collapse_column_formats(data, formats, first_row=1)
+
+        return None
+
+
+    def _unwrap_fitting_cells(self, data, formats, col_widths):
+        """
+        Remove `text_wrap` from cells without line breaks whose text fits in
+        the width of their column.
+        """
+        for col in range(data.shape[1]):
+            format_dicts = formats.iloc[:, col].to_numpy(dtype=object, copy=True)
+            wrapped = np.flatnonzero(_has_text_wrap(format_dicts).astype(bool))
+            if len(wrapped) == 0:
+                continue
+
+            values = data.iloc[wrapped, col]
+            text_widths = (
+                values.map(self._longest_line_length).to_numpy(dtype=float)
+                * np.array([
+                    (format_dicts[row].get("font_size") or 10) * 0.12 - 0.09
+                    for row in wrapped
+                    ])
+                )
+            single_line = ~values.map(
+                lambda x: "\n" in self._get_cell_text(x)
+                ).to_numpy(dtype=bool)
+
+            unwrapped = {}
+            for row in wrapped[single_line & (text_widths <= col_widths[col])]:
+                format_dict = format_dicts[row]
+                if id(format_dict) not in unwrapped:
+                    unwrapped[id(format_dict)] = {
+                        key: value for key, value in format_dict.items()
+                        if key != "text_wrap"
+                        }
+                format_dicts[row] = unwrapped[id(format_dict)]
+
+            if unwrapped:
+                formats.iloc[:, col] = format_dicts
+
+
+    @staticmethod
+    def _limit_formats(formats, max_formats):
+        """
+        Limit the number of distinct formats in a table, by giving cells with
+        the least common formats the most common remaining format of their
+        column. Columns with no remaining format are left unchanged.
+        """
+        format_dicts = formats.to_numpy(dtype=object)
+        keys = _get_format_keys(format_dicts)
+        counts = pd.Series(keys.ravel()).value_counts()
+        if len(counts) <= max_formats:
+            return
+
+        kept = set(counts.index[:max_formats])
+        for col in range(format_dicts.shape[1]):
+            is_kept = np.array([key in kept for key in keys[:, col]], dtype=bool)
+            if is_kept.all() or not is_kept.any():
+                continue
+
+            # Cells sharing a dictionary have the same key, so are replaced
+            # together
+            replacement = dict(pd.Series(keys[is_kept, col]).value_counts().index[0])
+            for format_dict in _distinct_dicts(format_dicts[~is_kept, col]):
+                format_dict.clear()
+                format_dict.update(replacement)
+
+        msg = (f"{len(counts)} distinct formats in table reduced to"
+               f" {max_formats} by the theme's `open_time_profile`")
+        warnings.warn(msg)
+
+
+    @staticmethod
+    def _collapse_column_formats(data, formats, columns=None, first_row=0):
+        """
+        Find the most common format of each column of a table body. Where this
+        has no fill or border, blank cells with that format are given an empty
+        format, so that they are not written and show the column format.
+
+        Parameters
+        ----------
+        data : pandas.DataFrame
+            table data
+        formats : pandas.DataFrame
+            format dictionary of each cell of `data`
+        columns : list, optional
+            0-indexed numbers of the columns to collapse. Defaults to all
+            columns.
+        first_row : int, optional
+            position of the first row of the table body in `data`. Rows above
+            it, such as column headings, are left unchanged.
+
+        Returns
+        -------
+        column_formats : list
+            format dictionary of each column, empty where the column is not
+            collapsed
+        """
+        if columns is None:
+            columns = range(data.shape[1])
+
+        column_formats = [{} for _ in range(data.shape[1])]
+        for col in columns:
+            format_dicts = formats.iloc[first_row:, col].to_numpy(dtype=object, copy=True)
+            keys = _get_format_keys(format_dicts)
+            column_key = pd.Series(keys).value_counts().index[0] if len(keys) else ()
+            column_format = dict(column_key)
+
+            if any(key in _VISIBLE_BLANK_PROPERTIES for key in column_format):
+                continue
+
+            # Lists, dicts and rich text are never null. Blank cells may share
+            # a dictionary with other cells, so are given a new one.
+            is_blank = data.iloc[first_row:, col].isna().to_numpy(dtype=bool)
+            collapsed = is_blank & np.array([key == column_key for key in keys], dtype=bool)
+            if collapsed.any():
+                format_dicts[collapsed] = [{}]
+                formats.iloc[first_row:, col] = format_dicts
+
+            column_formats[col] = column_format
+
+        return column_formats
+
+
+    @staticmethod
+    def _get_null_fill_sparse_columns(table):
+        """
+        Get the 0-indexed numbers of the sparse columns of a table whose
+        fill value is null.
+        """
+        return [
+            col for col, dtype in enumerate(table.dtypes)
+            if isinstance(dtype, pd.SparseDtype) and pd.isna(dtype.fill_value)
+            ]
+
+
+    def _validate_table(self, gptable):
+        """
+        Convert whitespace only cells in the table of a GPTable to None, then
+        check that the table does not contain null rows or cells containing
+        only special characters.
+
+        Parameters
+        ----------
+        gptable : gptables.GPTable
+            object containing the table to validate
+        """
+        table = gptable.table
+        column_profile = self._get_table_profile(gptable)
+
+        # Convert whitespace only cells to None
+        for col, profile in enumerate(column_profile):
+            for row in profile["whitespace"]:
+                table.iat[row, col] = None
+
+        null_cells = [
+            np.union1d(profile["nulls"], profile["whitespace"])
+            for profile in column_profile
+            ]
+        null_counts = np.bincount(
+            np.concatenate([np.array([], dtype=np.intp), *null_cells]),
+            minlength=table.shape[0]
+            )
+
+        if all(len(cells) == table.shape[0] for cells in null_cells):
+            msg = (f"""
+            {gptable.table_name} contains only null or whitespace cells.
+            Please provide alternative table containing data.
+            """)
+            raise ValueError(msg)
+
+        if (null_counts == table.shape[1]).any():
+            msg = (f"""
+            Empty or null row found in {gptable.table_name}.
+            Please remove blank rows before passing data to GPTable.
+            """)
+            raise ValueError(msg)
+
+        if any(len(cells) > 0 for cells in null_cells):
+            msg = (f"""
+            Empty or null cell found in {gptable.table_name}. The reason for
+            missingness should be included in the `GPTable.instructions` attribute.
+            There should only be one reason otherwise a shorthand should be
+            provided in the `instructions` or `legend` attribute.
+            Guidance on shorthand can be found at:
+            https://analysisfunction.civilservice.gov.uk/policy-store/symbols-in-tables-definitions-and-help/
+            """)
+            warnings.warn(msg)
+
+        # Raise error if any table element is only special characters. Cells
+        # changed by preparation are checked again.
+        special_cells = False
+        for col, profile in enumerate(column_profile):
+            changed = np.union1d(profile["links"], profile["references"])
+            if len(np.setdiff1d(profile["special"], changed)) > 0:
+                special_cells = True
+                break
+            if len(changed) > 0 and (table.iloc[changed, col]
+                    .astype("string")
+                    .str.contains('^[^a-zA-Z0-9]*$')
+                    .fillna(False)
+                    .any()):
+                special_cells = True
+                break
+
+        if special_cells:
+            msg = (f"""
+            Cell found in {gptable.table_name} containing only special characters,
+            replace with alphanumeric characters before inputting to GPTable.
+            Guidance on symbols in tables can be found at:
+            https://analysisfunction.civilservice.gov.uk/policy-store/symbols-in-tables-definitions-and-help/
+            """)
+            raise ValueError(msg)
+
+
+    @staticmethod
+    def _add_column_headings_row(table):
+        """
+        Get a copy of a table with its column headings as the first row.
+        Columns of pandas string dtype with a string heading keep their
+        dtype, so ``string[pyarrow]`` columns are not converted to Python
+        strings. All other columns of the copy have object dtype. Rows of
+        tables without a default index are in index order.
+        """
+        index = table.index
+        if not (isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1):
+            table = table.sort_index().reset_index(drop=True)
+
+        # Build the columns directly, as appending a row with `loc` converts
+        # every column to objects and sorts the index
+        values = np.empty((table.shape[0] + 1, table.shape[1]), dtype=object)
+        string_columns = {}
+        for col, (heading, column) in enumerate(table.items()):
+            if isinstance(column.dtype, pd.StringDtype) and isinstance(heading, str):
+                string_columns[col] = pd.concat(
+                    [pd.Series([heading], dtype=column.dtype), column],
+                    ignore_index=True
+                    )
+                continue
+            values[0, col] = heading
+            values[1:, col] = column.to_numpy(dtype=object)
+
+        data = pd.DataFrame(values, columns=table.columns)
+        for col, column in string_columns.items():
+            _replace_column(data, col, column.array)
+
+        return data
+
+
+    def _apply_column_alignments(
+            self,
+            data_table,
+            formats_table,
+            index_columns,
+            alignments=None,
+            column_profile=None
+            ):
         """
         Add column alignment to format based on datatype
 
@@ -593,8 +1074,54 @@ class GPWorksheet(Worksheet):
         formats_table : pandas.DataFrame
             table with same dimensions as `data_table`,
             containing formating dictionaries
+        index_columns : list
+            0-indexed numbers of index columns
+        alignments : list, optional
+            alignment format for each column, if already calculated
+        column_profile : list, optional
+            profile of each column of the table, see
+            :meth:`~.core.gptable.GPTable._get_column_profile`
+
+        """
+        if alignments is None:
+            alignments = self._get_column_alignments(
+                data_table,
+                index_columns,
+                column_profile
+                )
+
+        for column, alignment_dict in zip(data_table.columns, alignments):
+            self._apply_format(formats_table[column], alignment_dict)
+
+
+    @staticmethod
+    def _get_column_alignments(data_table, index_columns, column_profile=None):
+        """
+        Get the alignment format for each column, based on datatype.
 
+        If the column profile of the table is given, only columns with
+        shorthand in their heading are checked, as any other heading makes a
+        column text. Shorthand cells in these columns are found from the
+        profile.
         """
+        if column_profile is not None:
+            alignments = []
+            for col, profile in enumerate(column_profile):
+                heading = data_table.iloc[0, col]
+                numeric = False
+                if (col not in index_columns and isinstance(heading, str)
+                        and re.search(r"\[[\w\s]+\]", heading)):
+                    # Links are no longer strings, so are not shorthand
+                    shorthand = np.setdiff1d(profile["shorthand"], profile["links"])
+                    body = data_table.iloc[1:, col].to_numpy(dtype=object, copy=True)
+                    body[shorthand] = np.nan
+                    column = pd.Series([np.nan, *body], dtype=object)
+                    numeric = pd.api.types.is_numeric_dtype(column.convert_dtypes())
+
+                alignments.append({"align": "right" if numeric else "left"})
+
+            return alignments
+
         # look for shorthand notation, usually a few letters in square brackets
         # will also find note markers eg [Note 1]
         # Using np.nan instead on None for backwards compatibility with pandas <=1.4
@@ -607,6 +1134,7 @@ class GPWorksheet(Worksheet):
 
         column_types = data_table_copy.dtypes
 
+        alignments = []
         for column in data_table.columns:
             if data_table.columns.get_loc(column) in index_columns:
                 alignment_dict = {"align": "left"}
@@ -617,63 +1145,56 @@ class GPWorksheet(Worksheet):
             else:
                 alignment_dict = {"align": "left"}
 
-            self._apply_format(formats_table[column], alignment_dict)
+            alignments.append(alignment_dict)
+
+        return alignments
 
 
     def _apply_additional_formatting(
             self,
             formats_table,
-            additional_formatting,
+            compiled_formatting,
             index_levels
             ):
         """
         Apply row, column and cell formatting to dataframe of formats.
-        """
-        for item in additional_formatting:
-            fmt_type = list(item.keys())[0]
-            format_desc = item[fmt_type]
-            
-            if fmt_type == "cell":
-                formatting = format_desc["format"]
-                cell_ilocs = format_desc["cells"]
-                if isinstance(cell_ilocs, tuple):
-                    cell_ilocs = [cell_ilocs]
-                for row, col in cell_ilocs:
-                    formats_table_slice = formats_table.iloc[row, col]
-                    
-                    self._apply_format(
-                        formats_table_slice,
-                        formatting
-                        )
-                return None
-            
-            if fmt_type == "column":
-                cols_iloc = [
-                        formats_table.columns.get_loc(col)
-                        if isinstance(col, str)
-                        else col
-                        for col in format_desc["columns"]
-                        ]
-                row_start = 0
-                if "include_names" in format_desc.keys():
-                    row_start = 0 if format_desc["include_names"] else 1
-    
-                formats_table_slice = formats_table.iloc[row_start:, cols_iloc]
-                formatting = format_desc["format"]
-
-            elif fmt_type == "row":
-                rows_iloc = format_desc["rows"]
-                col_start = 0
-                if "include_names" in format_desc.keys():
-                    col_start = 0 if format_desc["include_names"] else index_levels
-    
-                formats_table_slice = formats_table.iloc[rows_iloc, col_start:]
-                formatting = format_desc["format"]
-            
-            self._apply_format(
-                formats_table_slice,
-                formatting
-                )
+
+        The combined formatting of each cell is found from the compiled rules
+        using array operations, so that each cell's format dictionary is
+        updated once, however many rules select it.
+
+        Parameters
+        ----------
+        formats_table : pandas.DataFrame
+            dictionaries of formatting for each cell, including column
+            headings
+        compiled_formatting : gptables.core.gptable.CompiledFormatting
+            compiled `additional_formatting` of a GPTable
+        index_levels : int
+            number of index columns
+        """
+        if compiled_formatting is None or len(compiled_formatting) == 0:
+            return None
+
+        format_ids, combined_formats = compiled_formatting.get_format_ids(
+            formats_table.columns,
+            formats_table.shape[0],
+            index_levels
+            )
+
+        # Cells may share a dictionary with cells that are not formatted, so
+        # formatted cells are given new dictionaries, shared by the cells of
+        # a column with the same format
+        for col in np.flatnonzero(format_ids.any(axis=0)):
+            format_dicts = formats_table.iloc[:, col].to_numpy(dtype=object, copy=True)
+            formatted = {}
+            for row in np.flatnonzero(format_ids[:, col]):
+                format_dict = format_dicts[row]
+                key = (id(format_dict), format_ids[row, col])
+                if key not in formatted:
+                    formatted[key] = {**format_dict, **combined_formats[key[1]]}
+                format_dicts[row] = formatted[key]
+            formats_table.iloc[:, col] = format_dicts
 
 
     def _write_array(self, pos, data, formats):
@@ -700,21 +1221,360 @@ class GPWorksheet(Worksheet):
             raise ValueError("data and formats arrays must be of equal shape")
         
         rows, cols = data.shape
+        if (self._direct_xml and rows > 1
+                and not self.constant_memory and not self.write_handlers):
+            # Column headings are left to XlsxWriter, as add_table sets them
+            self._write_array(pos, data.iloc[:1], formats.iloc[:1])
+            self._store_direct_rows([pos[0] + 1, pos[1]], data.iloc[1:], formats.iloc[1:])
+            return [pos[0] + rows, 0]
+
+        format_columns = list(formats.to_numpy(dtype=object).T)
+
+        for start in range(0, rows, _WRITE_BLOCK_ROWS):
+            stop = min(start + _WRITE_BLOCK_ROWS, rows)
+
+            # Cells are read from each column's array, rather than with
+            # `iloc`. Columns of string dtype are converted to Python strings
+            # a block of rows at a time.
+            data_columns = [
+                column.iloc[start:stop].to_numpy(dtype=object)
+                if isinstance(column.dtype, pd.StringDtype)
+                else column.array[start:stop]
+                for _, column in data.items()
+                ]
+
+            for row in range(start, stop):
+                for col in range(cols):
+                    cell_data = data_columns[col][row - start]
+                    cell_format_dict = format_columns[col][row]
+
+                    # Blank cells without formatting are not written
+                    if (not cell_format_dict and not isinstance(cell_data, list)
+                            and pd.isna(cell_data)):
+                        continue
+
+                    self._smart_write(
+                        pos[0] + row,
+                        pos[1] + col,
+                        cell_data,
+                        cell_format_dict
+                        )
+        
+        pos = [pos[0] + rows, 0]
+        
+        return pos
+
+
+    def _store_direct_rows(self, pos, data, formats):
+        """
+        Store the plain cells of a table body, to be serialised directly to
+        worksheet XML by `_write_rows`. Plain cells are numbers, strings and
+        blanks; other cells, such as links and rich text, are written with
+        `_smart_write`.
+
+        Cells are classified a column at a time and share one Format per
+        distinct format dictionary, avoiding XlsxWriter's per-cell `write()`
+        dispatch and cell table. Shared string indices are precomputed from
+        the distinct strings of each column by `_index_shared_strings`.
+
+        Parameters
+        ----------
+        pos : list
+            the position of the top left cell of the body
+        data : pandas.DataFrame
+            array of data to be written to Worksheet
+        formats : pandas.DataFrame
+            array of dictionaries that specify the formatting to be applied
+            to each cell of data
+        """
+        rows, cols = data.shape
+        columns = [
+            self._classify_direct_string_column(column)
+            if isinstance(column.dtype, pd.StringDtype)
+            else self._classify_direct_column(column.to_numpy(dtype=object))
+            for _, column in data.items()
+            ]
+        self._index_shared_strings(pos, data, formats, columns)
+
+        format_dicts = [formats.iloc[:, col].to_numpy(dtype=object) for col in range(cols)]
+        cell_types = [column[0].tolist() for column in columns]
+        cell_values = [column[1].tolist() for column in columns]
+        cell_formats = {}
+
         for row in range(rows):
+            cells = []
             for col in range(cols):
-                cell_data = data.iloc[row, col]
-                cell_format_dict = formats.iloc[row, col]
+                cell_type = cell_types[col][row]
+                if cell_type == _OTHER:
+                    continue
+
+                format_dict = format_dicts[col][row]
+                if cell_type == _BLANK and not format_dict:
+                    continue
+                key = tuple(sorted(format_dict.items()))
+                cell_format = cell_formats.get(key)
+                if cell_format is None:
+                    cell_format = self._workbook.add_format(format_dict)
+                    cell_formats[key] = cell_format
+                cells.append((pos[1] + col, cell_type, cell_values[col][row], cell_format))
+
+            if cells:
+                self._direct_rows[pos[0] + row] = cells
+
+        self._check_dimensions(pos[0], pos[1])
+        self._check_dimensions(pos[0] + rows - 1, pos[1] + cols - 1)
+
+
+    def _classify_direct_column(self, values):
+        """
+        Get the cell type of each value in a column, as `write()` would store
+        it, using array operations.
+
+        Strings are factorized with ``pd.factorize``, so that each distinct
+        string is checked once.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            object array of cell values
+
+        Returns
+        -------
+        cell_types : numpy.ndarray
+            `_BLANK`, `_NUMBER`, `_STRING` or `_OTHER` for each cell
+        cell_values : numpy.ndarray
+            number to write for each number cell
+        string_codes : numpy.ndarray
+            position in `strings` of each string cell, or -1
+        strings : numpy.ndarray
+            distinct strings, in order of first appearance
+        """
+        cell_types = _direct_cell_types(values).astype(np.int8)
+        cell_values = np.zeros(len(values))
+
+        numbers = np.flatnonzero(cell_types == _NUMBER)
+        cell_values[numbers] = values[numbers].astype(float)
+        nan = np.isnan(cell_values[numbers])
+        inf = np.isinf(cell_values[numbers])
+        cell_types[numbers[nan]] = _BLANK
+        cell_types[numbers[inf]] = _OTHER
+
+        string_codes = np.full(len(values), -1)
+        string_cells = np.flatnonzero(cell_types == _STRING)
+        codes, strings = pd.factorize(values[string_cells])
+        string_types = np.array(
+            [self._get_string_type(string) for string in strings],
+            dtype=np.int8
+            )
+        cell_types[string_cells] = string_types[codes]
+        string_codes[string_cells] = codes
+
+        return cell_types, cell_values, string_codes, strings
 
+
+    def _classify_direct_string_column(self, column):
+        """
+        Get the cell type of each value in a column of pandas string dtype,
+        as for `_classify_direct_column`. The column is factorized without
+        converting it to objects, so only its distinct strings become Python
+        strings. Missing values are blank.
+        """
+        string_codes, strings = pd.factorize(column)
+        strings = strings.to_numpy(dtype=object)
+        string_types = np.array(
+            [self._get_string_type(string) for string in strings] + [_BLANK],
+            dtype=np.int8
+            )
+
+        # Missing values have code -1, which selects the last type
+        cell_types = string_types[string_codes]
+        cell_values = np.zeros(len(column))
+
+        return cell_types, cell_values, string_codes, strings
+
+
+    def _get_string_type(self, string):
+        """
+        Get the cell type that `write()` would store a string as.
+        """
+        if string == "":
+            return _BLANK
+        if (len(string) > self.xls_strmax
+                or (self.strings_to_formulas and string.startswith("="))
+                or (string.startswith("{=") and string.endswith("}"))
+                or (":" in string and self.strings_to_urls
+                    and _URL_PREFIX.match(string))
+                or self.strings_to_numbers):
+            return _OTHER
+        return _STRING
+
+
+    def _index_shared_strings(self, pos, data, formats, columns):
+        """
+        Add the distinct strings of classified body columns to the
+        workbook's shared string table, and write the cells that are not
+        plain.
+
+        New strings and cells that are not plain are processed in row-major
+        order, so that shared strings are numbered as `write()` would number
+        them. Each distinct string costs one lookup in the workbook-wide
+        table, however many cells it is written to, and the values of string
+        cells in `columns` are set to their indices in bulk.
+
+        Parameters
+        ----------
+        pos : list
+            the position of the top left cell of the body
+        data : pandas.DataFrame
+            array of data to be written to Worksheet
+        formats : pandas.DataFrame
+            array of dictionaries that specify the formatting to be applied
+            to each cell of data
+        columns : list
+            output of `_classify_direct_column` for each column
+        """
+        str_table = self.str_table
+        string_table = str_table.string_table
+
+        events = []
+        for col, (cell_types, _, string_codes, strings) in enumerate(columns):
+            plain = np.zeros(len(strings), dtype=bool)
+            plain[string_codes[cell_types == _STRING]] = True
+            codes, first_rows = np.unique(string_codes, return_index=True)
+            for code, row in zip(codes.tolist(), first_rows.tolist()):
+                if code >= 0 and plain[code] and strings[code] not in string_table:
+                    events.append((row, col, strings[code]))
+            for row in np.flatnonzero(cell_types == _OTHER).tolist():
+                events.append((row, col, None))
+
+        for row, col, string in sorted(events, key=lambda event: event[:2]):
+            if string is None:
                 self._smart_write(
                     pos[0] + row,
                     pos[1] + col,
-                    cell_data,
-                    cell_format_dict
+                    data.iat[row, col],
+                    formats.iat[row, col]
                     )
-        
-        pos = [pos[0] + rows, 0]
-        
-        return pos
+            elif string not in string_table:
+                string_table[string] = str_table.unique_count
+                str_table.unique_count += 1
+
+        for cell_types, cell_values, string_codes, strings in columns:
+            string_cells = np.flatnonzero(cell_types == _STRING)
+            if len(string_cells) == 0:
+                continue
+            indices = np.array([string_table.get(string, -1) for string in strings])
+            cell_values[string_cells] = indices[string_codes[string_cells]]
+            str_table.count += len(string_cells)
+
+
+    def _calculate_spans(self):
+        """
+        Overwrite _calculate_spans() to include cells stored by
+        `_store_direct_rows`.
+        """
+        if not self._direct_rows:
+            return super(GPWorksheet, self)._calculate_spans()
+
+        spans = {}
+        span_min = None
+        span_max = None
+
+        for row_num in range(self.dim_rowmin, self.dim_rowmax + 1):
+            cols = []
+            if row_num in self.table:
+                cols.extend(self.table[row_num])
+            if row_num in self.comments:
+                cols.extend(self.comments[row_num])
+            if row_num in self._direct_rows:
+                direct_cells = self._direct_rows[row_num]
+                cols.extend([direct_cells[0][0], direct_cells[-1][0]])
+
+            if cols:
+                if span_min is None:
+                    span_min = min(cols)
+                    span_max = max(cols)
+                else:
+                    span_min = min(span_min, *cols)
+                    span_max = max(span_max, *cols)
+
+            if ((row_num + 1) % 16 == 0) or row_num == self.dim_rowmax:
+                if span_min is not None:
+                    spans[int(row_num / 16)] = "%s:%s" % (span_min + 1, span_max + 1)
+                    span_min = None
+
+        self.row_spans = spans
+
+
+    def _write_rows(self):
+        """
+        Overwrite _write_rows() to serialise cells stored by
+        `_store_direct_rows`, alongside cells stored by XlsxWriter.
+        """
+        if not self._direct_rows:
+            return super(GPWorksheet, self)._write_rows()
+
+        self._calculate_spans()
+
+        col_names = {}
+        xf_indices = {}
+
+        for row_num in range(self.dim_rowmin, self.dim_rowmax + 1):
+            direct_cells = self._direct_rows.get(row_num)
+            if not (
+                direct_cells
+                or row_num in self.set_rows
+                or row_num in self.comments
+                or self.table[row_num]
+            ):
+                continue
+
+            span = self.row_spans.get(int(row_num / 16))
+
+            if not (direct_cells or self.table[row_num]):
+                # Blank row with attributes or comments only.
+                self._write_empty_row(row_num, span, self.set_rows[row_num])
+                continue
+
+            self._write_row(row_num, span, self.set_rows.get(row_num))
+
+            cells = [
+                (col_num, _OTHER, cell, None)
+                for col_num, cell in self.table[row_num].items()
+                ]
+            if direct_cells:
+                cells.extend(
+                    cell for cell in direct_cells
+                    if cell[0] not in self.table[row_num]
+                    )
+                cells.sort(key=lambda cell: cell[0])
+
+            xml = []
+            for col_num, cell_type, value, cell_format in cells:
+                if cell_type == _OTHER:
+                    if xml:
+                        self.fh.write("".join(xml))
+                        xml = []
+                    self._write_cell(row_num, col_num, value)
+                    continue
+
+                if col_num not in col_names:
+                    col_names[col_num] = xl_col_to_name(col_num)
+                # Index formats in the order XlsxWriter would, while writing
+                if id(cell_format) not in xf_indices:
+                    xf_indices[id(cell_format)] = cell_format._get_xf_index()
+                ref = "%s%d" % (col_names[col_num], row_num + 1)
+                xf_index = xf_indices[id(cell_format)]
+
+                if cell_type == _NUMBER:
+                    xml.append('<c r="%s" s="%d"><v>%.16G</v></c>' % (ref, xf_index, value))
+                elif cell_type == _STRING:
+                    xml.append('<c r="%s" s="%d" t="s"><v>%d</v></c>' % (ref, xf_index, value))
+                else:
+                    xml.append('<c r="%s" s="%d"/>' % (ref, xf_index))
+
+            self.fh.write("".join(xml))
+            self._xml_end_tag("row")
 
 
     def _mark_data_as_worksheet_table(self, gptable, formats_dataframe):
@@ -729,12 +1589,32 @@ class GPWorksheet(Worksheet):
             DataFrame with same dimensions as gptable.table, containing
             formatting dictionaries
         """
-        data_range = gptable.data_range
+        self._add_worksheet_table(
+            gptable.data_range,
+            gptable.table.columns.tolist(),
+            formats_dataframe.iloc[0, :].tolist(),
+            gptable.table_name
+            )
 
-        column_list = gptable.table.columns.tolist()
+
+    def _add_worksheet_table(self, data_range, column_list, header_formats, table_name):
+        """
+        Add a Worksheet Table with column headings and no styling.
+
+        Parameters
+        ----------
+        data_range : list
+            top-left and bottom-right cell of the table, including headings
+        column_list : list
+            column headings
+        header_formats : list
+            dictionary of formatting for each column heading
+        table_name : str
+            name of the table
+        """
         formats_list = [
             self._workbook.add_format(format_dict)
-            for format_dict in formats_dataframe.iloc[0, :].tolist()
+            for format_dict in header_formats
         ]
 
         column_headers = [
@@ -747,10 +1627,69 @@ class GPWorksheet(Worksheet):
                         'autofilter': False,
                         'columns': column_headers,
                         'style': None,
-                        'name': gptable.table_name
+                        'name': table_name
                         })
 
 
+    def _write_conditional_table_formats(self, gptable):
+        """
+        Add each conditional `additional_formatting` item of a GPTable as a
+        single conditional format over the table body, so that its size does
+        not depend on the number of rows.
+
+        Parameters
+        ----------
+        gptable : gptables.GPTable
+            object containing the table and additional formatting data
+        """
+        compiled_formatting = gptable._compiled_formatting
+        if compiled_formatting is None or not compiled_formatting.conditional:
+            return None
+
+        first_row, first_col, last_row, _ = gptable.data_range
+        if last_row == first_row:  # Column headings only
+            return None
+
+        conditional_formats = compiled_formatting.get_conditional_formats(
+            gptable.table.columns,
+            first_row + 1
+            )
+        for formula, columns, format_dict in conditional_formats:
+            # One range per run of consecutive columns
+            runs = np.split(columns, np.flatnonzero(np.diff(columns) != 1) + 1)
+            ranges = [
+                [first_row + 1, first_col + run[0], last_row, first_col + run[-1]]
+                for run in runs
+                ]
+            self._add_conditional_format(ranges, formula, format_dict)
+
+
+    def _add_conditional_format(self, ranges, formula, format_dict):
+        """
+        Add a formula conditional format over one or more cell ranges.
+
+        Parameters
+        ----------
+        ranges : list
+            first row, first column, last row and last column of each range
+        formula : str
+            Excel formula, relative to the top-left cell of the first range
+        format_dict : dict
+            formatting applied to cells where the formula is true
+        """
+        options = {
+            "type": "formula",
+            "criteria": formula,
+            "format": self._workbook.add_format(format_dict),
+            }
+        if len(ranges) > 1:
+            options["multi_range"] = " ".join(
+                xl_range(*cell_range) for cell_range in ranges
+                )
+
+        self.conditional_format(*ranges[0], options)
+
+
     def _smart_write(self, row, col, data, format_dict, *args):
         """
         Depending on the input data, this function will write rich strings or
@@ -904,21 +1843,39 @@ class GPWorksheet(Worksheet):
         )
 
 
+    @staticmethod
+    def _new_format_table(data):
+        """
+        Get a table of empty format dictionaries with the shape of `data`,
+        which has column headings in its first row. Each heading has its own
+        dictionary, and the body cells of each column share one, so that
+        formatting applied to whole columns is stored once per column.
+        Formatting of individual cells gives those cells new dictionaries.
+        """
+        rows, cols = data.shape
+        format_dicts = np.empty((rows, cols), dtype=object)
+        for col in range(cols):
+            format_dicts[:1, col] = [{}]
+            format_dicts[1:, col] = [{}]
+
+        return pd.DataFrame(format_dicts, index=data.index, columns=data.columns)
+
+
     @staticmethod
     def _apply_format(format_table_slice, format_dict):
         """
         Update all cells of a given dataframe slice with the format
         dictionary. Handles dict, series or dataframes.
+
+        Cells that share a dictionary, as in tables from `_new_format_table`,
+        are updated together, so a slice must include every cell sharing the
+        dictionaries it holds.
         """
-        if isinstance(format_table_slice, pd.Series):
-            (format_table_slice
-             .apply(lambda d: d.update(format_dict))
-             )
-        elif isinstance(format_table_slice, pd.DataFrame):
-            # Vectorised for 2D
-            (format_table_slice
-             .apply(np.vectorize(lambda d: d.update(format_dict)))
-             )
+        if isinstance(format_table_slice, (pd.Series, pd.DataFrame)):
+            # Cells are updated in place, so iterate over the dictionaries
+            # rather than using `apply`
+            for d in _distinct_dicts(format_table_slice.to_numpy(dtype=object).ravel()):
+                d.update(format_dict)
         elif isinstance(format_table_slice, dict):
             format_table_slice.update(format_dict)
 
@@ -935,7 +1892,145 @@ class GPWorksheet(Worksheet):
             )
 
 
-    def _calculate_column_widths(self, table, formats_table):
+    def _get_column_widths(self, cols):
+        """
+        Get the widths already set on the first `cols` columns of the
+        worksheet, or the default width where none has been set.
+        """
+        return [
+            (self.col_info.get(col) or [None])[0] or self.default_col_width
+            for col in range(cols)
+            ]
+
+
+    def _set_column_formats(self, column_formats):
+        """
+        Set the format of each column, keeping any width already set. Columns
+        with an empty format dictionary are left unformatted.
+        """
+        for col, format_dict in enumerate(column_formats):
+            if format_dict:
+                width = (self.col_info.get(col) or [None])[0]
+                self.set_column(col, col, width, self._workbook.add_format(format_dict))
+
+
+    def _set_row_heights(self, first_row, heights):
+        """
+        Set the heights of consecutive rows, starting from `first_row`.
+        """
+        for n, height in enumerate(heights):
+            self.set_row(first_row + n, height)
+
+
+    def _calculate_row_heights(self, table, formats_table, col_widths=None):
+        """
+        Estimate the height of each row of a table in points, from the number
+        of lines of text in each cell and its font size. Text in cells
+        formatted with `text_wrap` has a line for each line break, plus extra
+        lines where a line is wider than its column.
+
+        Parameters
+        ----------
+        table : pd.DataFrame
+            data table to calculate heights from
+        formats_table: pd.DataFrame
+            formats table to retrieve font size and text wrapping from
+        col_widths : list, optional
+            width of each column, in Excel character units. If None, widths
+            already set on the worksheet, or the default width, are used.
+
+        Returns
+        -------
+        heights : list
+            height to apply to each row, in points
+        """
+        rows, cols = table.shape
+        if col_widths is None:
+            col_widths = self._get_column_widths(cols)
+
+        heights = np.zeros(rows)
+        for col in range(cols):
+            format_dicts = formats_table.iloc[:, col]
+            font_sizes = format_dicts.map(
+                lambda x: x.get("font_size") or 10
+                ).to_numpy(dtype=float)
+            wrapped = format_dicts.map(
+                lambda x: bool(x.get("text_wrap"))
+                ).to_numpy(dtype=bool)
+
+            lines = np.ones(rows)
+            if wrapped.any():
+                lines[wrapped] = self._count_lines(
+                    table.iloc[np.flatnonzero(wrapped), col].to_numpy(dtype=object),
+                    font_sizes[wrapped],
+                    col_widths[col]
+                    )
+
+            heights = np.maximum(heights, lines * self._excel_line_height(font_sizes))
+
+        return heights.tolist()
+
+
+    def _count_lines(self, values, font_sizes, col_width):
+        """
+        Count the lines that wrapped cells are displayed on, using array
+        operations on the lines of all cells.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            cell values
+        font_sizes : numpy.ndarray
+            font size of each cell
+        col_width : float
+            column width, in Excel character units
+
+        Returns
+        -------
+        lines : numpy.ndarray
+            number of lines in each cell
+        """
+        texts = pd.Series([self._get_cell_text(value) for value in values])
+        cell_lines = texts.str.split(r"\r\n|\n|\r", regex=True).explode()
+        line_lengths = cell_lines.str.len().to_numpy(dtype=float)
+
+        if col_width > 0:
+            line_widths = line_lengths * (font_sizes[cell_lines.index] * 0.12 - 0.09)
+            line_counts = np.maximum(1, np.ceil(line_widths / col_width))
+        else:
+            line_counts = np.ones(len(line_lengths))
+
+        return np.bincount(cell_lines.index, weights=line_counts, minlength=len(values))
+
+
+    @staticmethod
+    def _excel_line_height(font_size):
+        """
+        Calculate the rough height of a line of text in points, rounded up
+        to a whole pixel (0.75 points) as Excel does.
+        """
+        return np.ceil(np.asarray(font_size) * 1.25 / 0.75) * 0.75
+
+
+    @classmethod
+    def _get_cell_text(cls, cell_val):
+        """
+        Get the text displayed in a cell, as written by `_smart_write`.
+        """
+        if isinstance(cell_val, str):
+            return cell_val
+        if isinstance(cell_val, dict):
+            return list(cell_val)[0]
+        if isinstance(cell_val, FormatList):
+            return cell_val.string
+        if isinstance(cell_val, list):
+            return "\n".join(cls._get_cell_text(element) for element in cell_val)
+        if cell_val is None or (isinstance(cell_val, float) and np.isnan(cell_val)):
+            return ""
+        return str(cell_val)
+
+
+    def _calculate_column_widths(self, table, formats_table, line_lengths=None):
         """
         Calculate Excel column widths using maximum length of strings
         and the maximum font size in each column of the data table.
@@ -946,6 +2041,10 @@ class GPWorksheet(Worksheet):
             data table to calculate widths from
         formats_table: pd.DataFrame
             formats table to retrieve font size from
+        line_lengths : list, optional
+            longest line length in each column of the table data, if already
+            calculated. Column headings in the first row of `table` are
+            still measured.
 
         Returns 
         -------
@@ -953,15 +2052,17 @@ class GPWorksheet(Worksheet):
             width to apply to Excel columns
         """
         cols = table.shape[1]
-        max_lengths = [
-            table.iloc[:, col].apply(self._longest_line_length).max()
-            for col in range(cols)
-            ]
+        if line_lengths is None:
+            max_lengths = self._get_longest_line_lengths(table)
+        else:
+            max_lengths = [
+                max(self._longest_line_length(table.iloc[0, col]), line_lengths[col])
+                for col in range(cols)
+                ]
 
         max_font_sizes = [
-            formats_table.iloc[:, col]
-            .apply(lambda x: x.get("font_size") or 10).max()
-            for col in range(cols)
+            max(x.get("font_size") or 10 for x in column)
+            for column in formats_table.to_numpy(dtype=object).T
             ]
 
         col_widths = [
@@ -970,6 +2071,119 @@ class GPWorksheet(Worksheet):
             ]
         return col_widths
 
+
+    def _get_profiled_line_lengths(self, table, column_profile):
+        """
+        Get the length of the longest line in each column of a prepared
+        table. The longest line of the cells left unchanged by preparation is
+        measured once and stored in the column profile, so only cells that
+        may have changed (links, references and whitespace) are measured for
+        each write.
+
+        Parameters
+        ----------
+        table : pandas.DataFrame
+            table prepared for writing, without column headings
+        column_profile : list
+            profile of each column of the table as it was provided
+
+        Returns
+        -------
+        line_lengths : list
+            length of the longest line in each column
+        """
+        line_lengths = []
+        for col, profile in enumerate(column_profile):
+            changed = np.union1d(
+                np.union1d(profile["links"], profile["references"]),
+                profile["whitespace"]
+                )
+
+            if "max_line_length" not in profile:
+                column = table.iloc[:, col]
+                if len(changed) > 0:
+                    column = column.iloc[np.setdiff1d(np.arange(len(column)), changed)]
+                profile["max_line_length"] = self._get_longest_line_length(column)
+
+            changed_length = 0
+            if len(changed) > 0:
+                changed_length = self._get_longest_line_length(table.iloc[changed, col])
+            line_lengths.append(max(profile["max_line_length"], changed_length))
+
+        return line_lengths
+
+
+    def _get_longest_line_length(self, column):
+        """
+        Get the length of the longest line in a column, as for
+        `_longest_line_length`. Lines of strings, and numbers in integer,
+        boolean and float64 columns, are measured with array operations.
+        Sparse columns are measured from their stored values and fill value,
+        and categorical and string dtype columns from their distinct values.
+        """
+        if len(column) == 0:
+            return 0
+
+        dtype = column.dtype
+        if isinstance(dtype, pd.SparseDtype):
+            # Measure the stored values, and the fill value once
+            array = column.array
+            max_length = self._get_longest_line_length(pd.Series(array.sp_values))
+            if array.sp_index.ngaps > 0:
+                max_length = max(max_length, self._longest_line_length(array.fill_value))
+            return max_length
+
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Measure each category present once
+            codes = np.unique(column.cat.codes.to_numpy())
+            categories = column.cat.categories.to_numpy(dtype=object)
+            max_length = self._get_longest_line_length(
+                pd.Series(categories[codes[codes >= 0]], dtype=object)
+                )
+            if codes[0] < 0:
+                max_length = max(max_length, self._longest_line_length(np.nan))
+            return max_length
+
+        if isinstance(dtype, pd.StringDtype):
+            # Measure each distinct string once
+            codes, strings = pd.factorize(column)
+            max_length = self._get_longest_line_length(
+                pd.Series(strings.to_numpy(dtype=object), dtype=object)
+                )
+            if (codes < 0).any():
+                max_length = max(max_length, self._longest_line_length(dtype.na_value))
+            return max_length
+
+        if isinstance(dtype, np.dtype) and (dtype.kind in "iub" or dtype == np.float64):
+            return int(np.char.str_len(column.to_numpy().astype(str)).max())
+
+        values = column.to_numpy(dtype=object)
+        if len(values) <= _SHORT_COLUMN_ROWS:
+            return max(self._longest_line_length(value) for value in values)
+
+        is_string = _is_string(values).astype(bool)
+        max_length = 0
+        if is_string.any():
+            lines = pd.Series(values[is_string], dtype=object).str.split(r"\r\n|\n").explode()
+            max_length = int(lines.str.len().max())
+        if not is_string.all():
+            max_length = max(
+                max_length,
+                max(self._longest_line_length(value) for value in values[~is_string])
+                )
+
+        return max_length
+
+
+    def _get_longest_line_lengths(self, table):
+        """
+        Get the length of the longest line in each column of a table.
+        """
+        return [
+            table.iloc[:, col].apply(self._longest_line_length).max()
+            for col in range(table.shape[1])
+            ]
+
         
     @staticmethod
     def _excel_string_width(string_len, font_size):
@@ -1043,14 +2257,99 @@ class GPWorkbook(Workbook):
     """
     Wrapper for and XlsxWriter Workbook object. The Worksheets class has been
     replaced by an alternative with a method for writting GPTable objects.
+
+    In addition to the XlsxWriter Workbook `options`, the following options
+    control how the `.xlsx` container is compressed by ``close()``:
+
+    * ``compression_level`` - zlib compression level from 0 to 9. 0 stores
+      parts without compression, which is fastest for intermediate builds.
+    * ``compression_workers`` - number of threads used to compress workbook
+      parts in parallel.
+
+    If neither option is set, XlsxWriter's default serial compression is used.
+
+    The ``direct_xml`` option writes the plain number and string cells of
+    table bodies straight to worksheet XML, rather than through XlsxWriter's
+    cell table. The workbook written is the same.
     """
 
+    worksheet_class = GPWorksheet
+    _formats_by_key = None
+    _packager = None
+
     def __init__(self, filename=None, options={}):
         super(GPWorkbook, self).__init__(filename=filename, options=options)
         self.theme = None
         self._annotations = None
+        self.compression_level = options.get("compression_level")
+        self.compression_workers = options.get("compression_workers")
+        self.direct_xml = options.get("direct_xml", False)
+        self._formats_by_key = {}
+        self._sheetnames = set()
         # Set default theme
-        self.set_theme(gptheme)
+        self.set_theme(theme_registry.gptheme)
+
+
+    def add_format(self, properties=None):
+        """
+        Overwrite add_format() to return one Format for each distinct set of
+        format properties, so that cells with the same format dictionary
+        share a Format and its style index is found once.
+
+        Parameters
+        ----------
+        properties : dict, optional
+            XlsxWriter format properties
+
+        Returns
+        -------
+        format : xlsxwriter.format.Format
+        """
+        # Formats added by XlsxWriter when the Workbook is created are not
+        # shared
+        if self._formats_by_key is None:
+            return super(GPWorkbook, self).add_format(properties)
+
+        try:
+            key = tuple(sorted((properties or {}).items()))
+            cell_format = self._formats_by_key.get(key)
+        except TypeError:
+            # Unhashable property values are not shared
+            return super(GPWorkbook, self).add_format(properties)
+
+        if cell_format is None:
+            cell_format = super(GPWorkbook, self).add_format(properties)
+            self._formats_by_key[key] = cell_format
+
+        return cell_format
+
+
+    def _check_sheetname(self, sheetname, is_chartsheet=False):
+        """
+        Overwrite _check_sheetname() to check that sheet names are unique
+        against a set of the names in use, rather than by comparing with
+        every existing sheet, so that adding many sheets takes linear time.
+        """
+        # XlsxWriter's checks are run without the existing sheets, which it
+        # would compare the name against one by one
+        worksheets = self.worksheets_objs
+        self.worksheets_objs = []
+        try:
+            sheetname = super(GPWorkbook, self)._check_sheetname(
+                sheetname,
+                is_chartsheet
+                )
+        finally:
+            self.worksheets_objs = worksheets
+
+        if sheetname.lower() in self._sheetnames:
+            raise DuplicateWorksheetName(
+                f"Sheetname '{sheetname}', with case ignored, is already in use."
+                )
+        self._sheetnames.add(sheetname.lower())
+
+        return sheetname
+
 
     def add_worksheet(self, name=None, gridlines="hide_all"):
         """
@@ -1070,9 +2369,10 @@ class GPWorkbook(Workbook):
         worksheet : gptables.GPWorksheet
             a worksheet object, which supports writing of GPTable objects
         """
-        worksheet = super(GPWorkbook, self).add_worksheet(name, GPWorksheet)
+        worksheet = super(GPWorkbook, self).add_worksheet(name, self.worksheet_class)
         worksheet.theme = self.theme
         worksheet._workbook = self  # Create reference to wb, for formatting
+        worksheet._direct_xml = self.direct_xml
         
         worksheet.hide_gridlines({
             "show_all": 0,
@@ -1084,6 +2384,61 @@ class GPWorkbook(Workbook):
         return worksheet
 
 
+    def _get_packager(self):
+        """
+        Overwrite _get_packager() to collect the workbook parts with a
+        `PartPackager` when compression options are set.
+        """
+        if self.compression_level is None and self.compression_workers is None:
+            return super(GPWorkbook, self)._get_packager()
+
+        self._packager = PartPackager()
+        return self._packager
+
+
+    def _store_workbook(self):
+        """
+        Overwrite _store_workbook() to assemble the zip container with
+        `PartZipFile` when compression options are set.
+        """
+        if self.compression_level is None and self.compression_workers is None:
+            return super(GPWorkbook, self)._store_workbook()
+
+        # XlsxWriter prepares the parts, which are kept by the PartPackager.
+        # The empty zip file it then writes is discarded.
+        filename = self.filename
+        self.filename = BytesIO()
+        try:
+            super(GPWorkbook, self)._store_workbook()
+        finally:
+            self.filename = filename
+        parts = self._packager.parts
+        self._packager = None
+
+        xlsx_file = PartZipFile(
+            filename,
+            "w",
+            allowZip64=self.allow_zip64,
+            compresslevel=self.compression_level,
+            max_workers=self.compression_workers,
+            )
+        try:
+            for os_filename, xml_filename, is_binary in parts:
+                if self.in_memory:
+                    data = os_filename.getvalue()
+                    if not is_binary:
+                        data = data.encode("utf-8")
+                    xlsx_file.writestr(xml_filename, data)
+                else:
+                    xlsx_file.write(os_filename, xml_filename)
+            xlsx_file.close()
+        finally:
+            if not self.in_memory:
+                for os_filename, _, _ in parts:
+                    if os.path.exists(os_filename):
+                        os.remove(os_filename)
+
+
     def set_theme(self, theme):
         """
         Sets the theme for all GPTable objects written to the Workbook.
@@ -1102,6 +2457,55 @@ class GPWorkbook(Workbook):
             raise TypeError(f"`theme` must be a gptables.Theme object, not: {type(theme)}")
         self.theme = theme
 
+    def _split_oversized_sheets(self, sheets):
+        """
+        Split GPTables that exceed the Excel row limit into parts, written to
+        consecutive sheets labelled "label (2)", "label (3)" and so on.
+
+        Labels of later parts are truncated to the Excel limit of 31
+        characters. Where a label is already used by another sheet or part,
+        ignoring case as Excel does, the number is incremented until the label
+        is unique.
+
+        Parameters
+        ----------
+        sheets : dict
+            mapping worksheet labels to gptables.GPTable objects
+
+        Returns
+        -------
+        dict
+            mapping worksheet labels to gptables.GPTable objects or parts
+        """
+        split_sheets = {}
+        used_labels = {label.lower() for label in sheets}
+        for label, gptable in sheets.items():
+            columns = gptable.table.shape[1]
+            if columns > EXCEL_MAX_COLUMNS:
+                msg = (f"{gptable.table_name} has {columns} columns, which"
+                       f" exceeds the Excel limit of {EXCEL_MAX_COLUMNS}."
+                       " Please split the table by column before adding it"
+                       " to a GPTable.")
+                raise ValueError(msg)
+
+            parts = gptable._split_rows(EXCEL_MAX_ROWS)
+            number = 1
+            for n, part in enumerate(parts):
+                if n == 0:
+                    part_label = label
+                else:
+                    part_label = None
+                    while part_label is None or part_label.lower() in used_labels:
+                        number += 1
+                        suffix = f" ({number})"
+                        # Excel sheet names are limited to 31 characters
+                        part_label = label[:31 - len(suffix)] + suffix
+                    used_labels.add(part_label.lower())
+                split_sheets[part_label] = part
+
+        return split_sheets
+
+
     def _update_annotations(self, sheets):
         ordered_refs = []
         for gptable in sheets.values():
@@ -1,7 +1,14 @@
+import asyncio
 import pytest
+import threading
+import zipfile
+import numpy as np
 import pandas as pd
+from io import BytesIO
 import gptables as gpt
+from gptables.core.wrappers import GPWorksheet
 from pathlib import Path
+from xlsxwriter.utility import xl_cell_to_rowcol
 
 from gptables.test.test_utils.excel_comparison_test import ExcelComparisonTest
 
@@ -83,3 +90,397 @@ def test_end_to_end(create_gpworkbook):
 
     ect.assertExcelEqual()
     ect.tearDown()
+
+
+def test_write_workbook_to_file_like():
+    """
+    Test that workbooks can be written to a binary file-like object, or
+    returned as bytes, without a file on disk.
+    """
+    table = pd.DataFrame({"columnA": ["x", "y"], "columnB": [0, 1]})
+    gptable = gpt.GPTable(table=table, table_name="table_name", title="Title")
+
+    buffer = BytesIO()
+    with pytest.warns(UserWarning):
+        returned = gpt.write_workbook(filename=buffer, sheets={"Label": gptable})
+
+    assert returned is None
+    assert zipfile.is_zipfile(buffer)
+
+    with pytest.warns(UserWarning):
+        got_bytes = gpt.write_workbook(filename=None, sheets={"Label": gptable})
+
+    with zipfile.ZipFile(BytesIO(got_bytes)) as got_zip:
+        assert "xl/worksheets/sheet2.xml" in got_zip.namelist()
+
+
+def test_produce_workbook_in_memory_option(tmp_path):
+    """
+    Test that XlsxWriter's `in_memory` option is enabled for file-like
+    objects and can be set explicitly for paths.
+    """
+    table = pd.DataFrame({"columnA": ["x", "y"], "columnB": [0, 1]})
+    gptable = gpt.GPTable(table=table, table_name="table_name", title="Title")
+
+    with pytest.warns(UserWarning):
+        wb = gpt.produce_workbook(filename=BytesIO(), sheets={"Label": gptable})
+    assert wb.in_memory
+    wb.close()
+
+    with pytest.warns(UserWarning):
+        wb = gpt.produce_workbook(
+            filename=tmp_path / "workbook.xlsx",
+            sheets={"Label": gptable},
+            in_memory=True
+            )
+    assert wb.in_memory
+    wb.close()
+    assert zipfile.is_zipfile(tmp_path / "workbook.xlsx")
+
+
+class AsyncSink:
+    """
+    Minimal asynchronous file-like sink.
+    """
+    def __init__(self):
+        self.chunks = []
+
+    async def write(self, data):
+        self.chunks.append(data)
+
+
+def test_write_workbook_async():
+    """
+    Test that the async API returns a workbook as bytes, or streams it to an
+    asynchronous sink, with the same parts as the synchronous API.
+    """
+    table = pd.DataFrame({"columnA": ["x", "y"], "columnB": [0, 1]})
+    sheets = {
+        f"Label{n}": gpt.GPTable(table=table, table_name=f"table_{n}", title="Title")
+        for n in range(3)
+        }
+
+    async def write_concurrently():
+        sink = AsyncSink()
+        got_bytes, _ = await asyncio.gather(
+            gpt.write_workbook_async(None, sheets),
+            gpt.write_workbook_async(sink, sheets, chunk_size=1024),
+            )
+        return got_bytes, b"".join(sink.chunks)
+
+    with pytest.warns(UserWarning):
+        got_bytes, got_streamed = asyncio.run(write_concurrently())
+        exp_bytes = gpt.write_workbook(None, sheets)
+
+    exp_zip = zipfile.ZipFile(BytesIO(exp_bytes))
+    for got in [got_bytes, got_streamed]:
+        got_zip = zipfile.ZipFile(BytesIO(got))
+        assert got_zip.namelist() == exp_zip.namelist()
+        assert got_zip.read("xl/worksheets/sheet4.xml") == exp_zip.read("xl/worksheets/sheet4.xml")
+
+
+def test_produce_workbook_async_cancellation(monkeypatch):
+    """
+    Test that producing a workbook can be cancelled between sheets, and that
+    no further sheets are written once it is.
+    """
+    table = pd.DataFrame({"columnA": ["x", "y"], "columnB": [0, 1]})
+    sheets = {
+        f"Label{n}": gpt.GPTable(table=table, table_name=f"table_{n}", title="Title")
+        for n in range(20)
+        }
+
+    written = []
+    sheet_written = threading.Event()
+    resume = threading.Event()
+    write_gptable = GPWorksheet.write_gptable
+
+    def record_write_gptable(self, *args, **kwargs):
+        write_gptable(self, *args, **kwargs)
+        written.append(self.name)
+        sheet_written.set()
+        # Hold the executor thread until the task has been cancelled
+        resume.wait(timeout=10)
+
+    monkeypatch.setattr(GPWorksheet, "write_gptable", record_write_gptable)
+
+    async def cancel_after_first_sheet():
+        task = asyncio.create_task(
+            gpt.produce_workbook_async(BytesIO(), sheets, contentsheet_label=None)
+            )
+        while not sheet_written.is_set():
+            await asyncio.sleep(0.001)
+        task.cancel()
+        resume.set()
+        await task
+
+    with pytest.warns(UserWarning):
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(cancel_after_first_sheet())
+
+    # asyncio.run() waits for the executor thread to finish
+    assert written == ["Label0"]
+
+
+def test_gptable_reused_across_workbooks():
+    """
+    Test that writing a GPTable does not modify it, so that it can be reused
+    in several workbooks.
+    """
+    table = pd.DataFrame({"columnA": ["x", "y"], "columnB": [0, 1]})
+    gptable = gpt.GPTable(
+        table=table,
+        table_name="table_name",
+        title="Title$$ref1$$",
+        table_notes={1: "$$ref2$$"},
+        )
+    notes_table = pd.DataFrame({
+        "Note reference": ["ref1", "ref2"],
+        "Note text": ["Some text", "Some more text"],
+        })
+
+    first = gpt.write_workbook(None, {"Label": gptable}, notes_table=notes_table)
+    second = gpt.write_workbook(None, {"Label": gptable}, notes_table=notes_table)
+
+    assert gptable.title == "Title$$ref1$$"
+    first_zip = zipfile.ZipFile(BytesIO(first))
+    second_zip = zipfile.ZipFile(BytesIO(second))
+    for name in ["xl/sharedStrings.xml", "xl/worksheets/sheet3.xml"]:
+        assert first_zip.read(name) == second_zip.read(name)
+
+
+def test_oversized_table_split_across_sheets(monkeypatch):
+    """
+    Test that a table exceeding the Excel row limit is written to
+    continuation sheets, each with headings, a worksheet table and an entry
+    in the table of contents.
+    """
+    monkeypatch.setattr(gpt.core.wrappers, "EXCEL_MAX_ROWS", 10)
+    table = pd.DataFrame({"columnA": [f"row {n}" for n in range(15)], "columnB": range(15)})
+    gptable = gpt.GPTable(table=table, table_name="table_name", title="Title")
+
+    buffer = BytesIO()
+    with pytest.warns(UserWarning):
+        wb = gpt.produce_workbook(buffer, sheets={"Label": gptable})
+
+    got_worksheets = wb.worksheets()
+    assert [ws.name for ws in got_worksheets] == ["Contents", "Label", "Label (2)", "Label (3)"]
+
+    heading_index = wb.str_table.string_table["columnA"]
+    for ws in got_worksheets[1:]:
+        assert len(ws.tables) == 1
+        first_row, _, last_row, _ = xl_range_to_rowcol(ws.tables[0]["range"])
+        assert last_row < 10
+        # Column headings are repeated in the first row of each table
+        assert ws.table[first_row][0].string == heading_index
+
+    wb.close()
+    with zipfile.ZipFile(buffer) as xlsx:
+        contents_sheet = xlsx.read("xl/worksheets/sheet1.xml").decode()
+    assert "Label (2)" in contents_sheet
+
+
+def test_partitioned_table_written_to_sheets(monkeypatch):
+    """
+    Test that partitions of a GPTable are written to one sheet each, with the
+    table prepared and column widths calculated once for all partitions.
+    """
+    table = pd.DataFrame({
+        "region": ["South", "North", "South", "North"],
+        "link": ["[Site](https://example.com)", "Plain", "Other", "Longer text"],
+        "value": [1, 2, 3, 4],
+        })
+    gptable = gpt.GPTable(
+        table=table,
+        table_name="table_name",
+        title="Title",
+        index_columns={1: 0},
+        )
+
+    calls = []
+    original_parse = gpt.core.wrappers.GPWorksheet._parse_table_urls
+    def counting_parse(self, gptable):
+        calls.append(gptable.table.shape[0])
+        return original_parse(self, gptable)
+    monkeypatch.setattr(gpt.core.wrappers.GPWorksheet, "_parse_table_urls", counting_parse)
+
+    with pytest.warns(UserWarning):
+        wb = gpt.produce_workbook(
+            BytesIO(),
+            sheets=gptable.partition_by("region"),
+            contentsheet_label=None,
+            auto_width=True,
+            )
+
+    assert [ws.name for ws in wb.worksheets()] == ["North", "South"]
+    assert calls == [4]
+
+    north, south = wb.worksheets()
+    # Widths are calculated from the whole table, so match across partitions
+    assert north.col_info == south.col_info
+    # The link in the South partition is written as a URL
+    assert south.hyperlinks
+    assert not north.hyperlinks
+
+    # Partitions can be reused in a workbook with different note order
+    with pytest.warns(UserWarning):
+        gpt.produce_workbook(BytesIO(), sheets=gptable.partition_by("region"))
+    wb.close()
+
+
+def xl_range_to_rowcol(cell_range):
+    first_cell, last_cell = cell_range.split(":")
+    return (*xl_cell_to_rowcol(first_cell), *xl_cell_to_rowcol(last_cell))
+
+
+def test_direct_xml_matches_default_writer():
+    """
+    Test that writing table bodies directly to worksheet XML gives the same
+    workbook as XlsxWriter's cell table, including cells that are not plain.
+    """
+    table = pd.DataFrame({
+        "Area": ["North", "[East](https://www.gov.uk)", "South", "West"],
+        "Count": [1, 2, 3, 4],
+        "Value": [1.5, np.nan, 3.25, 4.0],
+        "Text": ["a", "=b", "", "a"],
+        })
+    gptable = gpt.GPTable(
+        table=table,
+        table_name="data_table",
+        title="Title",
+        index_columns={2: 0},
+        additional_formatting=[
+            {"column": {"columns": ["Value"], "format": {"bold": True}}}
+            ],
+        )
+
+    def write(direct_xml):
+        output = BytesIO()
+        with pytest.warns(UserWarning):
+            wb = gpt.produce_workbook(
+                output,
+                {"Data": gptable},
+                contentsheet_label=None,
+                direct_xml=direct_xml
+                )
+        # Cells written after the table replace body cells
+        wb.get_worksheet_by_name("Data").write(5, 2, "Overwritten")
+        wb.close()
+        return zipfile.ZipFile(output)
+
+    exp_zip = write(False)
+    got_zip = write(True)
+
+    assert got_zip.namelist() == exp_zip.namelist()
+    for name in exp_zip.namelist():
+        if name != "docProps/core.xml":  # Contains creation time
+            assert got_zip.read(name) == exp_zip.read(name)
+
+
+@pytest.mark.parametrize("direct_xml", [False, True])
+def test_sparse_columns(direct_xml):
+    """
+    Test that the null fill cells of sparse columns are left to the column
+    format, and that other fill values are written to each cell.
+    """
+    table = pd.DataFrame({
+        "Origin": ["North", "South", "East", "West"],
+        "Missing": pd.arrays.SparseArray([np.nan, 1.5, np.nan, np.nan]),
+        "Zero": pd.arrays.SparseArray([0.0, 0.0, 2.5, 0.0], fill_value=0.0),
+        })
+    gptable = gpt.GPTable(
+        table=table,
+        table_name="data_table",
+        title="Title",
+        index_columns={2: 0},
+        )
+
+    with pytest.warns(UserWarning):
+        wb = gpt.produce_workbook(
+            BytesIO(),
+            {"Data": gptable},
+            contentsheet_label=None,
+            direct_xml=direct_xml
+            )
+    ws = wb.get_worksheet_by_name("Data")
+
+    # Column info is [width, format, ...], and the table body is rows 3 to 6
+    assert ws.col_info[1][1] is not None
+    assert ws.col_info[2][1] is None
+    if direct_xml:
+        written = {(row, col) for row, cells in ws._direct_rows.items() for col, *_ in cells}
+    else:
+        written = {(row, col) for row, cells in ws.table.items() for col in cells}
+    assert {(row, 1) for row in range(3, 7)} & written == {(4, 1)}
+    assert {(row, 2) for row in range(3, 7)} <= written
+    wb.close()
+
+
+def test_multiindex_matches_reset_index():
+    """
+    Test that a table with a MultiIndex is written as if its index had been
+    reset into index columns, including links and note references in index
+    labels.
+    """
+    table = pd.DataFrame(
+        {"Value": [1.5, 2.0, 3.25, 4.0]},
+        index=pd.MultiIndex.from_arrays(
+            [
+                ["North$$ref$$", "North$$ref$$", "[East](https://www.gov.uk)", "South"],
+                [2023, 2024, 2023, 2024],
+            ],
+            names=["Region", "Year"],
+            ),
+        )
+    notes_table = pd.DataFrame({"Note reference": ["ref"], "Note text": ["Note"]})
+
+    def write(gptable):
+        output = BytesIO()
+        gpt.write_workbook(output, {"Data": gptable}, notes_table=notes_table)
+        return zipfile.ZipFile(output)
+
+    exp_zip = write(gpt.GPTable(
+        table.reset_index(),
+        table_name="data_table",
+        title="Title",
+        index_columns={1: 0, 2: 1},
+        ))
+    got_zip = write(gpt.GPTable(table, table_name="data_table", title="Title"))
+
+    for name in exp_zip.namelist():
+        if name != "docProps/core.xml":  # Contains creation time
+            assert got_zip.read(name) == exp_zip.read(name)
+
+
+@pytest.mark.parametrize("direct_xml", [False, True])
+def test_string_dtype_matches_object(direct_xml, monkeypatch):
+    """
+    Test that text columns of pandas string dtype are written as if they
+    had object dtype, when written in several blocks of rows.
+    """
+    monkeypatch.setattr(gpt.core.wrappers, "_WRITE_BLOCK_ROWS", 2)
+    table = pd.DataFrame({
+        "Area": ["North", "[East](https://www.gov.uk)", "South", "West"],
+        "Label": ["a", None, "two\nlines", "a"],
+        "Value": [1.5, 2.0, 3.25, 4.0],
+        })
+    string_table = table.astype({"Area": "string", "Label": "string"})
+
+    def write(table):
+        output = BytesIO()
+        gptable = gpt.GPTable(
+            table,
+            table_name="data_table",
+            title="Title",
+            index_columns={2: 0},
+            )
+        with pytest.warns(UserWarning):
+            gpt.write_workbook(output, {"Data": gptable}, direct_xml=direct_xml)
+        return zipfile.ZipFile(output)
+
+    exp_zip = write(table)
+    got_zip = write(string_table)
+
+    for name in exp_zip.namelist():
+        if name != "docProps/core.xml":  # Contains creation time
+            assert got_zip.read(name) == exp_zip.read(name)
@@ -0,0 +1,96 @@
+import pytest
+import zipfile
+from io import BytesIO
+
+from gptables.core.compression import PartZipFile
+
+
+parts = {
+    "[Content_Types].xml": "<Types/>",
+    "xl/worksheets/sheet1.xml": "<worksheet>" + "<row/>" * 1000 + "</worksheet>",
+    "xl/media/image1.png": b"\x89PNG binary data",
+}
+
+
+def write_parts(**kwargs):
+    buffer = BytesIO()
+    zip_file = PartZipFile(buffer, "w", **kwargs)
+    for arcname, data in parts.items():
+        zip_file.writestr(zipfile.ZipInfo(arcname), data)
+    zip_file.close()
+    return buffer
+
+
+@pytest.mark.parametrize("compresslevel", [None, 0, 1, 9])
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_part_zip_file_round_trip(compresslevel, max_workers):
+    """
+    Test that parts written by PartZipFile can be read by zipfile, with the
+    expected compression type.
+    """
+    buffer = write_parts(compresslevel=compresslevel, max_workers=max_workers)
+
+    with zipfile.ZipFile(buffer) as got_zip:
+        assert got_zip.testzip() is None
+        assert got_zip.namelist() == list(parts.keys())
+
+        for arcname, data in parts.items():
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            assert got_zip.read(arcname) == data
+
+        exp_compression = zipfile.ZIP_STORED if compresslevel == 0 else zipfile.ZIP_DEFLATED
+        assert all(
+            info.compress_type == exp_compression
+            for info in got_zip.infolist()
+            )
+
+
+def test_part_zip_file_level_changes_size():
+    """
+    Test that store only output is larger than compressed output.
+    """
+    stored = write_parts(compresslevel=0)
+    compressed = write_parts(compresslevel=9)
+
+    assert len(stored.getvalue()) > len(compressed.getvalue())
+
+
+def test_part_zip_file_write_from_disk(tmp_path):
+    part_path = tmp_path / "part.xml"
+    part_path.write_text("<sheetData/>")
+
+    zip_file = PartZipFile(tmp_path / "out.xlsx", "w")
+    zip_file.write(part_path, "xl/part.xml")
+    zip_file.close()
+
+    with zipfile.ZipFile(tmp_path / "out.xlsx") as got_zip:
+        assert got_zip.read("xl/part.xml") == b"<sheetData/>"
+
+
+@pytest.mark.parametrize("compresslevel", [-1, 10, 1.5])
+def test_part_zip_file_invalid_level(compresslevel):
+    with pytest.raises(ValueError):
+        PartZipFile(BytesIO(), "w", compresslevel=compresslevel)
+
+
+def test_part_zip_file_write_removed_part(tmp_path):
+    """
+    Test that parts from disk can be removed by the caller before the
+    container is written, and that no copies are left behind.
+    """
+    part_path = tmp_path / "part.xml"
+    part_path.write_text("<sheetData/>" * 1000)
+
+    zip_file = PartZipFile(tmp_path / "out.xlsx", "w", max_workers=2)
+    zip_file.write(part_path, "xl/part.xml")
+    zip_file.writestr("xl/other.xml", "<other/>")
+    part_path.unlink()
+    zip_file.close()
+
+    with zipfile.ZipFile(tmp_path / "out.xlsx") as got_zip:
+        assert got_zip.testzip() is None
+        assert got_zip.read("xl/part.xml") == b"<sheetData/>" * 1000
+        assert got_zip.read("xl/other.xml") == b"<other/>"
+
+    assert [path.name for path in tmp_path.iterdir()] == ["out.xlsx"]
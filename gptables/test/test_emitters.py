@@ -0,0 +1,169 @@
+import gc
+import pytest
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+
+import gptables as gpt
+from gptables.core.emitters import EMITTERS, CsvEmitter
+from gptables.core.gptable import FormatList
+from gptables.core.wrappers import GPWorksheet
+
+
+@pytest.fixture(scope="function")
+def sheets():
+    table = pd.DataFrame({
+        "Area": ["North", "South", "[East](https://www.gov.uk)"],
+        "Value": [1.5, 2.25, 3.0],
+        })
+    return {
+        "Data": gpt.GPTable(
+            table=table,
+            table_name="data_table",
+            title="Title$$ref1$$",
+            units={"Value": "£"},
+            index_columns={2: 0},
+            additional_formatting=[
+                {"conditional": {"banded": True, "format": {"bg_color": "#EEEEEE"}}}
+                ],
+            )
+        }
+
+
+@pytest.fixture(scope="function")
+def notes_table():
+    return pd.DataFrame({"Note reference": ["ref1"], "Note text": ["Text"]})
+
+
+@pytest.fixture(scope="function")
+def cover():
+    return gpt.Cover(cover_label="Cover", title="Cover title", intro=["Intro"])
+
+
+def test_write_workbook_formats_xlsx_matches_write_workbook(sheets, notes_table, cover):
+    """
+    Test that the `.xlsx` output is the same as that of `write_workbook`.
+    """
+    expected = gpt.write_workbook(None, sheets, cover=cover, notes_table=notes_table)
+
+    output = BytesIO()
+    gpt.write_workbook_formats(
+        {"xlsx": output},
+        sheets,
+        cover=cover,
+        notes_table=notes_table
+        )
+
+    expected_zip = zipfile.ZipFile(BytesIO(expected))
+    got_zip = zipfile.ZipFile(output)
+    assert got_zip.namelist() == expected_zip.namelist()
+    for name in expected_zip.namelist():
+        # Creation time is recorded in the document properties
+        if name != "docProps/core.xml":
+            assert got_zip.read(name) == expected_zip.read(name)
+
+
+def test_write_workbook_formats_csv(sheets, notes_table, cover, tmp_path):
+    """
+    Test that a CSV file is written for each table, with plain text headings
+    and data.
+    """
+    gpt.write_workbook_formats(
+        {"csv": tmp_path / "csv"},
+        sheets,
+        cover=cover,
+        notes_table=notes_table
+        )
+
+    assert sorted(path.name for path in (tmp_path / "csv").iterdir()) == [
+        "Contents.csv", "Data.csv", "Notes.csv"
+        ]
+    got_data = (tmp_path / "csv" / "Data.csv").read_text(encoding="utf-8")
+    assert got_data.splitlines() == [
+        "Area,Value (£)",
+        "North,1.5",
+        "South,2.25",
+        "East,3.0",
+        ]
+
+
+def test_write_workbook_formats_prepares_once(sheets, notes_table, tmp_path, monkeypatch):
+    """
+    Test that each sheet is prepared once, however many formats are written.
+    """
+    prepared = []
+    original_write_gptable = GPWorksheet.write_gptable
+    def counting_write_gptable(self, gptable, *args, **kwargs):
+        prepared.append(self.name)
+        return original_write_gptable(self, gptable, *args, **kwargs)
+    monkeypatch.setattr(GPWorksheet, "write_gptable", counting_write_gptable)
+
+    gpt.write_workbook_formats(
+        {"xlsx": BytesIO(), "csv": tmp_path},
+        sheets,
+        notes_table=notes_table
+        )
+
+    assert prepared == ["Contents", "Notes", "Data"]
+
+
+def test_write_workbook_formats_discards_on_error(sheets, notes_table, tmp_path, monkeypatch):
+    """
+    Test that every emitter is discarded, and no output is left, when a sheet
+    cannot be written.
+    """
+    discarded = []
+    for output_format, emitter_class in EMITTERS.items():
+        def recording_discard(self, discard=emitter_class.discard, output_format=output_format):
+            discarded.append(output_format)
+            return discard(self)
+        monkeypatch.setattr(emitter_class, "discard", recording_discard)
+
+    original_write_gptable = GPWorksheet.write_gptable
+    def failing_write_gptable(self, gptable, *args, **kwargs):
+        if self.name == "Broken":
+            raise RuntimeError("Cannot write sheet")
+        return original_write_gptable(self, gptable, *args, **kwargs)
+    monkeypatch.setattr(GPWorksheet, "write_gptable", failing_write_gptable)
+
+    outputs = {
+        "xlsx": tmp_path / "out.xlsx",
+        "csv": tmp_path / "csv",
+        "ods": tmp_path / "out.ods",
+        }
+    with pytest.raises(RuntimeError, match="Cannot write sheet"):
+        gpt.write_workbook_formats(
+            outputs,
+            {**sheets, "Broken": sheets["Data"]},
+            notes_table=notes_table
+            )
+    gc.collect()
+
+    assert sorted(discarded) == ["csv", "ods", "xlsx"]
+    assert not outputs["xlsx"].exists()
+    assert not outputs["ods"].exists()
+    assert list(outputs["csv"].iterdir()) == []
+
+
+def test_write_workbook_formats_invalid_format(sheets):
+    """
+    Test that unsupported formats raise an error before anything is written.
+    """
+    with pytest.raises(ValueError):
+        gpt.write_workbook_formats({"pdf": BytesIO()}, sheets)
+
+
+@pytest.mark.parametrize("value,expected",
+    [
+        ("text", "text"),
+        (1.5, 1.5),
+        (None, ""),
+        (float("nan"), ""),
+        ([{"Display": "https://www.gov.uk"}], "Display"),
+        (["line 1", "line 2"], "line 1\nline 2"),
+        (FormatList([{"bold": True}, "bold", " text"]), "bold text"),
+    ]
+)
+def test__cell_text(value, expected):
+    assert CsvEmitter._cell_text(value) == expected
@@ -1,10 +1,14 @@
+import sqlite3
+
 import numpy as np
 import pandas as pd
 import pytest
+import re
 from pandas.testing import assert_frame_equal
 from contextlib import contextmanager
 
 
+import gptables.core.gptable
 from gptables import GPTable
 
 
@@ -162,6 +166,144 @@ class TestAttrValidationGPTable:
             create_gptable_with_kwargs({"table": not_a_table})
 
 
+    def test_table_from_columns(self, create_gptable_with_kwargs):
+        """
+        Test that a mapping of column name to values is stored as a
+        DataFrame, without copying NumPy arrays.
+        """
+        values = np.array([1.5, 2.0, np.nan])
+        gptable = create_gptable_with_kwargs({
+            "table": {
+                "area": np.array(["North", "South", "East"]),
+                "count": [1, None, 3],
+                "value": values,
+                },
+            "index_columns": {2: "area"},
+            "units": {"value": "GBP"},
+            })
+
+        exp = pd.DataFrame({
+            "area": ["North", "South", "East"],
+            "count": [1.0, np.nan, 3.0],
+            "value\n(GBP)": [1.5, 2.0, np.nan],
+            })
+        assert_frame_equal(gptable.table, exp)
+        assert np.shares_memory(gptable.table["value\n(GBP)"].to_numpy(), values)
+        assert gptable.index_columns == {2: 0}
+
+
+    def test_table_with_multiindex(self, create_gptable_with_kwargs):
+        """
+        Test that MultiIndex levels become categorical index columns, without
+        copying the table's columns.
+        """
+        table = pd.DataFrame(
+            {"value": [1.5, 2.0, 3.0]},
+            index=pd.MultiIndex.from_arrays(
+                [["North", "North", "South"], [2023, 2024, 2023]],
+                names=["region", None],
+                ),
+            )
+
+        gptable = create_gptable_with_kwargs({"table": table, "index_columns": None})
+
+        assert gptable.table.columns.tolist() == ["region", "level_1", "value"]
+        assert gptable.table["region"].tolist() == ["North", "North", "South"]
+        assert gptable.table["level_1"].tolist() == [2023, 2024, 2023]
+        assert isinstance(gptable.table["region"].dtype, pd.CategoricalDtype)
+        assert gptable.table.index.equals(pd.RangeIndex(3))
+        assert np.shares_memory(gptable.table["value"].to_numpy(), table["value"].to_numpy())
+        assert gptable.index_columns == {1: 0, 2: 1}
+        assert gptable._column_headings == {2}
+
+
+    @pytest.mark.parametrize("index,exp_columns",
+        [
+            (pd.Index(["a", "b"]), ["index", "value"]),
+            (pd.Index([5, 6], name="year"), ["year", "value"]),
+        ]
+    )
+    def test_table_with_index(self, index, exp_columns, create_gptable_with_kwargs):
+        table = pd.DataFrame({"value": [1, 2]}, index=index)
+
+        gptable = create_gptable_with_kwargs({"table": table, "index_columns": None})
+
+        assert gptable.table.columns.tolist() == exp_columns
+        assert gptable.index_columns == {1: 0}
+
+
+    @pytest.mark.parametrize("index_columns,exp_index_columns",
+        [
+            ({1: "region", 3: "year"}, {1: 0, 3: 1}),
+            ({2: 1, 3: 0}, {2: 1, 3: 0}),
+        ]
+    )
+    def test_table_with_index_given_index_columns(
+            self, index_columns, exp_index_columns, create_gptable_with_kwargs
+            ):
+        """
+        Test that `index_columns` given for a table with index levels can map
+        index levels to the index level columns by name or position.
+        """
+        table = pd.DataFrame(
+            {"value": [1.5, 2.0]},
+            index=pd.MultiIndex.from_arrays(
+                [["North", "South"], [2023, 2024]], names=["region", "year"]
+                ),
+            )
+
+        gptable = create_gptable_with_kwargs({"table": table, "index_columns": index_columns})
+
+        assert gptable.index_columns == exp_index_columns
+
+
+    @pytest.mark.parametrize("index_columns",
+        [{}, {2: 0}, {1: 0, 2: 1, 3: 2}, {1: "region", 2: "value"}, {1: "region", 2: "missing"}]
+    )
+    def test_table_with_index_mismatched_index_columns(
+            self, index_columns, create_gptable_with_kwargs
+            ):
+        """
+        Test that `index_columns` given for a table with index levels must
+        map to exactly the index level columns.
+        """
+        table = pd.DataFrame(
+            {"value": [1.5, 2.0]},
+            index=pd.MultiIndex.from_arrays(
+                [["North", "South"], [2023, 2024]], names=["region", "year"]
+                ),
+            )
+
+        with pytest.raises(ValueError, match="does not match the index levels"):
+            create_gptable_with_kwargs({"table": table, "index_columns": index_columns})
+
+
+    @pytest.mark.parametrize("index",
+        [
+            pd.Index([5, 6]),
+            pd.MultiIndex.from_arrays([[1, 2], [1, 2], [1, 2], [1, 2]]),
+        ]
+    )
+    def test_invalid_table_index(self, index, create_gptable_with_kwargs):
+        table = pd.DataFrame({"value": [1, 2]}, index=index)
+
+        with pytest.raises(ValueError):
+            create_gptable_with_kwargs({"table": table})
+
+
+    @pytest.mark.parametrize("columns,error",
+        [
+            ({"a": [1, 2], "b": [1]}, ValueError),
+            ({"a": np.zeros((2, 2))}, ValueError),
+            ({"a": "text"}, TypeError),
+            ({"a": 1}, TypeError),
+        ]
+    )
+    def test_invalid_table_columns(self, columns, error, create_gptable_with_kwargs):
+        with pytest.raises(error):
+            create_gptable_with_kwargs({"table": columns})
+
+
     def test_set_table_name(self, create_gptable_with_kwargs):
         """
         Test that setting GPTable table name with a valid string works as expected
@@ -464,6 +606,129 @@ class TestAttrValidationGPTable:
         }}]
 
 
+    @pytest.mark.parametrize("conditional", [
+        {"format": {"bold": True}},
+        {"banded": True, "formula": "A1>0", "format": {"bold": True}},
+        {"equals": "Total", "format": {"bold": True}},
+        {"equals": {"columnA": "Total", "columnB": 0}, "format": {"bold": True}},
+    ])
+    def test_invalid_conditional_formatting(self, conditional, create_gptable_with_kwargs):
+        """
+        Test that conditional formatting without exactly one condition raises
+        an error.
+        """
+        with pytest.raises(ValueError):
+            create_gptable_with_kwargs({
+                "additional_formatting": [{"conditional": conditional}]
+            })
+
+
+    @pytest.mark.parametrize("conditional,expected_formula,expected_columns", [
+        ({"banded": True}, "=MOD(ROW()-5,2)=0", [0, 1]),
+        ({"equals": {"columnA": "Total"}}, '=$A5="Total"', [0, 1]),
+        ({"equals": {1: 'Say "hi"'}, "columns": "columnB"}, '=$B5="Say ""hi"""', [1]),
+        ({"equals": {"columnB": 0}, "columns": [-1, 0]}, "=$B5=0", [0, 1]),
+        ({"formula": "B5>100", "columns": ["columnB"]}, "=B5>100", [1]),
+    ])
+    def test_conditional_formatting_compiled(self, conditional, expected_formula,
+        expected_columns, create_gptable_with_kwargs):
+        """
+        Test that conditional formatting is compiled to a formula relative to
+        the first row of the table body, with units added to column names.
+        """
+        gptable = create_gptable_with_kwargs({
+            "table": pd.DataFrame({"columnA": ["A", "Total"], "columnB": [1, 2]}),
+            "units": {"columnB": "unit"},
+            "additional_formatting": [
+                {"conditional": {**conditional, "format": {"bold": True}}}
+                ]
+        })
+
+        got = gptable._compiled_formatting.get_conditional_formats(
+            gptable.table.columns, 4
+            )
+
+        assert len(got) == 1
+        formula, columns, format_dict = got[0]
+        assert formula == expected_formula
+        assert columns.tolist() == expected_columns
+        assert format_dict == {"bold": True}
+
+
+    def test_additional_formatting_compiled(self, create_gptable_with_kwargs):
+        """
+        Test that additional formatting is compiled when set, with identical
+        formats stored once and column names resolved when applied.
+        """
+        gptable = create_gptable_with_kwargs({
+            "table": pd.DataFrame({"columnA": [1, 2], "columnB": [3, 4]}),
+            "units": {"columnB": "unit"},
+            "additional_formatting": [
+                {"column": {"columns": ["columnB"], "format": {"bold": True}}},
+                {"row": {"rows": [1, -1], "format": {"italic": True}}},
+                {"cell": {"cells": (1, 0), "format": {"bold": True}}},
+                ]
+        })
+
+        compiled = gptable._compiled_formatting
+        assert compiled.formats == [{"bold": True}, {"italic": True}]
+        assert [rule[4] for rule in compiled.rules] == [0, 1, 0]
+
+        format_ids, combined_formats = compiled.get_format_ids(
+            gptable.table.columns, 3, gptable.index_levels
+            )
+        assert [
+            [combined_formats[format_id] for format_id in row]
+            for row in format_ids.tolist()
+            ] == [
+            [{}, {"bold": True}],
+            [{"italic": True, "bold": True}, {"bold": True, "italic": True}],
+            [{"italic": True}, {"bold": True, "italic": True}],
+            ]
+
+
+    @pytest.mark.parametrize("columns", [
+        [1], [np.int64(1)], [np.int32(1)], ["columnB"], [np.int64(0), "columnB"],
+        ])
+    def test_additional_formatting_column_positions(
+            self, create_gptable_with_kwargs, columns
+            ):
+        """
+        Test that Python and numpy integers are used as column positions.
+        """
+        gptable = create_gptable_with_kwargs({
+            "table": pd.DataFrame({"columnA": [1, 2], "columnB": [3, 4]}),
+            "additional_formatting": [
+                {"column": {"columns": columns, "format": {"bold": True}}},
+                ]
+        })
+
+        format_ids, combined_formats = gptable._compiled_formatting.get_format_ids(
+            gptable.table.columns, 2, gptable.index_levels
+            )
+        got_bold = [
+            "bold" in combined_formats[format_id] for format_id in format_ids[0]
+            ]
+        assert got_bold == [0 in columns, True]
+
+
+    def test_additional_formatting_boolean_column(self, create_gptable_with_kwargs):
+        """
+        Test that booleans are not used as column positions.
+        """
+        gptable = create_gptable_with_kwargs({
+            "table": pd.DataFrame({"columnA": [1, 2], "columnB": [3, 4]}),
+            "additional_formatting": [
+                {"column": {"columns": [True], "format": {"bold": True}}},
+                ]
+        })
+
+        with pytest.raises(KeyError):
+            gptable._compiled_formatting.get_format_ids(
+                gptable.table.columns, 2, gptable.index_levels
+                )
+
+
     @pytest.mark.parametrize("column_names,expectation", [
         (["columnA", "columnB"], does_not_raise()),
         (["columnA", ""], pytest.raises(ValueError)),
@@ -564,3 +829,441 @@ class TestIndirectAttrs:
         gptable._set_annotations(description_order)
 
         assert gptable._annotations == ["1", "2", "3", "4", "5", "6", "7", "8"]
+
+
+    def test__annotations_cached(self, create_gptable_with_kwargs, monkeypatch):
+        """
+        Test that references are only rescanned when an annotated attribute
+        is set or the description order changes.
+        """
+        gptable = create_gptable_with_kwargs({
+            "title": "Title$$1$$",
+            "table": pd.DataFrame(columns=["col"]),
+            })
+
+        scans = []
+        original_scan = gptable._get_references_from_table
+        def counting_scan():
+            scans.append(1)
+            return original_scan()
+        monkeypatch.setattr(gptable, "_get_references_from_table", counting_scan)
+
+        description_order = ["instructions", "source", "scope", "legend"]
+        gptable._set_annotations(description_order)
+        gptable._set_annotations(description_order)
+        assert len(scans) == 1
+
+        gptable._set_annotations(description_order[::-1])
+        assert len(scans) == 2
+
+        gptable.set_title("New title$$2$$")
+        gptable._set_annotations(description_order)
+        assert len(scans) == 3
+        assert gptable._annotations == ["2"]
+
+        gptable.add_legend("Legend$$3$$")
+        gptable._set_annotations(description_order)
+        assert len(scans) == 4
+        assert gptable._annotations == ["2", "3"]
+
+
+    def test__slice_additional_formatting(self, create_gptable_with_kwargs):
+        """
+        Test that row and cell formatting is moved to the part containing
+        those rows, and column formatting is kept in every part.
+        """
+        gptable = create_gptable_with_kwargs({
+            "table": pd.DataFrame({"col": range(10)}),
+            "additional_formatting": [
+                {"column": {"columns": ["col"], "format": {"bold": True}}},
+                {"row": {"rows": [0, 2, -1], "format": {"italic": True}}},
+                {"cell": {"cells": (7, 0), "format": {"font_color": "red"}}},
+                ]
+            })
+
+        got_first = gptable._slice_additional_formatting(np.arange(0, 5))
+        got_second = gptable._slice_additional_formatting(np.arange(5, 10))
+
+        assert got_first == [
+            {"column": {"columns": ["col"], "format": {"bold": True}}},
+            {"row": {"rows": [0, 2], "format": {"italic": True}}},
+            ]
+        assert got_second == [
+            {"column": {"columns": ["col"], "format": {"bold": True}}},
+            {"row": {"rows": [0, 5], "format": {"italic": True}}},
+            {"cell": {"cells": [(2, 0)], "format": {"font_color": "red"}}},
+            ]
+
+
+    @pytest.mark.parametrize("column", ["region", 0])
+    def test_partition_by(self, create_gptable_with_kwargs, column):
+        """
+        Test that a GPTable is partitioned into one part per value of a
+        column, sharing the table and moving row formatting to the part
+        containing those rows.
+        """
+        gptable = create_gptable_with_kwargs({
+            "table": pd.DataFrame({
+                "region": ["South", "North", "South", "North", "East"],
+                "value": range(5),
+                }),
+            "units": {"region": "name"},
+            "index_columns": {1: 0},
+            "additional_formatting": [
+                {"row": {"rows": [0, 3], "format": {"bold": True}}},
+                ],
+            })
+
+        got = gptable.partition_by(column)
+
+        assert list(got.keys()) == ["East", "North", "South"]
+        assert [part._rows.tolist() for part in got.values()] == [[4], [1, 3], [0, 2]]
+        assert [part.table_name for part in got.values()] == [
+            "table_name_1", "table_name_2", "table_name_3"
+            ]
+        assert got["North"].subtitles == ["region: North"]
+        assert got["South"].additional_formatting == [
+            {"row": {"rows": [0, 2], "format": {"bold": True}}},
+            ]
+        assert got["North"].additional_formatting == [
+            {"row": {"rows": [0], "format": {"bold": True}}},
+            ]
+        assert got["North"].data_range == [3, 0, 5, 1]
+        assert all(part.table is gptable.table for part in got.values())
+        analysis = got["East"]._column_analysis
+        assert all(part._column_analysis is analysis for part in got.values())
+        assert gptable.subtitles == []
+
+
+    def test_partition_by_invalid_column(self, create_gptable_with_kwargs):
+        """
+        Test that partitioning by a column not in the table raises an error.
+        """
+        gptable = create_gptable_with_kwargs({
+            "table": pd.DataFrame({"region": ["South"], "value": [1]}),
+            })
+
+        with pytest.raises(ValueError):
+            gptable.partition_by("year")
+
+
+    @pytest.mark.parametrize("values,match", [
+        ([1, "1"], "labels '1' and '1'"),
+        ([1.0, "1.0"], "labels '1.0' and '1.0'"),
+        (["North", "NORTH"], "labels 'NORTH' and 'North'"),
+        (["North", np.nan], "missing values"),
+        (["North", None], "missing values"),
+        (["North", "North/South"], "must not contain"),
+        (["North", "[North]"], "must not contain"),
+        (["North", "x" * 32], "from 1 to 31 characters"),
+        (["North", ""], "from 1 to 31 characters"),
+        ])
+    def test_partition_by_invalid_labels(
+            self, create_gptable_with_kwargs, values, match
+            ):
+        """
+        Test that partitioning raises an error for missing values and for
+        values that do not give unique, valid worksheet labels.
+        """
+        gptable = create_gptable_with_kwargs({
+            "table": pd.DataFrame({"region": values, "value": range(2)}),
+            })
+
+        with pytest.raises(ValueError, match=re.escape(match)):
+            gptable.partition_by("region")
+
+
+    def test_partition_by_part(self, create_gptable_with_kwargs):
+        """
+        Test that partitioning a part selects rows of the whole table.
+        """
+        gptable = create_gptable_with_kwargs({
+            "table": pd.DataFrame({
+                "region": ["South", "North", "South", "North", "East"],
+                "year": ["2020", "2020", "2021", "2021", "2021"],
+                }),
+            })
+
+        got = gptable.partition_by("year")["2021"].partition_by("region")
+
+        assert {key: part._rows.tolist() for key, part in got.items()} == {
+            "East": [4], "North": [3], "South": [2]
+            }
+
+
+
+    @pytest.mark.parametrize("short_column_rows", [1000, 0])
+    def test__get_column_profile(self, create_gptable_with_kwargs, short_column_rows, monkeypatch):
+        """
+        Test that each column is profiled, and that the profile is cached
+        until the table is modified. Short columns are profiled cell by cell,
+        and should match the array operations used for long columns.
+        """
+        monkeypatch.setattr(gptables.core.gptable, "_SHORT_COLUMN_ROWS", short_column_rows)
+        gptable = create_gptable_with_kwargs({
+            "table": pd.DataFrame({
+                "region": ["North$$1$$", "  ", "[South](https://www.gov.uk)", "[x]"],
+                "text": ["a", None, "-", ["b"]],
+                "value": [1.5, np.nan, 2.0, 3.0],
+                }),
+            "index_columns": {2: 0},
+            })
+
+        got = gptable._get_column_profile()
+        region, text, value = got["columns"]
+
+        assert region["whitespace"].tolist() == [1]
+        assert region["shorthand"].tolist() == [2, 3]
+        assert region["links"].tolist() == [2]
+        assert region["references"].tolist() == [0]
+        assert text["nulls"].tolist() == [1]
+        assert text["special"].tolist() == [2]
+        assert text["links"].tolist() == [3]
+        assert value["nulls"].tolist() == [1]
+        assert value["links"].tolist() == []
+        assert gptable._get_reference_rows().tolist() == [True, False, False, False]
+
+        assert gptable._get_column_profile() is got
+
+        gptable.table.loc[0, "value"] = 5.0
+        assert gptable._get_column_profile() is not got
+
+
+    @pytest.mark.parametrize("values",
+        [
+            ["North$$1$$", "  ", "[South](https://www.gov.uk)", "North$$1$$", None, "-"],
+            [2023, 2024, None, 2023, 2024, 2024],
+        ]
+    )
+    def test__profile_categorical_column(self, values):
+        """
+        Test that categorical columns, profiled from their categories, have
+        the same profile as object columns.
+        """
+        got = GPTable._profile_column(pd.Series(values, dtype="category"))
+        exp = GPTable._profile_column(pd.Series(values, dtype=object))
+
+        for key in ["nulls", "whitespace", "shorthand", "special", "links", "references"]:
+            assert got[key].tolist() == exp[key].tolist(), key
+
+
+    @pytest.mark.parametrize("dtype", ["string", "string[pyarrow]"])
+    def test__profile_string_column(self, dtype):
+        """
+        Test that string dtype columns, profiled from their distinct values,
+        have the same profile as object columns.
+        """
+        if "pyarrow" in dtype:
+            pytest.importorskip("pyarrow")
+        values = ["North$$1$$", "  ", "[South](https://www.gov.uk)", "North$$1$$", None, "-"]
+
+        got = GPTable._profile_column(pd.Series(values, dtype=dtype))
+        exp = GPTable._profile_column(pd.Series(values, dtype=object))
+
+        for key in ["nulls", "whitespace", "shorthand", "special", "links", "references"]:
+            assert got[key].tolist() == exp[key].tolist(), key
+
+
+    @pytest.mark.parametrize("values,fill_value",
+        [
+            (["[c]", "[c]", "  ", "North$$1$$", "[c]", "-"], "[c]"),
+            ([None, "a", None, "[x]", None, None], None),
+            ([0.0, 1.5, 0.0, np.nan, 0.0, 2.0], 0.0),
+            ([np.nan, 1.5, np.nan, np.nan, 3.0, np.nan], np.nan),
+        ]
+    )
+    def test__profile_sparse_column(self, values, fill_value):
+        """
+        Test that sparse columns, profiled from their stored values and fill
+        value, have the same profile as dense columns.
+        """
+        dense = pd.Series(values)
+        sparse = dense.astype(pd.SparseDtype(dense.dtype, fill_value))
+
+        got = GPTable._profile_column(sparse)
+        exp = GPTable._profile_column(dense)
+
+        assert got["dtype"] == sparse.dtype
+        for key in ["nulls", "whitespace", "shorthand", "special", "links", "references"]:
+            assert got[key].tolist() == exp[key].tolist(), key
+
+
+# Hashable values with text that is profiled and measured differently
+profile_values = [
+    "text", "", "  ", "\n", "[x]", "a [b c]", "[link](https://www.gov.uk)",
+    "[x](y) [z]", "!!", "-", "$5", "$$ref$$", "a$$b", "line 1\nline 22", "a\r\nbbb",
+    1, 2.5, True, -3, None, np.nan, pd.NA, pd.NaT, pd.Timestamp("2024-01-01"),
+    ]
+profile_strings = [value for value in profile_values if isinstance(value, str)] + [None]
+
+
+def profile_column_variants():
+    """
+    Columns of each kind profiled and measured by their own path.
+    """
+    return {
+        "object": pd.Series(profile_values + [["a", "[l](u)"], {"a": "b"}], dtype=object),
+        "sparse": pd.Series(pd.arrays.SparseArray(
+            profile_values, dtype=pd.SparseDtype(object, np.nan)
+            )),
+        "sparse_text_fill": pd.Series(pd.arrays.SparseArray(
+            profile_strings, dtype=pd.SparseDtype(object, "")
+            )),
+        "categorical": pd.Series(profile_strings, dtype="category"),
+        "string": pd.Series(profile_strings, dtype="string"),
+        "string[pyarrow]": pd.Series(profile_strings, dtype="string[pyarrow]"),
+        }
+
+
+class TestGPTableShortColumns:
+    """
+    Test that short columns, profiled cell by cell, give the same profile as
+    the array operations used for long columns.
+    """
+    @pytest.mark.parametrize("variant", [
+        "object", "sparse", "sparse_text_fill", "categorical", "string", "string[pyarrow]",
+        ])
+    def test_profile_matches_array_operations(self, variant, monkeypatch):
+        if "pyarrow" in variant:
+            pytest.importorskip("pyarrow")
+        column = profile_column_variants()[variant]
+
+        profiles = []
+        for short_column_rows in [10**9, 0]:
+            monkeypatch.setattr(gptables.core.gptable, "_SHORT_COLUMN_ROWS", short_column_rows)
+            profiles.append(GPTable._profile_column(column))
+        short, long = profiles
+
+        assert short["dtype"] == long["dtype"] == column.dtype
+        for key in ["nulls", "whitespace", "shorthand", "special", "links", "references"]:
+            assert short[key].tolist() == long[key].tolist(), key
+
+
+class TestGPTableFromCursor:
+    """
+    Test that GPTables can be created from DB-API cursors and queries.
+    """
+    @pytest.fixture(scope="function")
+    def connection(self):
+        connection = sqlite3.connect(":memory:")
+        connection.execute("CREATE TABLE data (area TEXT, count INTEGER, value REAL, flag INTEGER)")
+        connection.executemany(
+            "INSERT INTO data VALUES (?, ?, ?, ?)",
+            [("North", 1, 1.5, 1), ("South", None, 2.0, 0), ("East", 3, None, 1)],
+            )
+        yield connection
+        connection.close()
+
+
+    @pytest.mark.parametrize("batch_size", [1, 2, 10000])
+    def test_from_query(self, connection, batch_size):
+        """
+        Test that query results are read in batches, with dtypes inferred
+        from the first batch and promoted by later batches.
+        """
+        got = GPTable.from_query(
+            "SELECT * FROM data WHERE count IS NULL OR count > ?",
+            connection,
+            table_name="table_name",
+            title="Title",
+            params=(0,),
+            batch_size=batch_size,
+            units={"value": "GBP"},
+            )
+
+        exp = pd.DataFrame({
+            "area": ["North", "South", "East"],
+            "count": [1.0, np.nan, 3.0],
+            "value\n(GBP)": [1.5, 2.0, np.nan],
+            "flag": [1, 0, 1],
+            })
+        assert_frame_equal(got.table, exp)
+
+
+    def test_from_cursor_mixed_types(self, connection):
+        """
+        Test that columns whose values change type between batches are read
+        as objects.
+        """
+        connection.execute("INSERT INTO data VALUES ('West', 'n/a', 4.0, 1)")
+        cursor = connection.execute("SELECT area, count FROM data")
+
+        got = GPTable.from_cursor(cursor, "table_name", "Title", batch_size=1)
+
+        assert got.table["count"].dtype == object
+        assert got.table["count"].tolist()[-1] == "n/a"
+        assert got.table["count"].tolist()[0] == 1
+
+
+    def test_from_cursor_empty(self, connection):
+        cursor = connection.execute("SELECT area, value FROM data WHERE 0")
+
+        got = GPTable.from_cursor(cursor, "table_name", "Title")
+
+        assert got.table.columns.tolist() == ["area", "value"]
+        assert got.table.shape == (0, 2)
+
+
+    @pytest.mark.parametrize("batch_size", [0, 1.5])
+    def test_from_cursor_invalid_batch_size(self, connection, batch_size):
+        cursor = connection.execute("SELECT * FROM data")
+
+        with pytest.raises(ValueError):
+            GPTable.from_cursor(cursor, "table_name", "Title", batch_size=batch_size)
+
+
+class TestGPTableFromArrowFiles:
+    """
+    Test that GPTables can be created from Parquet and Feather files.
+    """
+    @pytest.fixture(scope="function")
+    def table(self):
+        return pd.DataFrame({
+            "area": ["North", "South", None],
+            "count": [1, 2, 3],
+            "value": [1.5, np.nan, 3.0],
+            })
+
+
+    @pytest.mark.parametrize("file_format", ["parquet", "feather"])
+    def test_from_file(self, tmp_path, table, file_format):
+        """
+        Test that only the columns requested are read, in the order given,
+        with strings kept in Arrow memory.
+        """
+        pytest.importorskip("pyarrow")
+        path = tmp_path / f"data.{file_format}"
+        getattr(table, f"to_{file_format}")(path)
+
+        got = getattr(GPTable, f"from_{file_format}")(
+            path,
+            table_name="table_name",
+            title="Title",
+            columns=["value", "area"],
+            index_columns={2: 1},
+            )
+
+        assert got.table.columns.tolist() == ["value", "area"]
+        assert got.table["area"].dtype == pd.StringDtype("pyarrow")
+        assert got.table["area"].isna().tolist() == [False, False, True]
+        assert got.table["value"].dtype == np.float64
+
+
+    def test_from_parquet_drops_stored_index(self, tmp_path, table):
+        pytest.importorskip("pyarrow")
+        path = tmp_path / "data.parquet"
+        table.set_index(pd.Index([5, 6, 7])).to_parquet(path)
+
+        got = GPTable.from_parquet(path, "table_name", "Title")
+
+        assert got.table.columns.tolist() == ["area", "count", "value"]
+        assert got.table.index.equals(pd.RangeIndex(3))
+
+
+    def test_from_parquet_missing_column(self, tmp_path, table):
+        pytest.importorskip("pyarrow")
+        path = tmp_path / "data.parquet"
+        table.to_parquet(path)
+
+        with pytest.raises(ValueError):
+            GPTable.from_parquet(path, "table_name", "Title", columns=["missing"])
@@ -0,0 +1,209 @@
+import pytest
+import zipfile
+from io import BytesIO
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+
+import gptables as gpt
+from gptables.core.gptable import FormatList
+from gptables.core.ods import OdsEmitter
+from gptables.core.prepare import PreparedSheet
+
+
+NS = {
+    "office": "urn:oasis:names:tc:opendocument:xmlns:office:1.0",
+    "style": "urn:oasis:names:tc:opendocument:xmlns:style:1.0",
+    "table": "urn:oasis:names:tc:opendocument:xmlns:table:1.0",
+    "text": "urn:oasis:names:tc:opendocument:xmlns:text:1.0",
+    "xlink": "http://www.w3.org/1999/xlink",
+}
+
+
+@pytest.fixture(scope="function")
+def sheets():
+    table = pd.DataFrame({
+        "Area": ["North", "South", "[East](https://www.gov.uk)"],
+        "Value": [1.5, 2.25, 3.0],
+        })
+    return {
+        "Data": gpt.GPTable(
+            table=table,
+            table_name="data_table",
+            title="Title",
+            index_columns={2: 0},
+            )
+        }
+
+
+def write_ods(sheets, **kwargs):
+    output = BytesIO()
+    with pytest.warns(UserWarning):
+        gpt.write_workbook_formats({"ods": output}, sheets, **kwargs)
+    return zipfile.ZipFile(output)
+
+
+def cell_texts(row):
+    return [
+        "".join(cell.itertext())
+        for cell in row.findall("table:table-cell", NS)
+        ]
+
+
+def test_ods_container(sheets):
+    """
+    Test that the mimetype is the first, uncompressed entry.
+    """
+    got_zip = write_ods(sheets)
+
+    first = got_zip.infolist()[0]
+    assert first.filename == "mimetype"
+    assert first.compress_type == zipfile.ZIP_STORED
+    assert got_zip.read("mimetype") == b"application/vnd.oasis.opendocument.spreadsheet"
+    for name in ["META-INF/manifest.xml", "styles.xml", "settings.xml"]:
+        ElementTree.fromstring(got_zip.read(name))
+
+
+def test_ods_content(sheets):
+    """
+    Test that sheets, cells, links and worksheet tables are written to
+    `content.xml`.
+    """
+    content = ElementTree.fromstring(write_ods(sheets).read("content.xml"))
+
+    tables = content.findall(".//table:table", NS)
+    assert [table.get(f"{{{NS['table']}}}name") for table in tables] == ["Contents", "Data"]
+
+    data_rows = tables[1].findall("table:table-row", NS)
+    assert cell_texts(data_rows[0]) == ["Title"]
+    assert cell_texts(data_rows[2]) == ["Area", "Value"]
+    assert cell_texts(data_rows[3]) == ["North", "1.5"]
+    value_cell = data_rows[3].findall("table:table-cell", NS)[1]
+    assert value_cell.get(f"{{{NS['office']}}}value-type") == "float"
+    assert value_cell.get(f"{{{NS['office']}}}value") == "1.5"
+
+    links = {
+        "".join(link.itertext()): link.get(f"{{{NS['xlink']}}}href")
+        for link in content.iterfind(".//text:a", NS)
+        }
+    assert links == {"Data": "#'Data'.A1", "East": "https://www.gov.uk"}
+
+    ranges = content.findall(".//table:database-range", NS)
+    assert {r.get(f"{{{NS['table']}}}name"): r.get(f"{{{NS['table']}}}target-range-address")
+            for r in ranges} == {
+        "contents_table": "'Contents'.A3:'Contents'.B4",
+        "data_table": "'Data'.A3:'Data'.B6",
+        }
+
+
+def test_ods_styles_deduplicated(sheets):
+    """
+    Test that cells with the same format share an automatic style.
+    """
+    content = ElementTree.fromstring(write_ods(sheets).read("content.xml"))
+
+    cell_styles = content.findall(
+        "office:automatic-styles/style:style[@style:family='table-cell']",
+        NS
+        )
+    style_names = [
+        cell.get(f"{{{NS['table']}}}style-name")
+        for cell in content.iterfind(".//table:table-cell", NS)
+        if cell.get(f"{{{NS['table']}}}style-name")
+        ]
+    assert len(cell_styles) == len(set(style_names))
+    assert len(cell_styles) < len(style_names)
+
+
+def test_ods_row_heights(sheets):
+    """
+    Test that rows with a calculated height share an automatic row style.
+    """
+    content = ElementTree.fromstring(
+        write_ods(sheets, auto_height=True).read("content.xml")
+        )
+
+    row_styles = {
+        style.get(f"{{{NS['style']}}}name"): style.find("style:table-row-properties", NS)
+        for style in content.iterfind(
+            "office:automatic-styles/style:style[@style:family='table-row']", NS
+            )
+        }
+    data_rows = content.findall(".//table:table[@table:name='Data']/table:table-row", NS)
+    table_styles = {row.get(f"{{{NS['table']}}}style-name") for row in data_rows[2:]}
+    assert table_styles == set(row_styles)
+    for properties in row_styles.values():
+        assert properties.get(f"{{{NS['style']}}}use-optimal-row-height") == "false"
+    assert data_rows[0].get(f"{{{NS['table']}}}style-name") is None
+
+
+def test_ods_spooled_to_disk(sheets):
+    """
+    Test that sheets spooled to a temporary file are written in full.
+    """
+    output = BytesIO()
+    emitter = OdsEmitter(output, spool_bytes=1)
+    emitter.emit_sheet(PreparedSheet(
+        label="Sheet",
+        cells=[(0, 0, "Title", {"bold": True}), (2, 1, 5, {})],
+        ))
+    emitter.close()
+
+    content = ElementTree.fromstring(zipfile.ZipFile(output).read("content.xml"))
+    rows = content.findall(".//table:table-row", NS)
+    assert cell_texts(rows[0]) == ["Title"]
+    assert rows[1].get(f"{{{NS['table']}}}number-rows-repeated") is None
+    assert cell_texts(rows[2]) == ["", "5"]
+
+
+@pytest.mark.parametrize("data,expected",
+    [
+        ("a & b", '<table:table-cell office:value-type="string"><text:p>a &amp; b</text:p></table:table-cell>'),
+        ("line 1\nline 2", '<table:table-cell office:value-type="string"><text:p>line 1<text:line-break/>line 2</text:p></table:table-cell>'),
+        (["line 1", "line 2"], '<table:table-cell office:value-type="string"><text:p>line 1</text:p><text:p>line 2</text:p></table:table-cell>'),
+        (2, '<table:table-cell office:value-type="float" office:value="2"><text:p>2</text:p></table:table-cell>'),
+        (np.nan, '<table:table-cell/>'),
+        (np.inf, '<table:table-cell table:formula="of:=1/0"><text:p>#DIV/0!</text:p></table:table-cell>'),
+        (-np.inf, '<table:table-cell table:formula="of:=-1/0"><text:p>#DIV/0!</text:p></table:table-cell>'),
+        (None, '<table:table-cell/>'),
+        (True, '<table:table-cell office:value-type="boolean" office:boolean-value="true"><text:p>TRUE</text:p></table:table-cell>'),
+        (pd.Timestamp("2024-01-31"), '<table:table-cell office:value-type="date" office:date-value="2024-01-31T00:00:00"><text:p>2024-01-31T00:00:00</text:p></table:table-cell>'),
+    ]
+)
+def test__cell_xml(data, expected):
+    assert OdsEmitter(BytesIO())._cell_xml(data, {}) == expected
+
+
+@pytest.mark.parametrize("format_dict,expected",
+    [
+        ({"bg_color": "red"}, ' fo:background-color="#FF0000"'),
+        ({"bg_color": "#1A2B3C"}, ' fo:background-color="#1A2B3C"'),
+        ({"bg_color": "automatic"}, ''),
+        ({"top": 1, "top_color": "navy"}, ' fo:border-top="0.75pt solid #000080"'),
+        ({"top": 1, "top_color": "automatic"}, ' fo:border-top="0.75pt solid #000000"'),
+    ]
+)
+def test__cell_properties_colors(format_dict, expected):
+    """
+    Test that XlsxWriter colour names and RGB strings are converted to ODF
+    colours.
+    """
+    cell_props, _ = OdsEmitter._cell_properties(format_dict)
+    assert cell_props == expected
+
+
+def test__cell_xml_rich_text():
+    emitter = OdsEmitter(BytesIO())
+
+    got = emitter._cell_xml(
+        FormatList(["Plain ", {"bold": True}, "bold"]),
+        {"font_size": 12}
+        )
+
+    assert got == (
+        '<table:table-cell table:style-name="ce1" office:value-type="string">'
+        '<text:p>Plain <text:span text:style-name="T1">bold</text:span></text:p>'
+        '</table:table-cell>'
+        )
+    assert list(emitter._text_styles) == [(("bold", True), ("font_size", 12))]
@@ -0,0 +1,119 @@
+import pytest
+import zipfile
+from copy import deepcopy
+from io import BytesIO
+
+import pandas as pd
+
+import gptables as gpt
+from gptables.core import plan as gpt_plan
+
+
+@pytest.fixture(scope="function")
+def sheets():
+    table = pd.DataFrame({
+        "Area": ["North", "South", "[East](https://www.gov.uk)"],
+        "Value": [1.5, 2.25, 3.0],
+        "Count": [1, 2, 3],
+        })
+    return {
+        "Data": gpt.GPTable(
+            table=table,
+            table_name="data_table",
+            title="Title$$ref1$$",
+            subtitles=["Subtitle"],
+            index_columns={2: 0},
+            )
+        }
+
+
+@pytest.fixture(scope="function")
+def notes_table():
+    return pd.DataFrame({"Note reference": ["ref1"], "Note text": ["Text"]})
+
+
+def test_plan_workbook_layout(sheets, notes_table):
+    """
+    Test that the plan records the cells, layout and formats of each sheet.
+    """
+    got_plan = gpt.plan_workbook(sheets, notes_table=notes_table)
+
+    assert [sheet.label for sheet in got_plan.sheets] == ["Contents", "Notes", "Data"]
+
+    data_plan = got_plan.sheets[2]
+    # Title, subtitle and instructions, then header row and three data rows
+    assert data_plan.rows == 7
+    assert data_plan.columns == 3
+    assert data_plan.data_range == [3, 0, 6, 2]
+    assert data_plan.cells == 3 + 4 * 3
+    assert data_plan.hyperlinks == 1
+    assert len(data_plan.column_widths) == 3
+    assert data_plan.formats > 0
+
+    assert got_plan.cells == sum(sheet.cells for sheet in got_plan.sheets)
+    assert got_plan.hyperlinks == 2  # Data link and contents link
+    assert got_plan.within_limits
+
+
+def test_plan_workbook_estimates(sheets, notes_table):
+    """
+    Test that size estimates are of the same order as the written workbook.
+    """
+    got_plan = gpt.plan_workbook(sheets, notes_table=notes_table)
+    xlsx_bytes = gpt.write_workbook(None, sheets, notes_table=notes_table)
+
+    with zipfile.ZipFile(BytesIO(xlsx_bytes)) as xlsx:
+        names = [name for name in xlsx.namelist() if name.startswith("xl/worksheets/")]
+        sheet_bytes = sum(xlsx.getinfo(name).file_size for name in names)
+
+    planned_sheet_bytes = sum(sheet.estimated_xml_bytes for sheet in got_plan.sheets)
+    assert 0.25 < planned_sheet_bytes / sheet_bytes < 4
+    assert got_plan.estimated_compressed_bytes < got_plan.estimated_uncompressed_bytes
+    assert got_plan.estimated_peak_memory_bytes > got_plan.estimated_uncompressed_bytes
+
+
+def test_plan_workbook_open_time_report(sheets, notes_table):
+    """
+    Test that the open time report counts wrapped cells and tables, and that
+    these are reduced by a theme's open time profile.
+    """
+    got_report = gpt.plan_workbook(sheets, notes_table=notes_table).open_time_report
+
+    theme = deepcopy(gpt.gptheme)
+    theme.update_open_time_profile(True)
+    got_optimised_report = gpt.plan_workbook(
+        sheets,
+        theme=theme,
+        notes_table=notes_table
+        ).open_time_report
+
+    assert got_report["tables"] == 3
+    assert got_report["hyperlinks"] == 2
+    assert got_report["wrapped_cells"] > 0
+    assert got_optimised_report["wrapped_cells"] < got_report["wrapped_cells"]
+
+
+def test_plan_workbook_does_not_write(sheets, notes_table):
+    """
+    Test that the planning workbook does not store cells or GPTable changes.
+    """
+    wb = gpt_plan.PlanningWorkbook()
+    ws = wb.add_worksheet("Data")
+    ws.write_gptable(sheets["Data"], auto_width=True, reference_order=["ref1"])
+
+    assert ws.table == {}
+    assert sheets["Data"].title == "Title$$ref1$$"
+
+
+def test_plan_workbook_limits(sheets, monkeypatch):
+    """
+    Test that sheets exceeding Excel limits are reported.
+    """
+    monkeypatch.setattr(gpt_plan, "EXCEL_MAX_ROWS", 5)
+
+    with pytest.warns(UserWarning):
+        got_plan = gpt.plan_workbook(sheets)
+
+    assert not got_plan.within_limits
+    assert got_plan.sheets[1].warnings == ["7 rows exceeds the Excel limit of 5"]
+    assert got_plan.warnings == ["Data: 7 rows exceeds the Excel limit of 5"]
@@ -1,11 +1,16 @@
 import pytest
 import os
+import sys
+import pickle
 from contextlib import redirect_stdout
 from pkg_resources import resource_filename
 from itertools import chain, combinations
 
+import gptables
+import gptables.core.theme
 from gptables import Theme
 from gptables import gptheme
+from gptables.core.theme import ThemeRegistry
 
 
 
@@ -63,6 +68,7 @@ data_format : {}
 source_format : {}
 legend_format : {}
 description_order : []
+open_time_profile : {}
 """
                 )
 
@@ -274,6 +280,36 @@ class TestOtherValidationTheme:
             empty_theme.update_description_order(format_order)
     
 
+    @pytest.mark.parametrize("profile,expected", [
+        (True, {"column_formats": True, "wrap_overflow_only": True, "max_formats": 256}),
+        (False, {}),
+        (None, {}),
+        ({"max_formats": 10}, {"column_formats": True, "wrap_overflow_only": True, "max_formats": 10}),
+        ({"column_formats": False}, {"column_formats": False, "wrap_overflow_only": True, "max_formats": 256}),
+        ])
+    def test_valid_open_time_profile(self, profile, expected, empty_theme):
+        """
+        Test that valid open_time_profile values are combined with the
+        defaults.
+        """
+        empty_theme.apply_config({"open_time_profile": profile})
+        assert empty_theme.open_time_profile == expected
+
+
+    @pytest.mark.parametrize("profile,error", [
+        ({"collapse": True}, ValueError),
+        ({"max_formats": 0}, ValueError),
+        ({"max_formats": 2.5}, ValueError),
+        ("on", TypeError),
+        ])
+    def test_invalid_open_time_profile(self, profile, error, empty_theme):
+        """
+        Test that invalid open_time_profile values raise an error.
+        """
+        with pytest.raises(error):
+            empty_theme.update_open_time_profile(profile)
+
+
     @pytest.mark.parametrize("description_order", powerset(valid_description_elements))
     def test_valid_description_order_values(self, description_order, empty_theme):
         """
@@ -282,3 +318,176 @@ class TestOtherValidationTheme:
         """
         empty_theme.update_description_order(list(description_order))
         assert getattr(empty_theme, "description_order") == list(description_order)
+
+
+class TestFrozenTheme:
+    """
+    Test Theme fingerprints and frozen snapshots.
+    """
+    def test_fingerprint_changes_on_update(self, empty_theme):
+        """
+        Test that the fingerprint changes when a Theme is updated, and matches
+        that of a Theme with the same settings.
+        """
+        before = empty_theme.fingerprint
+        empty_theme.update_title_format({"bold": True})
+
+        other = Theme({"title": {"bold": True}})
+        assert empty_theme.fingerprint != before
+        assert empty_theme.fingerprint == other.fingerprint
+        assert empty_theme == other
+
+
+    def test_direct_changes_compared(self, empty_theme):
+        """
+        Test that changes made directly to the format dictionaries of
+        editable Themes are included in comparisons and fingerprints.
+        """
+        other = Theme({"title": {"bold": True}})
+        before = empty_theme.fingerprint
+        assert empty_theme != other
+
+        empty_theme.title_format["bold"] = True
+
+        assert empty_theme == other
+        assert empty_theme.fingerprint == other.fingerprint != before
+
+        thawed = gptheme.freeze().thaw()
+        thawed.title_format["bold"] = False
+        assert thawed != gptheme.freeze()
+
+
+    def test_freeze(self):
+        """
+        Test that frozen Themes are equal to the original, hashable and can't
+        be updated.
+        """
+        frozen = gptheme.freeze()
+
+        assert frozen.frozen and not gptheme.frozen
+        assert frozen == gptheme
+        assert {frozen: 1}[gptheme.freeze()] == 1
+        with pytest.raises(TypeError):
+            frozen.update_title_format({"bold": False})
+        with pytest.raises(TypeError):
+            frozen.title_format["bold"] = False
+        with pytest.raises(TypeError):
+            frozen.description_order = []
+        with pytest.raises(TypeError):
+            hash(gptheme)
+
+
+    def test_frozen_pickle(self):
+        """
+        Test that frozen Themes stay frozen when pickled.
+        """
+        frozen = gptheme.freeze()
+
+        got = pickle.loads(pickle.dumps(frozen))
+
+        assert got.frozen
+        assert hash(got) == hash(frozen)
+
+
+    def test_thaw(self):
+        """
+        Test that thawed copies can be updated without changing the frozen
+        Theme.
+        """
+        frozen = gptheme.freeze()
+
+        thawed = frozen.thaw()
+        thawed.update_title_format({"bold": False})
+
+        assert thawed != frozen
+        assert frozen.title_format["bold"] is True
+
+
+@pytest.fixture()
+def theme_file(tmp_path):
+    path = tmp_path / "theme.yaml"
+    path.write_text("title:\n  bold: true\ndescription_order:\n  - source\n")
+    yield path
+
+
+@pytest.fixture()
+def count_parses(monkeypatch):
+    parses = []
+    safe_load = gptables.core.theme.yaml.safe_load
+    def counting_safe_load(stream):
+        parses.append(stream.name)
+        return safe_load(stream)
+    monkeypatch.setattr(gptables.core.theme.yaml, "safe_load", counting_safe_load)
+    yield parses
+
+
+class TestThemeRegistry:
+    """
+    Test that theme files are parsed once per process.
+    """
+    def test_theme_file_parsed_once(self, theme_file, count_parses):
+        """
+        Test that Themes initialised from the same file share one parse, and
+        that the configuration returned can be changed without affecting the
+        cache.
+        """
+        themes = [Theme(str(theme_file)) for _ in range(1000)]
+
+        assert len(count_parses) == 1
+        assert all(theme == themes[0] for theme in themes)
+        assert themes[0].title_format == {"bold": True}
+
+
+    def test_changed_file_parsed_again(self, theme_file, count_parses):
+        """
+        Test that a theme file is parsed again when it changes.
+        """
+        registry = ThemeRegistry()
+        registry.load_config(theme_file)
+        theme_file.write_text("title:\n  bold: false\n")
+        os.utime(theme_file, ns=(0, 0))
+
+        got = registry.load_config(theme_file)
+
+        assert len(count_parses) == 2
+        assert got == {"title": {"bold": False}}
+
+
+    def test_cache_dir(self, theme_file, count_parses, tmp_path):
+        """
+        Test that configurations stored in `cache_dir` are shared between
+        registries.
+        """
+        exp = ThemeRegistry(cache_dir=tmp_path / "cache").load_config(theme_file)
+
+        got = ThemeRegistry(cache_dir=tmp_path / "cache").load_config(theme_file)
+
+        assert len(count_parses) == 1
+        assert got == exp
+
+
+    def test_get_theme(self, theme_file):
+        """
+        Test that get_theme builds one frozen Theme per file, and resolves
+        the names of built-in themes.
+        """
+        registry = ThemeRegistry()
+
+        got = registry.get_theme(theme_file)
+
+        assert got.frozen
+        assert got is registry.get_theme(str(theme_file))
+        assert registry.get_theme("gptheme") == gptheme
+
+
+def test_unpickle_themes_deprecated(monkeypatch):
+    """
+    Test that the default theme can still be imported from its deprecated
+    location, with a warning.
+    """
+    monkeypatch.delitem(sys.modules, "gptables.utils.unpickle_themes", raising=False)
+
+    with pytest.warns(DeprecationWarning, match="gptables.gptheme"):
+        from gptables.utils.unpickle_themes import gptheme as got
+
+    assert got is gptables.gptheme
@@ -1,5 +1,8 @@
 import pytest
+import zipfile
 from collections import namedtuple
+from io import BytesIO
+import numpy as np
 import pandas as pd
 from pandas.testing import assert_frame_equal, assert_series_equal
 
@@ -8,10 +11,13 @@ import xlsxwriter
 import gptables
 from gptables.core.wrappers import GPWorkbook
 from gptables.core.wrappers import GPWorksheet
-from gptables.core.gptable import FormatList
+from gptables.core.wrappers import _BLANK, _NUMBER, _STRING, _OTHER
+from gptables.core.compression import PartPackager
+from gptables.core.gptable import FormatList, CompiledFormatting
 from gptables import Theme
 from gptables import gptheme
 from gptables.test.test_gptable import create_gptable_with_kwargs, does_not_raise
+from gptables.test.test_gptable import profile_column_variants
 
 Tb = namedtuple("Testbook", "wb ws")
 
@@ -234,6 +240,73 @@ class TestGPWorksheetWriting:
         assert len(cell) == 1
 
 
+    @pytest.mark.parametrize("value,expected", [
+        (None, _BLANK),
+        ("", _BLANK),
+        (float("nan"), _BLANK),
+        (1.5, _NUMBER),
+        (np.int64(3), _NUMBER),
+        ("text", _STRING),
+        ("=formula", _OTHER),
+        ("https://www.gov.uk", _OTHER),
+        (float("inf"), _OTHER),
+        (True, _OTHER),
+        ({"Display": "https://www.gov.uk"}, _OTHER),
+        (FormatList([{"bold": True}, "rich ", "text"]), _OTHER),
+        (pd.Timestamp("2024-01-31"), _OTHER),
+    ])
+    def test__classify_direct_column(self, testbook, value, expected):
+        values = np.empty(2, dtype=object)
+        values[:] = [value, "text"]
+
+        cell_types, _, string_codes, strings = testbook.ws._classify_direct_column(values)
+
+        assert cell_types.tolist() == [expected, _STRING]
+        assert strings[string_codes[1]] == "text"
+
+
+    @pytest.mark.parametrize("dtype", ["string", "string[pyarrow]"])
+    def test__classify_direct_string_column(self, testbook, dtype):
+        if "pyarrow" in dtype:
+            pytest.importorskip("pyarrow")
+        column = pd.Series(["text", None, "", "=formula", "text"], dtype=dtype)
+
+        cell_types, cell_values, string_codes, strings = (
+            testbook.ws._classify_direct_string_column(column)
+            )
+
+        assert cell_types.tolist() == [_STRING, _BLANK, _BLANK, _OTHER, _STRING]
+        assert cell_values.tolist() == [0] * 5
+        assert strings[string_codes[[0, 4]]].tolist() == ["text", "text"]
+
+
+    def test__index_shared_strings(self, testbook):
+        """
+        Test that distinct strings are added to the shared string table once,
+        in the order that `write()` would add them, and that string cells are
+        set to their indices.
+        """
+        ws = testbook.ws
+        ws._smart_write(0, 0, "c", {})
+        data = pd.DataFrame({
+            "A": ["a", "b", "a", "c"],
+            "B": ["b", {"d": "https://www.gov.uk"}, "e", "e"],
+            })
+        formats = pd.DataFrame({"A": [{}] * 4, "B": [{}] * 4})
+        columns = [
+            ws._classify_direct_column(data[col].to_numpy(dtype=object))
+            for col in data
+            ]
+
+        ws._index_shared_strings([1, 0], data, formats, columns)
+
+        assert ws.str_table.string_table == {"c": 0, "a": 1, "b": 2, "d": 3, "e": 4}
+        assert ws.str_table.count == 1 + 7 + 1
+        assert columns[0][1].tolist() == [1, 2, 1, 0]
+        assert columns[1][1][[0, 2, 3]].tolist() == [2, 4, 4]
+        assert ws.table[2][1].string == 3
+
+
     def test__write_empty_table(self, testbook, create_gptable_with_kwargs):
         gptable = create_gptable_with_kwargs({
             "table": pd.DataFrame({"col": [None]})
@@ -372,6 +445,29 @@ class TestGPWorksheetReferences:
         assert got_text == exp_text_dict
 
 
+    def test__reference_table_annotations_categorical(self, testbook):
+        """
+        Test that references in a categorical index column are replaced, with
+        the column converted to objects as the replaced labels are not
+        categories.
+        """
+        table = pd.DataFrame({
+            "Area": pd.Series(["North$$reference$$", "South"], dtype="category"),
+            "Value": [1, 2],
+            })
+        gptable = gptables.GPTable(
+            table=table,
+            table_name="table_name",
+            title="Title",
+            index_columns={2: 0},
+            )
+        testbook.ws._reference_table_annotations(gptable, ["reference"])
+
+        assert gptable.table["Area"].dtype == object
+        assert gptable.table["Area"].tolist() == ["North[note 1]", "South"]
+        assert gptable.table["Value"].tolist() == [1, 2]
+
+
 
 class TestGPWorksheetFormatUpdate:
     """
@@ -406,6 +502,75 @@ class TestGPWorksheetFormatUpdate:
         assert_frame_equal(test, exp)
 
 
+    def test__apply_additional_formatting(self, testbook):
+        """
+        Test that column, row and cell formatting is applied in order, and
+        that every cell item is applied.
+        """
+        formats = pd.DataFrame(
+            [[{} for col in range(3)] for row in range(4)],
+            columns=["index", "a", "b"]
+            )
+        compiled = CompiledFormatting([
+            {"column": {"columns": ["a", 2], "format": {"bold": True}, "include_names": False}},
+            {"row": {"rows": -1, "format": {"bold": False, "bottom": 1}, "include_names": False}},
+            {"cell": {"cells": (0, 0), "format": {"italic": True}}},
+            {"cell": {"cells": [(1, 0), (2, 2)], "format": {"font_color": "red"}}},
+            ])
+
+        testbook.ws._apply_additional_formatting(formats, compiled, index_levels=1)
+
+        assert formats.values.tolist() == [
+            [{"italic": True}, {}, {}],
+            [{"font_color": "red"}, {"bold": True}, {"bold": True}],
+            [{}, {"bold": True}, {"bold": True, "font_color": "red"}],
+            [{}, {"bold": False, "bottom": 1}, {"bold": False, "bottom": 1}],
+            ]
+        # Cells with the same formatting keep separate dictionaries
+        assert formats.iat[1, 1] is not formats.iat[1, 2]
+
+
+    def test__new_format_table(self, testbook):
+        """
+        Test that each heading has its own format dictionary, and that the
+        body cells of each column share one.
+        """
+        data = pd.DataFrame({"a": ["a", 1, 2], "b": ["b", 3, 4]})
+
+        formats = testbook.ws._new_format_table(data)
+        testbook.ws._apply_format(formats.iloc[1:, 1:], {"bold": True})
+
+        assert formats.values.tolist() == [
+            [{}, {}], [{}, {"bold": True}], [{}, {"bold": True}]
+            ]
+        assert formats.iat[1, 0] is formats.iat[2, 0]
+        assert formats.iat[0, 0] is not formats.iat[1, 0]
+        assert formats.iat[1, 0] is not formats.iat[1, 1]
+
+
+    def test__apply_additional_formatting_shared_formats(self, testbook):
+        """
+        Test that formatting cells that share a dictionary does not format
+        the other cells, and that cells of a column with the same formatting
+        share a new dictionary.
+        """
+        data = pd.DataFrame({"index": ["index", "x", "y", "z"], "a": ["a", 1, 2, 3]})
+        formats = testbook.ws._new_format_table(data)
+        testbook.ws._apply_format(formats.iloc[1:, :], {"font_size": 10})
+        compiled = CompiledFormatting([
+            {"row": {"rows": [1, 3], "format": {"bold": True}, "include_names": False}},
+            ])
+
+        testbook.ws._apply_additional_formatting(formats, compiled, index_levels=1)
+
+        assert formats["a"].tolist() == [
+            {}, {"font_size": 10, "bold": True}, {"font_size": 10},
+            {"font_size": 10, "bold": True},
+            ]
+        assert formats.iat[1, 1] is formats.iat[3, 1]
+        assert formats.iat[1, 0] is not formats.iat[1, 1]
+
+
 
 class TestGPWorksheetTable:
     """
@@ -451,6 +616,43 @@ class TestGPWorksheetTable:
             assert got_heading_format.__dict__ == exp_heading_format.__dict__
 
 
+    def test__write_conditional_table_formats(
+        self, testbook, create_gptable_with_kwargs
+    ):
+        """
+        Test that each conditional formatting item is added once over the
+        table body, with a range for each run of consecutive columns.
+        """
+        gptable = create_gptable_with_kwargs({
+            "table": pd.DataFrame({
+                "col1": ["x"] * 1000, "col2": range(1000), "col3": range(1000)
+                }),
+            "additional_formatting": [
+                {"conditional": {"banded": True, "format": {"bg_color": "#EEEEEE"}}},
+                {"conditional": {
+                    "equals": {"col2": 0},
+                    "columns": ["col1", "col3"],
+                    "format": {"bold": True}
+                    }},
+                ]
+        })
+        first_row, _, last_row, _ = gptable.data_range
+
+        testbook.ws._write_conditional_table_formats(gptable)
+
+        banded_range = xlsxwriter.utility.xl_range(first_row + 1, 0, last_row, 2)
+        equals_range = (
+            f"{xlsxwriter.utility.xl_range(first_row + 1, 0, last_row, 0)}"
+            f" {xlsxwriter.utility.xl_range(first_row + 1, 2, last_row, 2)}"
+            )
+        assert list(testbook.ws.cond_formats) == [banded_range, equals_range]
+
+        banded, = testbook.ws.cond_formats[banded_range]
+        assert banded["criteria"] == f"=MOD(ROW()-{first_row + 2},2)=0"
+        equals, = testbook.ws.cond_formats[equals_range]
+        assert equals["criteria"] == f"=$B{first_row + 2}=0"
+
+
     @pytest.mark.parametrize("cell_val,exp_length",[
         ("string", 6),
         (42, 2),
@@ -485,6 +687,224 @@ class TestGPWorksheetTable:
         assert got_width == exp_width
 
 
+    def test__get_profiled_line_lengths(self, testbook):
+        gptable = gptables.GPTable(
+            table=pd.DataFrame({
+                "text": ["short", "[display](https://www.gov.uk)", "two\nlines"],
+                "value": [1.5, 22.25, 3],
+                "count": [1, 10, 100],
+                }),
+            table_name="table_name",
+            title="",
+            )
+        column_profile = gptable._get_column_profile()["columns"]
+        testbook.ws._parse_table_urls(gptable)
+
+        got_lengths = testbook.ws._get_profiled_line_lengths(gptable.table, column_profile)
+
+        assert got_lengths == testbook.ws._get_longest_line_lengths(gptable.table)
+        assert got_lengths == [7, 5, 3]
+        assert [profile["max_line_length"] for profile in column_profile] == [5, 5, 3]
+
+
+    @pytest.mark.parametrize("values,fill_value", [
+        ([0.0, 0.0, 12345.5, 0.0], 0.0),
+        ([np.nan, 1.25, np.nan, np.nan], np.nan),
+        (["[c]", "two\nlines", "[c]", "longer text"], "[c]"),
+        ])
+    def test__get_longest_line_length_sparse(self, testbook, values, fill_value):
+        dense = pd.Series(values)
+        sparse = dense.astype(pd.SparseDtype(dense.dtype, fill_value))
+
+        got_length = testbook.ws._get_longest_line_length(sparse)
+
+        assert got_length == max(testbook.ws._longest_line_length(value) for value in values)
+
+
+    @pytest.mark.parametrize("values", [
+        ["North", "two\nlines", "North", None],
+        [2023, 123456, 2023, 7],
+        ])
+    def test__get_longest_line_length_categorical(self, testbook, values):
+        column = pd.Series(values, dtype="category")
+
+        got_length = testbook.ws._get_longest_line_length(column)
+
+        assert got_length == max(
+            testbook.ws._longest_line_length(value)
+            for value in column.to_numpy(dtype=object)
+            )
+
+
+    @pytest.mark.parametrize("dtype", ["string", "string[pyarrow]"])
+    def test__get_longest_line_length_string(self, testbook, dtype):
+        if "pyarrow" in dtype:
+            pytest.importorskip("pyarrow")
+        column = pd.Series(["North", "two\nlines", "North", None, "longest one"], dtype=dtype)
+
+        assert testbook.ws._get_longest_line_length(column) == 11
+
+
+    @pytest.mark.parametrize("variant", [
+        "object", "sparse", "sparse_text_fill", "categorical", "string", "string[pyarrow]",
+        ])
+    def test__get_longest_line_length_short_columns(self, testbook, variant, monkeypatch):
+        """
+        Test that short columns, measured cell by cell, have the same longest
+        line as long columns measured with array operations, and as each cell
+        measured on its own.
+        """
+        if "pyarrow" in variant:
+            pytest.importorskip("pyarrow")
+        column = profile_column_variants()[variant]
+
+        lengths = []
+        for short_column_rows in [10**9, 0]:
+            monkeypatch.setattr(gptables.core.wrappers, "_SHORT_COLUMN_ROWS", short_column_rows)
+            lengths.append([
+                testbook.ws._get_longest_line_length(column.iloc[[row]])
+                for row in range(len(column))
+                ] + [testbook.ws._get_longest_line_length(column)])
+
+        exp_lengths = [
+            testbook.ws._longest_line_length(value)
+            for value in column.to_numpy(dtype=object)
+            ]
+        assert lengths[0] == lengths[1] == exp_lengths + [max(exp_lengths)]
+
+
+    def test__unwrap_fitting_cells(self, testbook):
+        table = pd.DataFrame({"col": ["heading", "short", "x" * 30, "two\nlines", 1.5]})
+        table_format = pd.DataFrame({"col": [{"text_wrap": True, "font_size": 10} for _ in range(5)]})
+
+        testbook.ws._unwrap_fitting_cells(table, table_format, [10])
+
+        got_wrapped = [bool(x.get("text_wrap")) for x in table_format["col"]]
+        assert got_wrapped == [False, False, True, True, False]
+
+
+    def test__unwrap_fitting_cells_shared_formats(self, testbook):
+        """
+        Test that cells sharing a format dictionary are unwrapped without
+        unwrapping cells that overflow.
+        """
+        table = pd.DataFrame({"col": ["heading", "short", "x" * 30, "tiny"]})
+        table_format = testbook.ws._new_format_table(table)
+        testbook.ws._apply_format(table_format, {"text_wrap": True, "font_size": 10})
+
+        testbook.ws._unwrap_fitting_cells(table, table_format, [10])
+
+        got_wrapped = [bool(x.get("text_wrap")) for x in table_format["col"]]
+        assert got_wrapped == [False, False, True, False]
+        assert table_format.iat[1, 0] is table_format.iat[3, 0]
+
+
+    def test__limit_formats(self, testbook):
+        table_format = pd.DataFrame({
+            "a": [{"bold": True}, {"bold": True}, {"italic": True}],
+            "b": [{}, {}, {"font_color": "red"}],
+            })
+
+        with pytest.warns(UserWarning):
+            testbook.ws._limit_formats(table_format, 2)
+
+        assert table_format["a"].tolist() == [{"bold": True}] * 3
+        assert table_format["b"].tolist() == [{}] * 3
+
+
+    def test__add_column_headings_row(self, testbook):
+        """
+        Test that headings are added as the first row, and that string dtype
+        columns keep their dtype.
+        """
+        table = pd.DataFrame({
+            "text": pd.Series(["a", None], dtype="string"),
+            "value": [1.5, 2.0],
+            })
+
+        got = testbook.ws._add_column_headings_row(table)
+
+        assert got["text"].dtype == "string"
+        assert got["value"].dtype == object
+        assert got["text"].tolist() == ["text", "a", pd.NA]
+        assert got["value"].tolist() == ["value", 1.5, 2.0]
+
+
+    def test__add_column_headings_row_by_position(self, testbook):
+        """
+        Test that string dtype columns are set by position, so columns with
+        the same heading are kept apart.
+        """
+        table = pd.DataFrame([["a", "b"], ["c", None]], columns=["text", "text"])
+        table = table.astype("string")
+
+        got = testbook.ws._add_column_headings_row(table)
+
+        assert got.columns.tolist() == ["text", "text"]
+        assert got.dtypes.tolist() == [pd.StringDtype(), pd.StringDtype()]
+        assert got.iloc[:, 0].tolist() == ["text", "a", "c"]
+        assert got.iloc[:, 1].tolist() == ["text", "b", pd.NA]
+
+
+    def test__collapse_column_formats(self, testbook):
+        table = pd.DataFrame({"a": [1, None, 3], "b": [None, 2, 3]})
+        table_format = pd.DataFrame({
+            "a": [{"bold": True}, {"bold": True}, {"italic": True}],
+            "b": [{"bg_color": "red"}] * 3,
+            })
+
+        got_formats = testbook.ws._collapse_column_formats(table, table_format)
+
+        assert got_formats == [{"bold": True}, {}]
+        assert table_format["a"].tolist() == [{"bold": True}, {}, {"italic": True}]
+        assert table_format["b"].tolist() == [{"bg_color": "red"}] * 3
+
+
+    def test__collapse_column_formats_selected_columns(self, testbook):
+        table = pd.DataFrame({"a": [1, None, 3], "b": [None, 2, 3]})
+        table_format = pd.DataFrame({
+            "a": [{"bold": True} for _ in range(3)],
+            "b": [{"bold": True} for _ in range(3)],
+            })
+
+        got_formats = testbook.ws._collapse_column_formats(table, table_format, [1])
+
+        assert got_formats == [{}, {"bold": True}]
+        assert table_format["a"].tolist() == [{"bold": True}] * 3
+        assert table_format["b"].tolist() == [{}, {"bold": True}, {"bold": True}]
+
+
+    def test__collapse_column_formats_shared_formats(self, testbook):
+        """
+        Test that blank body cells sharing a format dictionary with other
+        cells are given an empty format without changing the other cells or
+        the column headings.
+        """
+        table = pd.DataFrame({"a": ["a", None, 2, None, 4]})
+        table_format = testbook.ws._new_format_table(table)
+        testbook.ws._apply_format(table_format, {"bold": True})
+
+        got_formats = testbook.ws._collapse_column_formats(table, table_format, first_row=1)
+
+        assert got_formats == [{"bold": True}]
+        assert table_format["a"].tolist() == [
+            {"bold": True}, {}, {"bold": True}, {}, {"bold": True}
+            ]
+
+
+    @pytest.mark.parametrize("format,exp_heights", [
+        ({"font_size": 10, "text_wrap": True}, [12.75, 25.5, 51]),
+        ({"font_size": 10}, [12.75, 12.75, 12.75]),
+        ({"font_size": 12, "text_wrap": True}, [15, 30, 75])])
+    def test__calculate_row_heights(self, testbook, format, exp_heights):
+        table = pd.DataFrame({"col": ["one", "line 1\nline 2", "x" * 30]})
+        table_format = pd.DataFrame({"col": [format] * 3})
+
+        got_heights = testbook.ws._calculate_row_heights(table, table_format, [10])
+
+        assert got_heights == exp_heights
+
+
 
 class TestGPWorkbookStatic:
     """
@@ -536,6 +956,28 @@ class TestGPWorkbook:
         assert testbook.wb.theme == gptables.Theme(theme_config)
 
 
+    def test_add_format_shared(self, testbook):
+        """
+        Test that one Format is added for each distinct set of format
+        properties.
+        """
+        got = testbook.wb.add_format({"bold": True, "font_size": 12})
+
+        assert testbook.wb.add_format({"font_size": 12, "bold": True}) is got
+        assert testbook.wb.add_format({"bold": True}) is not got
+
+
+    def test_add_worksheet_duplicate_name(self, testbook):
+        """
+        Test that sheet names already in use, with case ignored, raise an
+        error.
+        """
+        testbook.wb.add_worksheet("Data")
+
+        with pytest.raises(xlsxwriter.exceptions.DuplicateWorksheetName):
+            testbook.wb.add_worksheet("DATA")
+
+
     @pytest.mark.parametrize("not_a_theme", [
         dict(),
         set(),
@@ -554,6 +996,101 @@ class TestGPWorkbook:
             testbook.wb.set_theme(not_a_theme)
 
 
+    def test__split_oversized_sheets(self, testbook, monkeypatch):
+        """
+        Test that tables exceeding the row limit are split into parts on
+        consecutive sheets, each fitting within the limit.
+        """
+        monkeypatch.setattr(gptables.core.wrappers, "EXCEL_MAX_ROWS", 10)
+        gptable = gptables.GPTable(
+            table=pd.DataFrame({"col": [f"row {n}" for n in range(20)]}),
+            table_name="table_name",
+            title="Title",
+            index_columns={},
+            )
+        small_gptable = gptables.GPTable(
+            table=pd.DataFrame({"col": ["x"]}),
+            table_name="small_table",
+            title="Small",
+            index_columns={},
+            )
+
+        got_sheets = testbook.wb._split_oversized_sheets({
+            "A long sheet label of 31 chars": gptable,
+            "Small": small_gptable,
+            })
+
+        assert list(got_sheets.keys()) == [
+            "A long sheet label of 31 chars",
+            "A long sheet label of 31 ch (2)",
+            "A long sheet label of 31 ch (3)",
+            "A long sheet label of 31 ch (4)",
+            "Small",
+            ]
+        assert got_sheets["Small"] is small_gptable
+
+        parts = list(got_sheets.values())[:4]
+        # Title, instructions and part subtitle, then column headings
+        assert [(part._rows[0], part._rows[-1]) for part in parts] == [
+            (0, 5), (6, 11), (12, 17), (18, 19)
+            ]
+        assert [part.table_name for part in parts] == [
+            "table_name", "table_name_2", "table_name_3", "table_name_4"
+            ]
+        assert all(part.data_range[2] < 10 for part in parts)
+        assert parts[1].subtitles == ["Part 2 of 4: rows 7 to 12 of 20"]
+        assert gptable.subtitles == []
+
+        got_table = parts[1]._copy_for_writing().table
+        assert got_table["col"].tolist() == [f"row {n}" for n in range(6, 12)]
+
+
+    def test__split_oversized_sheets_unique_labels(self, testbook, monkeypatch):
+        """
+        Test that part labels skip labels used by other sheets, including
+        labels truncated to the same 31 characters, ignoring case.
+        """
+        monkeypatch.setattr(gptables.core.wrappers, "EXCEL_MAX_ROWS", 10)
+
+        def make_gptable(rows):
+            return gptables.GPTable(
+                table=pd.DataFrame({"col": [f"row {n}" for n in range(rows)]}),
+                table_name="table_name",
+                title="Title",
+                index_columns={},
+                )
+
+        got_sheets = testbook.wb._split_oversized_sheets({
+            "Data": make_gptable(10),
+            "data (2)": make_gptable(1),
+            "A long sheet label of 31 chars": make_gptable(10),
+            "A long sheet label of 31 charz": make_gptable(10),
+            })
+
+        assert list(got_sheets.keys()) == [
+            "Data",
+            "Data (3)",
+            "data (2)",
+            "A long sheet label of 31 chars",
+            "A long sheet label of 31 ch (2)",
+            "A long sheet label of 31 charz",
+            "A long sheet label of 31 ch (3)",
+            ]
+
+
+    def test__split_oversized_sheets_columns(self, testbook, monkeypatch):
+        monkeypatch.setattr(gptables.core.wrappers, "EXCEL_MAX_COLUMNS", 2)
+        gptable = gptables.GPTable(
+            table=pd.DataFrame({"a": [1], "b": [2], "c": [3]}),
+            table_name="table_name",
+            title="Title",
+            index_columns={},
+            )
+
+        with pytest.raises(ValueError):
+            testbook.wb._split_oversized_sheets({"Sheet": gptable})
+
+
     def test__update_annotations(self, testbook, create_gptable_with_kwargs):
         """
         Test that _update_annotations produces a correctly ordered list of
@@ -587,6 +1124,62 @@ class TestGPWorkbook:
         assert gpworkbook._annotations == ["1", "2", "3", "4", "5"]
 
 
+    @pytest.mark.parametrize("options", [
+        {"compression_level": 0},
+        {"compression_level": 1, "compression_workers": 4},
+        {"compression_workers": 2},
+        ])
+    @pytest.mark.parametrize("in_memory", [True, False])
+    def test_compression_options(self, options, in_memory):
+        """
+        Test that compression options produce the same workbook parts as
+        XlsxWriter's default packaging.
+        """
+        def write(options):
+            buffer = BytesIO()
+            wb = GPWorkbook(buffer, {"in_memory": in_memory, **options})
+            ws = wb.add_worksheet("Sheet")
+            ws._smart_write(0, 0, "Some text", {"bold": True})
+            wb.close()
+            return zipfile.ZipFile(buffer)
+
+        exp_zip = write({})
+        got_zip = write(options)
+
+        assert got_zip.testzip() is None
+        assert got_zip.namelist() == exp_zip.namelist()
+        for name in exp_zip.namelist():
+            if name != "docProps/core.xml":  # Contains creation time
+                assert got_zip.read(name) == exp_zip.read(name)
+
+
+    def test_compression_packager(self):
+        """
+        Test that compression options collect workbook parts with a
+        `PartPackager`, and that XlsxWriter's Packager is used otherwise.
+        """
+        assert not isinstance(GPWorkbook(BytesIO())._get_packager(), PartPackager)
+        assert isinstance(
+            GPWorkbook(BytesIO(), {"compression_level": 1})._get_packager(),
+            PartPackager
+            )
+
+
+    def test_compression_removes_temporary_parts(self, tmp_path):
+        """
+        Test that temporary part files are removed once the workbook is
+        written with compression options.
+        """
+        buffer = BytesIO()
+        wb = GPWorkbook(buffer, {"compression_level": 1, "tmpdir": tmp_path})
+        ws = wb.add_worksheet("Sheet")
+        ws._smart_write(0, 0, "Some text", {"bold": True})
+        wb.close()
+
+        assert zipfile.ZipFile(buffer).testzip() is None
+        assert list(tmp_path.iterdir()) == []
+
+
     @pytest.mark.parametrize("additional_elements,values", [
         (None, None),
         (["scope"], ["scope"]),
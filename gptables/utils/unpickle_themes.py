@@ -1,20 +1,21 @@
-import pickle
-from pkg_resources import resource_filename
+"""
+Deprecated location of the default theme, which was unpickled here when
+gptables was imported. Use ``gptables.gptheme`` instead. This module will be
+removed in the next release.
+"""
+import warnings
 
-class ThemeUnpickler(pickle.Unpickler):
-    """
-    Points the unpickler to the Theme class. Allows unpickling for package
-    init.
-    """
-    def find_class(self, module, name):
-        if name =="Theme":
-            from gptables.core.theme import Theme
-            return Theme
-        return super().find_class(module, name)
+warnings.warn(
+    "gptables.utils.unpickle_themes is deprecated and will be removed in the"
+    " next release. Use gptables.gptheme instead.",
+    DeprecationWarning,
+    stacklevel=2
+    )
 
-gptheme = ThemeUnpickler(
-        open(
-            resource_filename("gptables", "theme_pickles/gptheme.pickle"),
-            "rb"
-            )
-        ).load()
+
+def __getattr__(name):
+    # Built when first used, as for gptables.gptheme
+    if name == "gptheme":
+        from gptables.core.theme import theme_registry
+        return theme_registry.gptheme
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")